@@ -0,0 +1,267 @@
+import math
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FLAT = "flat"
+IVF_FLAT = "ivf_flat"
+IVF_PQ = "ivf_pq"
+HNSW = "hnsw"
+INDEX_TYPES = (FLAT, IVF_FLAT, IVF_PQ, HNSW)
+
+# Scalar quantization of stored vectors: fp16 halves index memory, int8
+# (per-dimension min/max trained on a sample) quarters it
+QUANTIZATIONS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit
+}
+
+# Vectors sampled to train IVF centroids and scalar quantizers
+DEFAULT_TRAIN_SIZE = 100_000
+
+# Defaults per index type. nlist=None picks ~4*sqrt(n) lists at build time.
+# Lossy indexes (quantized or PQ) fetch rescore_factor * k candidates and
+# re-rank them with the exact vectors.
+DEFAULT_PARAMS = {
+    FLAT: {"quantization": None, "rescore_factor": 4, "train_size": DEFAULT_TRAIN_SIZE},
+    IVF_FLAT: {"nlist": None, "nprobe": 16, "quantization": None, "rescore_factor": 4,
+               "train_size": DEFAULT_TRAIN_SIZE},
+    IVF_PQ: {"nlist": None, "m": 16, "nbits": 8, "nprobe": 16, "rescore_factor": 4,
+             "train_size": DEFAULT_TRAIN_SIZE},
+    HNSW: {"M": 32, "ef_construction": 80, "ef_search": 64, "quantization": None, "rescore_factor": 4,
+           "train_size": DEFAULT_TRAIN_SIZE}
+}
+
+# Filtered searches over at most this many positions rank the candidates by brute force
+BRUTE_FORCE_LIMIT = 20_000
+
+# Parameters baked into the index file; changing them needs a rebuild
+BUILD_PARAMS = {
+    FLAT: ("quantization",),
+    IVF_FLAT: ("nlist", "quantization"),
+    IVF_PQ: ("nlist", "m", "nbits"),
+    HNSW: ("M", "ef_construction", "quantization")
+}
+
+# Parameters that can be tuned on a loaded index (our name -> FAISS name)
+SEARCH_PARAMS = {
+    IVF_FLAT: {"nprobe": "nprobe"},
+    IVF_PQ: {"nprobe": "nprobe"},
+    HNSW: {"ef_search": "efSearch"}
+}
+
+# Below this many vectors per IVF list, k-means training is unreliable
+MIN_POINTS_PER_CENTROID = 39
+
+
+def resolve_params(index_type: str, n_vectors: int, dim: int,
+                   params: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Fill in defaults and size-dependent parameters for an index build.
+
+    Corpora too small to train an IVF index fall back to flat search.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        n_vectors: Number of vectors the index is built from
+        dim: Vector dimension
+        params: Explicit parameters, overriding the defaults
+
+    Returns:
+        Tuple of (index type actually built, resolved parameters)
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    resolved = dict(DEFAULT_PARAMS[index_type])
+    resolved.update({key: value for key, value in (params or {}).items() if value is not None})
+
+    quantization = resolved.get("quantization")
+    if quantization is not None and quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {tuple(QUANTIZATIONS)}")
+    if quantization is not None and index_type == IVF_PQ:
+        raise ValueError("ivf_pq already compresses vectors, it cannot be scalar-quantized")
+
+    if index_type in (IVF_FLAT, IVF_PQ):
+        nlist = resolved.get("nlist") or int(4 * math.sqrt(n_vectors))
+        nlist = max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+        min_train = nlist * MIN_POINTS_PER_CENTROID
+        if index_type == IVF_PQ:
+            # Each sub-quantizer is a k-means with 2**nbits centroids over dim/m dimensions
+            m = resolved["m"]
+            while dim % m:
+                m -= 1
+            resolved["m"] = m
+            min_train = max(min_train, 2 ** resolved["nbits"])
+        if n_vectors < min_train:
+            logger.warning(f"{n_vectors} vectors are too few to train {index_type} "
+                           f"(need {min_train}), using flat search")
+            return resolve_params(FLAT, n_vectors, dim, {"quantization": quantization,
+                                                         "rescore_factor": resolved["rescore_factor"]})
+        resolved["nlist"] = nlist
+        resolved["nprobe"] = min(resolved["nprobe"], nlist)
+
+    return index_type, resolved
+
+
+def build_index(index_type: str, vectors: np.ndarray, params: Dict[str, Any]) -> faiss.Index:
+    """
+    Create an empty, trained L2 index of the given type.
+
+    IVF and quantized indexes are trained on a random sample of at most
+    ``train_size`` vectors; the caller adds the vectors afterwards.
+
+    Args:
+        index_type: One of INDEX_TYPES, as returned by resolve_params
+        vectors: (n, d) float32 vectors to train on
+        params: Parameters as returned by resolve_params
+    """
+    dim = vectors.shape[1]
+    qtype = QUANTIZATIONS.get(params.get("quantization"))
+
+    if index_type == FLAT:
+        index = faiss.IndexFlatL2(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+    elif index_type == HNSW:
+        index = faiss.IndexHNSWFlat(dim, params["M"]) if qtype is None else faiss.IndexHNSWSQ(dim, qtype, params["M"])
+        index.hnsw.efConstruction = params["ef_construction"]
+    else:
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == IVF_PQ:
+            index = faiss.IndexIVFPQ(quantizer, dim, params["nlist"], params["m"], params["nbits"])
+        elif qtype is None:
+            index = faiss.IndexIVFFlat(quantizer, dim, params["nlist"])
+        else:
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, params["nlist"], qtype, faiss.METRIC_L2)
+
+    if not index.is_trained:
+        sample = vectors
+        if len(vectors) > params["train_size"]:
+            rows = np.random.default_rng(0).choice(len(vectors), params["train_size"], replace=False)
+            sample = vectors[np.sort(rows)]
+        logger.info(f"Training {index_type} index ({params.get('quantization') or 'float32'}"
+                    f"{', nlist=' + str(params['nlist']) if 'nlist' in params else ''}) on {len(sample)} vectors")
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+
+    set_search_params(index, index_type, params)
+    return index
+
+
+def set_search_params(index: faiss.Index, index_type: str, params: Dict[str, Any]) -> None:
+    """Apply query-time parameters (nprobe, ef_search) to a built or loaded index."""
+    space = faiss.ParameterSpace()
+    for name, faiss_name in SEARCH_PARAMS.get(index_type, {}).items():
+        if params.get(name) is not None:
+            space.set_index_parameter(index, faiss_name, params[name])
+
+
+def supports_remove(index_type: str) -> bool:
+    """
+    Whether chunks can be deleted in place.
+
+    The LangChain FAISS wrapper assumes positions shift down after
+    ``remove_ids``, which only holds for flat indexes (IVF keeps ids, HNSW
+    cannot remove at all).
+    """
+    return index_type == FLAT
+
+
+def mmap_flags(index_type: str) -> int:
+    """
+    faiss.read_index flags that map a saved index read-only instead of copying it.
+
+    IVF inverted lists are mapped with IO_FLAG_MMAP; flat and HNSW vector
+    storage with IO_FLAG_MMAP_IFC. A mapped index cannot be added to.
+    """
+    if index_type in (IVF_FLAT, IVF_PQ):
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+
+def is_lossy(index_type: str, params: Dict[str, Any]) -> bool:
+    """Whether the index stores approximate vectors, so results are re-scored exactly."""
+    return index_type == IVF_PQ or params.get("quantization") is not None
+
+
+def rescore(query: np.ndarray, candidates: np.ndarray, exact_vectors: np.ndarray,
+            k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-rank approximate search candidates by exact L2 distance.
+
+    Args:
+        query: (d,) query vector
+        candidates: Positions returned by the index (-1 for empty slots)
+        exact_vectors: (n, d) full-precision vectors in index order, e.g. a memmap
+            (only the candidate rows are read)
+        k: Number of results to keep
+
+    Returns:
+        Tuple of (positions, squared L2 distances) of the k best candidates
+    """
+    positions = np.unique(candidates[candidates >= 0])
+    if not len(positions):
+        return positions, np.zeros(0, dtype=np.float32)
+    vectors = np.asarray(exact_vectors[positions], dtype=np.float32)
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    best = np.argsort(distances, kind='stable')[:k]
+    return positions[best], distances[best]
+
+
+def _selector_params(index: faiss.Index, selector: faiss.IDSelector, k: int) -> faiss.SearchParameters:
+    """Search parameters restricting a search to selected ids, keeping the index's nprobe / efSearch."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(index.hnsw.efSearch, k))
+    return faiss.SearchParameters(sel=selector)
+
+
+def filtered_search(index: faiss.Index, query: np.ndarray, k: int, positions: np.ndarray,
+                    exact_vectors: Optional[np.ndarray] = None,
+                    rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k search restricted to a set of index positions (metadata pre-filtering).
+
+    Candidate sets up to BRUTE_FORCE_LIMIT are ranked exactly against the
+    exact vectors, or vectors reconstructed from the index. Larger sets (or
+    IVF indexes, which cannot reconstruct without a direct map) are searched
+    through the index with a FAISS IDSelector, so every other vector is
+    skipped; lossy results are then re-scored.
+
+    Args:
+        index: Built or loaded index
+        query: (d,) query vector
+        k: Number of results
+        positions: Allowed index positions
+        exact_vectors: Full-precision vectors of a lossy index, if kept
+        rescore_factor: Candidates re-scored per result for lossy indexes
+
+    Returns:
+        Tuple of (positions, squared L2 distances), best first
+    """
+    positions = np.unique(np.asarray(positions, dtype=np.int64))
+    if len(positions) <= BRUTE_FORCE_LIMIT:
+        if exact_vectors is not None:
+            return rescore(query, positions, exact_vectors, k)
+        try:
+            vectors = index.reconstruct_batch(positions)
+        except RuntimeError:
+            vectors = None
+        if vectors is not None:
+            distances = ((vectors - query) ** 2).sum(axis=1)
+            best = np.argsort(distances, kind='stable')[:k]
+            return positions[best], distances[best]
+
+    selector = faiss.IDSelectorBatch(positions)
+    fetch = k * rescore_factor if exact_vectors is not None else k
+    distances, found = index.search(query[None, :], fetch, params=_selector_params(index, selector, fetch))
+    if exact_vectors is not None:
+        return rescore(query, found[0], exact_vectors, k)
+    keep = found[0] >= 0
+    return found[0][keep], distances[0][keep]
@@ -0,0 +1,137 @@
+import json
+import time
+import logging
+import threading
+from typing import List, Optional, Dict, Any
+
+import faiss
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def cache_scope(language: Optional[str], filters: Optional[Dict[str, Any]] = None) -> str:
+    """Scope key of a query: its language plus the listing filters parsed from it (see AttributeIndex)."""
+    scope = language or "default"
+    if filters:
+        scope = f"{scope}|{json.dumps(filters, sort_keys=True, ensure_ascii=False)}"
+    return scope
+
+
+class SemanticAnswerCache:
+    """
+    Cache of RAG answers looked up by query-embedding similarity.
+
+    Each scope (the language, plus any listing filters parsed from the
+    query) has its own small inner-product FAISS index over the
+    L2-normalized vectors of past queries, so a near-duplicate question
+    (cosine similarity above ``threshold``) reuses the stored answer and
+    sources instead of calling the LLM again. Questions that differ only
+    by price or place embed almost identically, hence the filter scope.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 3600, max_entries: int = 512):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            ttl: Seconds before an answer expires
+            max_entries: Maximum cached answers per scope
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._indexes: Dict[str, faiss.IndexIDMap2] = {}
+        self._entries: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        """Return the vector as a normalized (1, d) float32 array."""
+        array = np.asarray([vector], dtype=np.float32)
+        faiss.normalize_L2(array)
+        return array
+
+    def _remove(self, scope: str, entry_ids: List[int]) -> None:
+        """Remove entries from a scope (lock must be held)."""
+        if not entry_ids:
+            return
+        self._indexes[scope].remove_ids(np.asarray(entry_ids, dtype=np.int64))
+        for entry_id in entry_ids:
+            self._entries[scope].pop(entry_id, None)
+
+    def get(self, vector: List[float], scope: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a stored result for a query vector.
+
+        Args:
+            vector: Query embedding
+            scope: Scope of the query (language and listing filters)
+
+        Returns:
+            Stored result dict (answer, sources) or None on a miss
+        """
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None or index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            scores, ids = index.search(self._normalize(vector), 1)
+            score, entry_id = float(scores[0][0]), int(ids[0][0])
+            entry = self._entries[scope].get(entry_id)
+
+            if entry is not None and time.monotonic() - entry['created'] >= self.ttl:
+                self._remove(scope, [entry_id])
+                entry = None
+
+            if entry is None or score < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            logger.info(f"Semantic answer cache hit (similarity={score:.3f})")
+            return entry['result']
+
+    def put(self, vector: List[float], scope: str, result: Dict[str, Any]) -> None:
+        """Store the result for a query vector, evicting expired and oldest entries."""
+        with self._lock:
+            array = self._normalize(vector)
+            if scope not in self._indexes:
+                self._indexes[scope] = faiss.IndexIDMap2(faiss.IndexFlatIP(array.shape[1]))
+                self._entries[scope] = {}
+
+            entries = self._entries[scope]
+            now = time.monotonic()
+            expired = [entry_id for entry_id, entry in entries.items() if now - entry['created'] >= self.ttl]
+            self._remove(scope, expired)
+
+            overflow = len(entries) - self.max_entries + 1
+            if overflow > 0:
+                # Entries are stored in insertion order, so the first ones are the oldest
+                self._remove(scope, list(entries)[:overflow])
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._indexes[scope].add_with_ids(array, np.asarray([entry_id], dtype=np.int64))
+            entries[entry_id] = {'created': now, 'result': result}
+
+    def clear(self) -> None:
+        """Drop every cached answer (e.g. after the vector store is rebuilt)."""
+        with self._lock:
+            self._indexes.clear()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics."""
+        total = self.hits + self.misses
+        return {
+            'answer_cache_size': sum(len(entries) for entries in self._entries.values()),
+            'answer_cache_hits': self.hits,
+            'answer_cache_misses': self.misses,
+            'answer_cache_hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
@@ -1,17 +1,23 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, send_file, url_for
 from flask_cors import CORS
 from dotenv import load_dotenv
+import asyncio
 import base64
+import io
+import json
 import os
 from rag_engine import ask_question
-from noi import detect_language, get_ai_response, synthesize_speech_to_bytes
+from noi import detect_language, get_ai_response, get_local_response, synthesize_speech_to_bytes, prewarm_tts_cache, stream_speech_async, submit_speech, TTS_TIMEOUT
+from intent_router import classify_intent, DATETIME, TOURISM, OTHER
+from datetime_responder import get_current_datetime
+from audio_store import get_audio_store
+from async_runtime import get_background_loop
 
 from auth import auth_bp, token_required
 from chat_history import chat_bp
 from db import chat_collection
 from bson import ObjectId
 from datetime import datetime
-import pytz
 
 load_dotenv()
 
@@ -32,16 +38,81 @@ def health():
         'message': 'Chat and Voice API running'
     })
 
-def get_current_datetime():
-    """Helper function to get current datetime info"""
-    vn_tz = pytz.timezone('Asia/Ho_Chi_Minh')
-    now = datetime.now(vn_tz)
-    return {
-        'datetime': now.strftime('%d/%m/%Y %H:%M:%S'),
-        'date': now.strftime('%d/%m/%Y'),
-        'time': now.strftime('%H:%M:%S'),
-        'full': now.strftime('%A, %d %B %Y, %H:%M:%S')
-    }
+def rag_query(message, intent):
+    """Query for the RAG engine: time questions about tourism (e.g. opening hours) get the current time"""
+    if intent.name == DATETIME:
+        datetime_info = get_current_datetime()
+        return f"{message}. Hiện tại là {datetime_info['datetime']}"
+    return message
+
+def answer_message(message, lang, voice=False):
+    """Answer a message according to its intent"""
+    intent = classify_intent(message)
+    if intent.is_local:
+        # Greetings, farewells and plain time/date questions need no LLM call
+        return get_local_response(intent.name, lang, message)
+    if TOURISM in intent.tags or not voice:
+        # Use RAG for tourism queries
+        return ask_question(rag_query(message, intent), lang)
+    return get_ai_response(message, lang)
+
+async def rag_tokens(message, lang):
+    """Answer tokens of the RAG engine, for the voice pipeline"""
+    from rag_engine import get_rag_engine
+    # The first call loads the models, keep it off the event loop
+    engine = await asyncio.to_thread(get_rag_engine)
+    async for event, data in engine.astream_question(message, lang):
+        if event == 'token':
+            yield data
+
+def speech_segments(text, detected_lang, intent):
+    """Sentence/audio pipeline for a voice message: RAG for tourism, the LLM otherwise"""
+    if TOURISM in intent.tags:
+        return stream_speech_async(text, detected_lang, tokens=rag_tokens(rag_query(text, intent), detected_lang))
+    return stream_speech_async(text, detected_lang)
+
+def save_to_history(current_user_id, conversation_id, user_text, bot_text, lang):
+    """Append a user/bot message pair to a conversation owned by the user"""
+    if not conversation_id:
+        return
+    try:
+        if ObjectId.is_valid(conversation_id):
+            # Check if conversation exists and belongs to user
+            conversation = chat_collection.find_one({
+                '_id': ObjectId(conversation_id),
+                'user_id': ObjectId(current_user_id)
+            })
+            
+            if conversation:
+                # Add messages to existing conversation
+                timestamp = datetime.utcnow()
+                
+                user_msg = {
+                    '_id': ObjectId(),
+                    'text': user_text,
+                    'sender': 'user',
+                    'timestamp': timestamp,
+                    'language': lang
+                }
+                
+                bot_msg = {
+                    '_id': ObjectId(),
+                    'text': bot_text,
+                    'sender': 'bot',
+                    'timestamp': timestamp,
+                    'language': lang
+                }
+                
+                chat_collection.update_one(
+                    {'_id': ObjectId(conversation_id)},
+                    {
+                        '$push': {'messages': {'$each': [user_msg, bot_msg]}},
+                        '$set': {'updated_at': timestamp}
+                    }
+                )
+    except Exception as e:
+        print(f"Error saving to chat history: {str(e)}")
+        # Continue even if saving fails
 
 @app.route('/datetime', methods=['GET'])
 def get_datetime():
@@ -64,14 +135,7 @@ def chat():
         if not lang:
             lang = detect_language(message)
         
-        # Check if user is asking about time/date
-        time_keywords = ['giờ', 'ngày', 'tháng', 'năm', 'time', 'date', 'today', 'now', 'hôm nay', 'bây giờ']
-        if any(keyword in message.lower() for keyword in time_keywords):
-            datetime_info = get_current_datetime()
-            response_text = get_ai_response(f"{message}. Hiện tại là {datetime_info['datetime']}", lang)
-        else:
-            # Use RAG for tourism queries
-            response_text = ask_question(message)
+        response_text = answer_message(message, lang)
         
         return jsonify({
             'status': 'success', 
@@ -97,55 +161,10 @@ def chat_authenticated(current_user_id):
         if not lang:
             lang = detect_language(message)
         
-        # Check if user is asking about time/date
-        time_keywords = ['giờ', 'ngày', 'tháng', 'năm', 'time', 'date', 'today', 'now', 'hôm nay', 'bây giờ']
-        if any(keyword in message.lower() for keyword in time_keywords):
-            datetime_info = get_current_datetime()
-            response_text = get_ai_response(f"{message}. Hiện tại là {datetime_info['datetime']}", lang)
-        else:
-            # Use RAG for tourism queries
-            response_text = ask_question(message)
+        response_text = answer_message(message, lang)
         
         # Save to chat history if conversation_id is provided
-        if conversation_id:
-            try:
-                if ObjectId.is_valid(conversation_id):
-                    # Check if conversation exists and belongs to user
-                    conversation = chat_collection.find_one({
-                        '_id': ObjectId(conversation_id),
-                        'user_id': ObjectId(current_user_id)
-                    })
-                    
-                    if conversation:
-                        # Add messages to existing conversation
-                        timestamp = datetime.utcnow()
-                        
-                        user_msg = {
-                            '_id': ObjectId(),
-                            'text': message,
-                            'sender': 'user',
-                            'timestamp': timestamp,
-                            'language': lang
-                        }
-                        
-                        bot_msg = {
-                            '_id': ObjectId(),
-                            'text': response_text,
-                            'sender': 'bot',
-                            'timestamp': timestamp,
-                            'language': lang
-                        }
-                        
-                        chat_collection.update_one(
-                            {'_id': ObjectId(conversation_id)},
-                            {
-                                '$push': {'messages': {'$each': [user_msg, bot_msg]}},
-                                '$set': {'updated_at': timestamp}
-                            }
-                        )
-            except Exception as e:
-                print(f"Error saving to chat history: {str(e)}")
-                # Continue even if saving fails
+        save_to_history(current_user_id, conversation_id, message, response_text, lang)
         
         return jsonify({
             'status': 'success', 
@@ -155,6 +174,96 @@ def chat_authenticated(current_user_id):
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_chat_events(message, lang, on_done=None):
+    """Yield SSE events for a chat message: sources, tokens, then the full answer"""
+    try:
+        intent = classify_intent(message)
+        if TOURISM in intent.tags or intent.name == OTHER:
+            # Use RAG for tourism queries
+            from rag_engine import get_rag_engine
+            events = get_rag_engine().stream_question(rag_query(message, intent), lang)
+        else:
+            response_text = answer_message(message, lang)
+            events = [('sources', []), ('token', response_text), ('done', {'answer': response_text, 'sources': []})]
+        
+        for event, data in events:
+            if event == 'done':
+                if on_done:
+                    on_done(data['answer'])
+                data = {**data, 'language': lang}
+            yield sse_event(event, data)
+    except Exception as e:
+        print(f"Chat stream error: {str(e)}")
+        yield sse_event('error', {'message': str(e)})
+
+def sse_response(events):
+    """Wrap an SSE generator in an unbuffered streaming response"""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Public streaming chat endpoint (Server-Sent Events)"""
+    data = request.get_json(force=True)
+    message = (data or {}).get('message', '').strip()
+    lang = (data or {}).get('language')
+    
+    if not message:
+        return jsonify({'status': 'error', 'message': 'Missing message'}), 400
+    
+    if not lang:
+        lang = detect_language(message)
+    
+    return sse_response(stream_chat_events(message, lang))
+
+@app.route('/chat-authenticated/stream', methods=['POST'])
+@token_required
+def chat_authenticated_stream(current_user_id):
+    """Authenticated streaming chat endpoint that saves the full answer to history"""
+    data = request.get_json(force=True)
+    message = (data or {}).get('message', '').strip()
+    lang = (data or {}).get('language')
+    conversation_id = (data or {}).get('conversation_id')
+    
+    if not message:
+        return jsonify({'status': 'error', 'message': 'Missing message'}), 400
+    
+    if not lang:
+        lang = detect_language(message)
+    
+    def on_done(response_text):
+        save_to_history(current_user_id, conversation_id, message, response_text, lang)
+    
+    return sse_response(stream_chat_events(message, lang, on_done))
+
+def speech_fields(text, response_text, detected_lang, audio_mode=None):
+    """Audio part of a voice response: base64 MP3 (default) or, with audio_mode='url', a link to GET /audio/<id>"""
+    # Answers to time questions are one-off, keep them out of the TTS cache
+    cacheable = classify_intent(text).name != DATETIME
+    if audio_mode == 'url':
+        # Answer right away; the clip is synthesized in the background and fetched separately
+        audio_id = submit_speech(response_text, detected_lang, cacheable)
+        return {'audio_id': audio_id, 'audio_url': url_for('get_audio', audio_id=audio_id)}
+    audio_bytes = synthesize_speech_to_bytes(response_text, detected_lang, cacheable)
+    return {'audio': base64.b64encode(audio_bytes).decode('utf-8') if audio_bytes else ''}
+
+@app.route('/audio/<audio_id>', methods=['GET'])
+def get_audio(audio_id):
+    """Serve a synthesized clip as audio/mpeg (waits for a synthesis still in progress)"""
+    audio_bytes = get_audio_store().get(audio_id, timeout=TTS_TIMEOUT)
+    if not audio_bytes:
+        return jsonify({'status': 'error', 'message': 'Audio not found'}), 404
+    
+    # Ids are content addresses, so a clip never changes; conditional enables Range requests
+    return send_file(io.BytesIO(audio_bytes), mimetype='audio/mpeg', conditional=True, etag=audio_id, max_age=86400)
+
 @app.route('/voice-chat', methods=['POST'])
 def voice_chat():
     """Public voice chat endpoint (no authentication required)"""
@@ -170,28 +279,83 @@ def voice_chat():
         detected_lang = detect_language(text)
         print(f"Voice Chat - Input: '{text}' | Detected: {detected_lang} | Hint: {lang}")
         
-        # Always use AI response with proper language handling
-        time_keywords = ['giờ', 'ngày', 'tháng', 'năm', 'time', 'date', 'today', 'now', 'hôm nay', 'bây giờ']
-        if any(keyword in text.lower() for keyword in time_keywords):
-            datetime_info = get_current_datetime()
-            response_text = get_ai_response(f"{text}. Hiện tại là {datetime_info['datetime']}", detected_lang)
-        else:
-            response_text = get_ai_response(text, detected_lang)
+        response_text = answer_message(text, detected_lang, voice=True)
         
         # Generate audio in the same language as the response
-        audio_bytes = synthesize_speech_to_bytes(response_text, detected_lang)
-        audio_b64 = base64.b64encode(audio_bytes).decode('utf-8') if audio_bytes else ''
+        audio_fields = speech_fields(text, response_text, detected_lang, (data or {}).get('audio_mode'))
         
         return jsonify({
             'status': 'success',
             'response': response_text,
             'language': detected_lang,  # Return the actually detected language
-            'audio': audio_b64
+            **audio_fields
         })
     except Exception as e:
         print(f"Voice chat error: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def stream_voice_events(text, detected_lang, on_done=None):
+    """Yield one SSE event per answer sentence with its audio, then the full answer"""
+    try:
+        intent = classify_intent(text)
+        if intent.is_local:
+            response_text = get_local_response(intent.name, detected_lang, text)
+            audio_bytes = synthesize_speech_to_bytes(response_text, detected_lang, cacheable=intent.name != DATETIME)
+            segments = iter([(response_text, audio_bytes)])
+        else:
+            # Sentences are synthesized while the rest of the answer is still generating
+            segments = get_background_loop().iterate(speech_segments(text, detected_lang, intent))
+        
+        sentences = []
+        for sentence, audio_bytes in segments:
+            yield sse_event('sentence', {
+                'index': len(sentences),
+                'text': sentence,
+                'audio': base64.b64encode(audio_bytes).decode('utf-8') if audio_bytes else ''
+            })
+            sentences.append(sentence)
+        
+        response_text = ' '.join(sentences)
+        if on_done:
+            on_done(response_text)
+        yield sse_event('done', {'response': response_text, 'language': detected_lang})
+    except Exception as e:
+        print(f"Voice stream error: {str(e)}")
+        yield sse_event('error', {'message': str(e)})
+
+@app.route('/voice-chat/stream', methods=['POST'])
+def voice_chat_stream():
+    """Public pipelined voice chat endpoint (Server-Sent Events, one audio segment per sentence)"""
+    data = request.get_json(force=True)
+    text = (data or {}).get('text', '').strip()
+    
+    if not text:
+        return jsonify({'status': 'error', 'message': 'Missing text'}), 400
+    
+    # Always detect language from the actual text
+    detected_lang = detect_language(text)
+    
+    return sse_response(stream_voice_events(text, detected_lang))
+
+@app.route('/voice-chat-authenticated/stream', methods=['POST'])
+@token_required
+def voice_chat_authenticated_stream(current_user_id):
+    """Authenticated pipelined voice chat endpoint that saves the full answer to history"""
+    data = request.get_json(force=True)
+    text = (data or {}).get('text', '').strip()
+    conversation_id = (data or {}).get('conversation_id')
+    
+    if not text:
+        return jsonify({'status': 'error', 'message': 'Missing text'}), 400
+    
+    # Always detect language from the actual text
+    detected_lang = detect_language(text)
+    
+    def on_done(response_text):
+        save_to_history(current_user_id, conversation_id, text, response_text, detected_lang)
+    
+    return sse_response(stream_voice_events(text, detected_lang, on_done))
+
 @app.route('/voice-chat-authenticated', methods=['POST'])
 @token_required
 def voice_chat_authenticated(current_user_id):
@@ -209,61 +373,19 @@ def voice_chat_authenticated(current_user_id):
         detected_lang = detect_language(text)
         print(f"Authenticated Voice Chat - Input: '{text}' | Detected: {detected_lang} | Hint: {lang}")
         
-        # Always use AI response with proper language handling
-        time_keywords = ['giờ', 'ngày', 'tháng', 'năm', 'time', 'date', 'today', 'now', 'hôm nay', 'bây giờ']
-        if any(keyword in text.lower() for keyword in time_keywords):
-            datetime_info = get_current_datetime()
-            response_text = get_ai_response(f"{text}. Hiện tại là {datetime_info['datetime']}", detected_lang)
-        else:
-            response_text = get_ai_response(text, detected_lang)
+        response_text = answer_message(text, detected_lang, voice=True)
         
         # Generate audio in the same language as the response
-        audio_bytes = synthesize_speech_to_bytes(response_text, detected_lang)
-        audio_b64 = base64.b64encode(audio_bytes).decode('utf-8') if audio_bytes else ''
+        audio_fields = speech_fields(text, response_text, detected_lang, (data or {}).get('audio_mode'))
         
         # Save to chat history if conversation_id is provided
-        if conversation_id:
-            try:
-                if ObjectId.is_valid(conversation_id):
-                    conversation = chat_collection.find_one({
-                        '_id': ObjectId(conversation_id),
-                        'user_id': ObjectId(current_user_id)
-                    })
-                    
-                    if conversation:
-                        timestamp = datetime.utcnow()
-                        
-                        user_msg = {
-                            '_id': ObjectId(),
-                            'text': text,
-                            'sender': 'user',
-                            'timestamp': timestamp,
-                            'language': detected_lang
-                        }
-                        
-                        bot_msg = {
-                            '_id': ObjectId(),
-                            'text': response_text,
-                            'sender': 'bot',
-                            'timestamp': timestamp,
-                            'language': detected_lang
-                        }
-                        
-                        chat_collection.update_one(
-                            {'_id': ObjectId(conversation_id)},
-                            {
-                                '$push': {'messages': {'$each': [user_msg, bot_msg]}},
-                                '$set': {'updated_at': timestamp}
-                            }
-                        )
-            except Exception as e:
-                print(f"Error saving to chat history: {str(e)}")
+        save_to_history(current_user_id, conversation_id, text, response_text, detected_lang)
         
         return jsonify({
             'status': 'success',
             'response': response_text,
             'language': detected_lang,  # Return the actually detected language
-            'audio': audio_b64
+            **audio_fields
         })
     except Exception as e:
         print(f"Authenticated voice chat error: {str(e)}")
@@ -287,14 +409,18 @@ def get_rag_stats():
 @app.route('/rebuild-vectorstore', methods=['POST'])
 @token_required  # Chỉ admin mới có thể rebuild
 def rebuild_vectorstore(current_user_id):
-    """Rebuild vector store (admin only)"""
+    """Rebuild vector store in the background (admin only); queries use the current one until it is swapped in"""
     try:
         from rag_engine import get_rag_engine
-        get_rag_engine().create_vector_store(force_rebuild=True)
+        if not get_rag_engine().rebuild_in_background(force_rebuild=True):
+            return jsonify({
+                'status': 'success',
+                'message': 'Vector store rebuild already running'
+            }), 202
         return jsonify({
             'status': 'success',
-            'message': 'Vector store rebuilt successfully'
-        })
+            'message': 'Vector store rebuild started'
+        }), 202
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -336,4 +462,5 @@ if __name__ == '__main__':
     print('🚀 Chat API is ready on http://0.0.0.0:5000')
     print('🔐 Authentication endpoints available at /api/auth/*')
     print('💬 Chat history endpoints available at /api/chat/*')
+    prewarm_tts_cache()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
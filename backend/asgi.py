@@ -0,0 +1,328 @@
+"""
+ASGI entry point.
+
+/chat, /chat-authenticated, /voice-chat, /voice-chat-authenticated, their
+pipelined /voice-chat*/stream variants and the chat history API (/api/chat/*)
+are served by async handlers, so a single worker process can keep hundreds
+of LLM, TTS and MongoDB calls in flight.
+Every other route (auth, RAG admin, datetime, health, ...) is served by the
+Flask app mounted underneath. Routes and JSON contracts are unchanged.
+
+Run (see gunicorn.conf.py for the tuned production setup):
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
+    gunicorn -c gunicorn.conf.py asgi:app
+"""
+import os
+import asyncio
+import base64
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import anyio
+from bson import ObjectId
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.routing import Mount, Route
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+from app import app as flask_app, rag_query, speech_segments, sse_event
+from asgi_common import json_response, read_json, token_required_async
+from chat_history_asgi import routes as chat_history_routes
+from db import get_async_db
+from llm_client import get_llm_client
+from intent_router import classify_intent, DATETIME, TOURISM
+from noi import detect_language, get_ai_response_async, get_local_response, synthesize_speech_async, prewarm_tts_cache, stream_speech_async, submit_speech
+from rag_engine import get_rag_engine
+from tts_worker import get_tts_worker
+
+# Worker threads for CPU-bound work (embeddings, FAISS) and the mounted Flask app
+THREADPOOL_SIZE = int(os.getenv('ASGI_THREADPOOL_SIZE', '32'))
+
+
+async def save_to_history_async(current_user_id, conversation_id, user_text, bot_text, lang):
+    """Async counterpart of app.save_to_history"""
+    if not conversation_id:
+        return
+    try:
+        if ObjectId.is_valid(conversation_id):
+            chat_collection = get_async_db()['chat_history']
+            # Check if conversation exists and belongs to user
+            conversation = await chat_collection.find_one({
+                '_id': ObjectId(conversation_id),
+                'user_id': ObjectId(current_user_id)
+            })
+
+            if conversation:
+                timestamp = datetime.utcnow()
+
+                user_msg = {
+                    '_id': ObjectId(),
+                    'text': user_text,
+                    'sender': 'user',
+                    'timestamp': timestamp,
+                    'language': lang
+                }
+
+                bot_msg = {
+                    '_id': ObjectId(),
+                    'text': bot_text,
+                    'sender': 'bot',
+                    'timestamp': timestamp,
+                    'language': lang
+                }
+
+                await chat_collection.update_one(
+                    {'_id': ObjectId(conversation_id)},
+                    {
+                        '$push': {'messages': {'$each': [user_msg, bot_msg]}},
+                        '$set': {'updated_at': timestamp}
+                    }
+                )
+    except Exception as e:
+        print(f"Error saving to chat history: {str(e)}")
+        # Continue even if saving fails
+
+async def answer_chat(message, lang, voice=False):
+    """Async counterpart of app.answer_message"""
+    intent = classify_intent(message)
+    if intent.is_local:
+        # Greetings, farewells and plain time/date questions need no LLM call
+        return get_local_response(intent.name, lang, message)
+    if TOURISM in intent.tags or not voice:
+        # Use RAG for tourism queries
+        return await get_rag_engine().aask_question(rag_query(message, intent), language=lang)
+    return await get_ai_response_async(message, lang)
+
+async def answer_voice(text, detected_lang, audio_mode=None):
+    """Get the spoken answer text and its audio fields (base64 MP3, or an /audio/<id> link with audio_mode='url')"""
+    response_text = await answer_chat(text, detected_lang, voice=True)
+    # Answers to time questions are one-off, keep them out of the TTS cache
+    cacheable = classify_intent(text).name != DATETIME
+
+    if audio_mode == 'url':
+        # Answer right away; the clip is synthesized in the background and fetched separately
+        audio_id = submit_speech(response_text, detected_lang, cacheable)
+        return response_text, {'audio_id': audio_id, 'audio_url': f'/audio/{audio_id}'}
+
+    # Generate audio in the same language as the response
+    # Bounded by the shared TTS worker, like the Flask handlers
+    audio_bytes = await get_tts_worker().arun(synthesize_speech_async(response_text, detected_lang, cacheable))
+    audio_b64 = base64.b64encode(audio_bytes).decode('utf-8') if audio_bytes else ''
+    return response_text, {'audio': audio_b64}
+
+async def local_speech(response_text, detected_lang, cacheable=True):
+    """Single sentence/audio segment of a local reply"""
+    yield response_text, await synthesize_speech_async(response_text, detected_lang, cacheable)
+
+async def stream_voice_events(text, detected_lang, on_done=None):
+    """Async counterpart of app.stream_voice_events"""
+    try:
+        intent = classify_intent(text)
+        if intent.is_local:
+            segments = local_speech(get_local_response(intent.name, detected_lang, text), detected_lang,
+                                    cacheable=intent.name != DATETIME)
+        else:
+            # Sentences are synthesized while the rest of the answer is still generating
+            segments = speech_segments(text, detected_lang, intent)
+
+        sentences = []
+        async for sentence, audio_bytes in segments:
+            yield sse_event('sentence', {
+                'index': len(sentences),
+                'text': sentence,
+                'audio': base64.b64encode(audio_bytes).decode('utf-8') if audio_bytes else ''
+            })
+            sentences.append(sentence)
+
+        response_text = ' '.join(sentences)
+        if on_done:
+            await on_done(response_text)
+        yield sse_event('done', {'response': response_text, 'language': detected_lang})
+    except Exception as e:
+        print(f"Voice stream error: {str(e)}")
+        yield sse_event('error', {'message': str(e)})
+
+def sse_response(events):
+    """Unbuffered Server-Sent Events response"""
+    return StreamingResponse(
+        events,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+async def chat(request: Request):
+    """Public chat endpoint (no authentication required)"""
+    try:
+        data = await read_json(request)
+        message = (data or {}).get('message', '').strip()
+        lang = (data or {}).get('language')
+
+        if not message:
+            return json_response({'status': 'error', 'message': 'Missing message'}, 400)
+
+        if not lang:
+            lang = detect_language(message)
+
+        response_text = await answer_chat(message, lang)
+
+        return json_response({
+            'status': 'success',
+            'response': response_text,
+            'language': lang
+        })
+    except Exception as e:
+        return json_response({'status': 'error', 'message': str(e)}, 500)
+
+@token_required_async
+async def chat_authenticated(request: Request, current_user_id):
+    """Authenticated chat endpoint that saves to history"""
+    try:
+        data = await read_json(request)
+        message = (data or {}).get('message', '').strip()
+        lang = (data or {}).get('language')
+        conversation_id = (data or {}).get('conversation_id')
+
+        if not message:
+            return json_response({'status': 'error', 'message': 'Missing message'}, 400)
+
+        if not lang:
+            lang = detect_language(message)
+
+        response_text = await answer_chat(message, lang)
+
+        # Save to chat history if conversation_id is provided
+        await save_to_history_async(current_user_id, conversation_id, message, response_text, lang)
+
+        return json_response({
+            'status': 'success',
+            'response': response_text,
+            'language': lang
+        })
+    except Exception as e:
+        return json_response({'status': 'error', 'message': str(e)}, 500)
+
+async def voice_chat(request: Request):
+    """Public voice chat endpoint (no authentication required)"""
+    try:
+        data = await read_json(request)
+        text = (data or {}).get('text', '').strip()
+        lang = (data or {}).get('language')  # Optional language hint from frontend
+
+        if not text:
+            return json_response({'status': 'error', 'message': 'Missing text'}, 400)
+
+        # Always detect language from the actual text
+        detected_lang = detect_language(text)
+        print(f"Voice Chat - Input: '{text}' | Detected: {detected_lang} | Hint: {lang}")
+
+        response_text, audio_fields = await answer_voice(text, detected_lang, (data or {}).get('audio_mode'))
+
+        return json_response({
+            'status': 'success',
+            'response': response_text,
+            'language': detected_lang,
+            **audio_fields
+        })
+    except Exception as e:
+        print(f"Voice chat error: {str(e)}")
+        return json_response({'status': 'error', 'message': str(e)}, 500)
+
+@token_required_async
+async def voice_chat_authenticated(request: Request, current_user_id):
+    """Authenticated voice chat endpoint that saves to history"""
+    try:
+        data = await read_json(request)
+        text = (data or {}).get('text', '').strip()
+        lang = (data or {}).get('language')  # Optional language hint from frontend
+        conversation_id = (data or {}).get('conversation_id')
+
+        if not text:
+            return json_response({'status': 'error', 'message': 'Missing text'}, 400)
+
+        # Always detect language from the actual text
+        detected_lang = detect_language(text)
+        print(f"Authenticated Voice Chat - Input: '{text}' | Detected: {detected_lang} | Hint: {lang}")
+
+        response_text, audio_fields = await answer_voice(text, detected_lang, (data or {}).get('audio_mode'))
+
+        # Save to chat history if conversation_id is provided
+        await save_to_history_async(current_user_id, conversation_id, text, response_text, detected_lang)
+
+        return json_response({
+            'status': 'success',
+            'response': response_text,
+            'language': detected_lang,
+            **audio_fields
+        })
+    except Exception as e:
+        print(f"Authenticated voice chat error: {str(e)}")
+        return json_response({'status': 'error', 'message': str(e)}, 500)
+
+async def voice_chat_stream(request: Request):
+    """Public pipelined voice chat endpoint (Server-Sent Events, one audio segment per sentence)"""
+    data = await read_json(request)
+    text = (data or {}).get('text', '').strip()
+
+    if not text:
+        return json_response({'status': 'error', 'message': 'Missing text'}, 400)
+
+    # Always detect language from the actual text
+    detected_lang = detect_language(text)
+
+    return sse_response(stream_voice_events(text, detected_lang))
+
+@token_required_async
+async def voice_chat_authenticated_stream(request: Request, current_user_id):
+    """Authenticated pipelined voice chat endpoint that saves the full answer to history"""
+    data = await read_json(request)
+    text = (data or {}).get('text', '').strip()
+    conversation_id = (data or {}).get('conversation_id')
+
+    if not text:
+        return json_response({'status': 'error', 'message': 'Missing text'}, 400)
+
+    # Always detect language from the actual text
+    detected_lang = detect_language(text)
+
+    async def on_done(response_text):
+        await save_to_history_async(current_user_id, conversation_id, text, response_text, detected_lang)
+
+    return sse_response(stream_voice_events(text, detected_lang, on_done))
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Size the worker thread pools, pre-warm the TTS cache and close pooled clients on shutdown"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREADPOOL_SIZE))
+    prewarm_tts_cache()
+    yield
+    await get_llm_client().aclose()
+
+app = Starlette(
+    routes=[
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat-authenticated', chat_authenticated, methods=['POST']),
+        Route('/voice-chat', voice_chat, methods=['POST']),
+        Route('/voice-chat-authenticated', voice_chat_authenticated, methods=['POST']),
+        Route('/voice-chat/stream', voice_chat_stream, methods=['POST']),
+        Route('/voice-chat-authenticated/stream', voice_chat_authenticated_stream, methods=['POST']),
+        Mount('/api/chat', routes=chat_history_routes),
+        # Everything else is served by the Flask app
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    print('🚀 Chat API (ASGI) is ready on http://0.0.0.0:5000')
+    uvicorn.run('asgi:app', host='0.0.0.0', port=5000, workers=int(os.getenv('WEB_CONCURRENCY', '1')))
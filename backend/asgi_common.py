@@ -0,0 +1,54 @@
+import json
+from functools import wraps
+
+import jwt
+from bson import ObjectId
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app import app as flask_app
+from auth import JWT_SECRET
+from db import get_async_db
+
+
+def json_response(data, status_code=200):
+    """JSON response serialized exactly like Flask's jsonify (same contract as the WSGI app)"""
+    return Response(flask_app.json.dumps(data) + "\n", status_code=status_code, media_type='application/json')
+
+async def read_json(request: Request):
+    """Parse the request body as JSON regardless of Content-Type (like get_json(force=True))"""
+    body = await request.body()
+    return json.loads(body) if body else None
+
+def token_required_async(f):
+    """Async counterpart of auth.token_required for ASGI handlers"""
+    @wraps(f)
+    async def decorated(request: Request):
+        token = request.headers.get('Authorization')
+
+        if not token:
+            return json_response({'error': 'Token is missing'}, 401)
+
+        try:
+            # Remove 'Bearer ' prefix if present
+            if token.startswith('Bearer '):
+                token = token[7:]
+
+            data = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+            current_user_id = data['user_id']
+
+            # Get user from database
+            user = await get_async_db()['users'].find_one({'_id': ObjectId(current_user_id)})
+            if not user:
+                return json_response({'error': 'User not found'}, 401)
+
+        except jwt.ExpiredSignatureError:
+            return json_response({'error': 'Token has expired'}, 401)
+        except jwt.InvalidTokenError:
+            return json_response({'error': 'Token is invalid'}, 401)
+        except Exception:
+            return json_response({'error': 'Token validation failed'}, 401)
+
+        return await f(request, current_user_id)
+
+    return decorated
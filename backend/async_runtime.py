@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """
+    Long-lived asyncio event loop running in a daemon thread.
+
+    Lets synchronous Flask handlers use async clients (connection pools,
+    websockets) without creating and tearing down a loop per call.
+    """
+
+    def __init__(self, name: str = "background-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the running loop, starting its thread on first use."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                    thread.start()
+                    self._loop = loop
+                    logger.info(f"Started event loop thread '{self.name}'")
+        return self._loop
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Schedule a coroutine on the loop; thread-safe."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block until it finishes."""
+        return self.submit(coro).result(timeout)
+
+    def iterate(self, agen: AsyncIterator[Any]) -> Iterator[Any]:
+        """
+        Iterate an async generator on the loop from sync code.
+
+        Each item is awaited on the loop, so tasks started by the generator
+        keep running between items; closing the iterator closes the generator.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
+
+
+_background_loop = None
+
+def get_background_loop() -> BackgroundLoop:
+    """Get the process-wide background loop."""
+    global _background_loop
+    if _background_loop is None:
+        _background_loop = BackgroundLoop()
+    return _background_loop
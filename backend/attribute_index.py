@@ -0,0 +1,285 @@
+import os
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from record_splitter import parse_amounts
+from sparse_index import fold_diacritics
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Categorical listing attributes, stored as codes into per-column vocabularies
+CATEGORICAL = ('section', 'type', 'area', 'locality')
+
+# Code / price of a chunk without the attribute (not a listing)
+MISSING = -1
+
+# Accommodation types recognized in queries, beyond the sections found in the data
+TYPE_TERMS = ('khach san', 'khu nghi duong', 'homestay', 'nha nghi', 'villa', 'can ho')
+TYPE_SYNONYMS = {
+    'hotel': 'khach san',
+    'resort': 'khu nghi duong',
+    'guesthouse': 'nha nghi',
+    'motel': 'nha nghi',
+    'nha tro': 'nha nghi',
+    'apartment': 'can ho',
+    'hotels': 'khach san',
+    'resorts': 'khu nghi duong',
+    'guesthouses': 'nha nghi',
+    'motels': 'nha nghi',
+    'apartments': 'can ho',
+    'homestays': 'homestay',
+    'villas': 'villa'
+}
+# Words that ask for a place to stay without naming a type
+LISTING_TERMS = ('cho o', 'cho nghi', 'noi o', 'luu tru', 'gia phong', 'dat phong', 'thue phong', 'phong don',
+                 'phong doi', 'accommodation', 'lodging', 'room', 'rooms', 'place to stay', 'where to stay')
+
+_UNIT = r'(?:trieu|tr|million|mil|nghin|ngan|k)'
+# "1tr5" is 1,500,000
+_AMOUNT = rf'\d+(?:[.,]\d+)*\s*(?:{_UNIT}(?:(?<=tr)\d+)?)?\s*(?:vnd|dong|d)?(?!\w)'
+# Patterns run on diacritic-folded, lower-case queries
+PRICE_RANGE_PATTERN = re.compile(
+    rf'(?<!\w)(?:tu|khoang|between|from)\s+({_AMOUNT})\s*(?:-|den|toi|and|to)\s*({_AMOUNT})')
+PRICE_MAX_PATTERN = re.compile(
+    rf'(?<!\w)(?:duoi|khong qua|toi da|re hon|it hon|nho hon|under|below|less than|max|<=?)\s*({_AMOUNT})')
+PRICE_MIN_PATTERN = re.compile(
+    rf'(?<!\w)(?:tren|(?<!re )(?<!it )(?<!nho )hon|tu|toi thieu|lon hon|over|above|more than|from|min|>=?)'
+    rf'\s*({_AMOUNT})')
+
+# Bare numbers below this are not read as prices ("tu 2 ngay"), unless a range gives them a unit
+MIN_BARE_AMOUNT = 10_000
+
+
+def _parse_amount(text: str, multiplier: Optional[int] = None) -> Optional[int]:
+    """Parse one query amount, or None if it does not look like a price."""
+    text = re.sub(r'\s*(?:vnd|dong|d)$', '', text.strip())
+    amounts = parse_amounts(text)
+    if not amounts:
+        return None
+    if re.search(rf'{_UNIT}\d*$', text) or amounts[0] >= MIN_BARE_AMOUNT:
+        return amounts[0]
+    return amounts[0] * multiplier if multiplier else None
+
+
+def parse_price_filter(query: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Parse a price constraint from a query.
+
+    "homestay dưới 500k" gives (None, 500000), "từ 2 đến 3 triệu" gives
+    (2000000, 3000000), "trên 1 triệu" gives (1000000, None) and
+    "hotel below 1tr5" gives (None, 1500000).
+
+    Returns:
+        Tuple of (lowest, highest) acceptable nightly price in VND
+    """
+    folded = fold_diacritics(query)
+
+    match = PRICE_RANGE_PATTERN.search(folded)
+    if match:
+        high = _parse_amount(match.group(2))
+        # "tu 2 den 3 trieu": the first bound borrows the unit of the second
+        unit = re.search(rf'{_UNIT}', match.group(2))
+        low = _parse_amount(match.group(1), parse_amounts(f"1{unit.group(0)}")[0] if unit else None)
+        if low is not None and high is not None:
+            return min(low, high), max(low, high)
+
+    price_min = price_max = None
+    match = PRICE_MAX_PATTERN.search(folded)
+    if match:
+        price_max = _parse_amount(match.group(1))
+    match = PRICE_MIN_PATTERN.search(folded)
+    if match:
+        price_min = _parse_amount(match.group(1))
+    return price_min, price_max
+
+
+def _contains_term(text: str, term: str) -> bool:
+    return re.search(rf'(?<!\w){re.escape(term)}(?!\w)', text) is not None
+
+
+class AttributeIndex:
+    """
+    Columnar index of listing attributes by FAISS position.
+
+    Nightly price bounds are two int64 arrays; section, type, area and
+    locality are int32 code arrays into small vocabularies of
+    diacritic-folded values (MISSING for chunks that are not listings).
+    A query such as "homestay dưới 500k ở Cô Tô" is parsed into filters
+    that are evaluated with vectorized comparisons, and the matching
+    positions restrict the vector and keyword search.
+
+    Filters only apply when a query names an accommodation type or a
+    price; a place alone ("vịnh Hạ Long") does not restrict the search.
+    A query that asks for a place to stay is restricted to matching
+    listings; a price without that ("tour 3 ngày dưới 2 triệu") only
+    removes listings outside it and keeps every chunk that is not one.
+    """
+
+    def __init__(self, price_min: np.ndarray, price_max: np.ndarray,
+                 codes: Dict[str, np.ndarray], vocab: Dict[str, List[str]]):
+        self.price_min = price_min
+        self.price_max = price_max
+        self.codes = codes
+        self.vocab = vocab
+
+    def __len__(self) -> int:
+        return len(self.price_min)
+
+    @classmethod
+    def from_metadatas(cls, metadatas: List[Dict[str, Any]]) -> "AttributeIndex":
+        """Build the index from chunk metadata in index order (see RecordSplitter)."""
+        price_min = np.full(len(metadatas), MISSING, dtype=np.int64)
+        price_max = np.full(len(metadatas), MISSING, dtype=np.int64)
+        codes = {column: np.full(len(metadatas), MISSING, dtype=np.int32) for column in CATEGORICAL}
+        vocab: Dict[str, List[str]] = {column: [] for column in CATEGORICAL}
+        lookup: Dict[str, Dict[str, int]] = {column: {} for column in CATEGORICAL}
+
+        for row, metadata in enumerate(metadatas):
+            if metadata.get('price_min') is not None:
+                price_min[row] = metadata['price_min']
+                price_max[row] = metadata.get('price_max', metadata['price_min'])
+            for column in CATEGORICAL:
+                value = metadata.get(column)
+                if not isinstance(value, str) or not value:
+                    continue
+                value = fold_diacritics(value)
+                code = lookup[column].get(value)
+                if code is None:
+                    code = lookup[column][value] = len(vocab[column])
+                    vocab[column].append(value)
+                codes[column][row] = code
+
+        return cls(price_min, price_max, codes, vocab)
+
+    def save(self, path: str) -> None:
+        """Save the arrays to an .npz file (temp file + rename)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {'price_min': self.price_min, 'price_max': self.price_max}
+        for column in CATEGORICAL:
+            arrays[f'codes_{column}'] = self.codes[column]
+            arrays[f'vocab_{column}'] = np.array(self.vocab[column], dtype=str)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["AttributeIndex"]:
+        """Load a saved index (None if it is missing or unreadable)."""
+        try:
+            with np.load(path) as data:
+                return cls(
+                    data['price_min'],
+                    data['price_max'],
+                    {column: data[f'codes_{column}'] for column in CATEGORICAL},
+                    {column: data[f'vocab_{column}'].tolist() for column in CATEGORICAL}
+                )
+        except Exception as e:
+            if os.path.exists(path):
+                logger.warning(f"Failed to load attribute index: {e}")
+            return None
+
+    def parse_filters(self, query: str) -> Dict[str, Any]:
+        """
+        Parse listing filters from a query.
+
+        Returns:
+            {"types": [...], "places": [...], "price_min": int, "price_max": int,
+            "listings": True}, with only the keys the query constrains ("listings"
+            when it asks for a place to stay without naming a type)
+        """
+        folded = fold_diacritics(query)
+        filters: Dict[str, Any] = {}
+
+        types = {TYPE_SYNONYMS[term] for term in TYPE_SYNONYMS if _contains_term(folded, term)}
+        types.update(term for term in (*TYPE_TERMS, *self.vocab['section']) if _contains_term(folded, term))
+        if types:
+            filters['types'] = sorted(types)
+        elif any(_contains_term(folded, term) for term in LISTING_TERMS):
+            filters['listings'] = True
+
+        places = {value for column in ('area', 'locality') for value in self.vocab[column]
+                  if _contains_term(folded, value)}
+        if places:
+            filters['places'] = sorted(places)
+
+        price_min, price_max = parse_price_filter(query)
+        if price_min is not None:
+            filters['price_min'] = price_min
+        if price_max is not None:
+            filters['price_max'] = price_max
+        return filters
+
+    def _matching_codes(self, column: str, terms: List[str], exact: bool) -> np.ndarray:
+        return np.array([code for code, value in enumerate(self.vocab[column])
+                         if any(value == term if exact else _contains_term(value, term) for term in terms)],
+                        dtype=np.int32)
+
+    def select(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        Positions of listings matching every filter.
+
+        A listing matches a price bound when part of its price range is
+        within it. Unless the filters name a type or ask for listings,
+        chunks without listing attributes (attractions, tours) match too.
+
+        Returns:
+            Sorted positions, or None when the filters do not apply (no type
+            or price given)
+        """
+        if not any(key in filters for key in ('types', 'price_min', 'price_max')):
+            return None
+
+        mask = np.ones(len(self), dtype=bool)
+        if 'types' in filters:
+            mask &= (np.isin(self.codes['section'], self._matching_codes('section', filters['types'], False))
+                     | np.isin(self.codes['type'], self._matching_codes('type', filters['types'], False)))
+        if 'places' in filters:
+            mask &= (np.isin(self.codes['area'], self._matching_codes('area', filters['places'], True))
+                     | np.isin(self.codes['locality'], self._matching_codes('locality', filters['places'], True)))
+        if 'price_max' in filters:
+            mask &= (self.price_min != MISSING) & (self.price_min <= filters['price_max'])
+        if 'price_min' in filters:
+            mask &= (self.price_max != MISSING) & (self.price_max >= filters['price_min'])
+        if 'types' not in filters and not filters.get('listings'):
+            mask |= ~self._is_listing()
+        return np.flatnonzero(mask)
+
+    def filter_positions(self, query: str) -> Optional[np.ndarray]:
+        """
+        Positions a query's search should be restricted to.
+
+        When nothing matches, the place and then the price filter are
+        dropped before giving up.
+
+        Returns:
+            Matching positions, or None to search everything (no filters,
+            or no listing matches them)
+        """
+        filters = self.parse_filters(query)
+        for relaxed in ((), ('places',), ('places', 'price_min', 'price_max')):
+            applied = {key: value for key, value in filters.items() if key not in relaxed}
+            positions = self.select(applied)
+            if positions is None:
+                return None
+            if len(positions):
+                logger.info(f"Attribute filters {applied} matched {len(positions)} chunks")
+                return positions
+        logger.info(f"No listing matches {filters}, searching unfiltered")
+        return None
+
+    def _is_listing(self) -> np.ndarray:
+        """Mask of rows with listing attributes."""
+        return (self.price_min != MISSING) | (self.codes['section'] != MISSING)
+
+    def stats(self) -> Dict[str, int]:
+        """Attribute index size counters."""
+        return {
+            'attribute_index_listings': int(np.count_nonzero(self._is_listing())),
+            'attribute_index_values': sum(len(values) for values in self.vocab.values())
+        }
@@ -0,0 +1,176 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Tuple
+
+from tts_cache import TTSCache, get_tts_cache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AudioStore:
+    """
+    Ephemeral store of speech clips served by ``GET /audio/<audio_id>``.
+
+    Audio ids are TTS cache keys, so a clip is addressed by its content.
+    Syntheses still running in this process are tracked as futures for a
+    short TTL; finished clips are read from the TTS cache, whose disk tier
+    is shared by all workers on the host.
+
+    So that a link works on any worker, a synthesis also leaves a
+    ``<id>.pending`` marker in a shared directory (``TTS_CACHE_DIR/audio``)
+    until it finishes, and clips that bypass the TTS cache (e.g. the
+    current time) are written there as ``<id>.mp3`` for the TTL. Another
+    worker asked for a pending id polls the shared files instead of
+    answering 404.
+    """
+
+    def __init__(self, ttl: int = 300, max_items: int = 512, shared_dir: Optional[str] = None,
+                 poll_interval: float = 0.1):
+        """
+        Args:
+            ttl: Seconds a pending synthesis (or uncached clip) stays reachable by its id
+            max_items: Maximum number of tracked syntheses
+            shared_dir: Directory shared by the workers for pending markers and
+                uncached clips (None keeps them in this process only)
+            poll_interval: Seconds between checks of the shared files
+        """
+        self.ttl = ttl
+        self.max_items = max_items
+        self.shared_dir = shared_dir
+        self.poll_interval = poll_interval
+        self._pending: "OrderedDict[str, Tuple[float, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+
+    def _prune(self) -> None:
+        now = time.time()
+        while self._pending:
+            audio_id, (created, _) = next(iter(self._pending.items()))
+            if now - created <= self.ttl and len(self._pending) <= self.max_items:
+                break
+            self._pending.popitem(last=False)
+
+    def _shared_path(self, audio_id: str, suffix: str) -> str:
+        return os.path.join(self.shared_dir, audio_id + suffix)
+
+    def _prune_shared(self) -> None:
+        """Delete shared markers and clips older than the TTL."""
+        cutoff = time.time() - self.ttl
+        try:
+            for entry in os.scandir(self.shared_dir):
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+        except OSError:
+            pass
+
+    def _write_shared(self, path: str, audio: bytes) -> None:
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+    def _finish_shared(self, audio_id: str, future: Future, keep_clip: bool) -> None:
+        """Publish an uncached clip for the other workers and clear the pending marker."""
+        try:
+            audio = None if future.cancelled() or future.exception() else future.result()
+            if audio and keep_clip:
+                self._write_shared(self._shared_path(audio_id, ".mp3"), audio)
+        except OSError as e:
+            logger.warning(f"Failed to share audio {audio_id}: {e}")
+        finally:
+            try:
+                os.remove(self._shared_path(audio_id, ".pending"))
+            except OSError:
+                pass
+
+    def add(self, audio_id: str, future: Future, cacheable: bool = True) -> None:
+        """
+        Track a running synthesis under its audio id.
+
+        Args:
+            audio_id: TTS cache key of the clip
+            future: Synthesis returning the MP3 bytes
+            cacheable: Whether the synthesis stores the clip in the TTS cache;
+                if not, the clip is shared through ``shared_dir`` instead
+        """
+        with self._lock:
+            self._pending[audio_id] = (time.time(), future)
+            self._pending.move_to_end(audio_id)
+            self._prune()
+
+        if self.shared_dir:
+            self._prune_shared()
+            try:
+                self._write_shared(self._shared_path(audio_id, ".pending"), b"")
+            except OSError as e:
+                logger.warning(f"Failed to mark audio {audio_id} as pending: {e}")
+            keep_clip = not cacheable or get_tts_cache().max_disk_bytes <= 0
+            future.add_done_callback(lambda done: self._finish_shared(audio_id, done, keep_clip))
+
+    def _get_shared(self, audio_id: str) -> Optional[bytes]:
+        """Finished clip from the TTS cache or the shared directory."""
+        audio = get_tts_cache().get_by_key(audio_id)
+        if audio is None and self.shared_dir:
+            try:
+                with open(self._shared_path(audio_id, ".mp3"), 'rb') as f:
+                    audio = f.read() or None
+            except OSError:
+                audio = None
+        return audio
+
+    def get(self, audio_id: str, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Get the MP3 bytes of a clip, waiting for its synthesis if needed.
+
+        Returns:
+            MP3 bytes, or None when the id is unknown, expired or failed
+        """
+        if not TTSCache.is_key(audio_id):
+            return None
+        with self._lock:
+            self._prune()
+            entry = self._pending.get(audio_id)
+
+        if entry is not None:
+            try:
+                audio = entry[1].result(timeout)
+            except Exception as e:
+                logger.warning(f"Audio {audio_id} failed: {e}")
+                return None
+            return audio or None
+
+        audio = self._get_shared(audio_id)
+        if audio is not None or not self.shared_dir:
+            return audio
+
+        # Synthesis running on another worker: wait for its clip
+        deadline = time.monotonic() + (timeout if timeout is not None else self.ttl)
+        marker = self._shared_path(audio_id, ".pending")
+        while os.path.exists(marker) and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            audio = self._get_shared(audio_id)
+            if audio is not None:
+                return audio
+        # The marker may be cleared just after the clip was written
+        return self._get_shared(audio_id)
+
+
+_audio_store = None
+
+def get_audio_store() -> AudioStore:
+    """
+    Get the shared audio store (AUDIO_STORE_TTL sets how long pending clips
+    stay reachable; markers and uncached clips go to TTS_CACHE_DIR/audio).
+    """
+    global _audio_store
+    if _audio_store is None:
+        _audio_store = AudioStore(ttl=int(os.getenv("AUDIO_STORE_TTL", "300")),
+                                  shared_dir=os.path.join(get_tts_cache().cache_dir, "audio"))
+    return _audio_store
@@ -0,0 +1,130 @@
+"""Recall/latency/memory benchmark of FAISS index types: python benchmark_index.py [--vectors N]"""
+import time
+import argparse
+import logging
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from ann_index import (FLAT, HNSW, INDEX_TYPES, IVF_FLAT, IVF_PQ, QUANTIZATIONS, build_index, is_lossy,
+                       rescore, resolve_params, set_search_params)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query-time settings swept per index type
+SWEEPS = {
+    FLAT: [{}],
+    IVF_FLAT: [{"nprobe": n} for n in (1, 4, 16, 64)],
+    IVF_PQ: [{"nprobe": n} for n in (1, 4, 16, 64)],
+    HNSW: [{"ef_search": n} for n in (16, 32, 64, 128)]
+}
+
+
+def load_vectors(path: Optional[str], count: int, dim: int) -> np.ndarray:
+    """
+    Load float32 vectors (e.g. the embedding cache's vectors.f32) or make clustered random ones.
+
+    Random vectors are drawn around a few hundred centers, which is closer to
+    real embeddings than uniform noise and keeps IVF recall meaningful.
+    """
+    if path:
+        vectors = np.fromfile(path, dtype=np.float32).reshape(-1, dim)
+        return vectors[:count]
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(1, count // 500), dim)).astype(np.float32)
+    labels = rng.integers(len(centers), size=count)
+    return centers[labels] + 0.3 * rng.normal(size=(count, dim)).astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the exact top-k neighbors that were returned."""
+    hits = sum(len(np.intersect1d(row, truth_row)) for row, truth_row in zip(found, truth))
+    return hits / truth.size
+
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, k: int, index_types: List[str],
+              quantizations: List[Optional[str]], params: Dict[str, int], rescore_factor: int,
+              target_recall: float) -> None:
+    """
+    Build each index type (and quantization) once and report, per sweep setting,
+    index size, recall@k without and with exact re-scoring, and latency.
+    """
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    print(f"{'index':<10} {'quant':<6} {'setting':<14} {'build s':>8} {'MB':>8} {'recall@' + str(k):>9} "
+          f"{'rescored':>9} {'ms/query':>9} {'p95 ms':>8}  target")
+    for index_type in index_types:
+        for quantization in (quantizations if index_type != IVF_PQ else [None]):
+            built, resolved = resolve_params(index_type, len(vectors), vectors.shape[1],
+                                             dict(params, quantization=quantization))
+            if built != index_type:
+                continue
+
+            start = time.perf_counter()
+            index = build_index(built, vectors, resolved)
+            index.add(vectors)
+            build_time = time.perf_counter() - start
+            size_mb = faiss.serialize_index(index).size / 2 ** 20
+            lossy = is_lossy(built, resolved)
+
+            for setting in SWEEPS[index_type]:
+                set_search_params(index, index_type, setting)
+                latencies = []
+                found = np.empty_like(truth)
+                rescored = np.empty_like(truth)
+                for i, query in enumerate(queries):
+                    start = time.perf_counter()
+                    _, candidates = index.search(query[None, :], k * rescore_factor if lossy else k)
+                    if lossy:
+                        positions, _ = rescore(query, candidates[0], vectors, k)
+                        rescored[i] = -1
+                        rescored[i, :len(positions)] = positions
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    found[i] = candidates[0, :k]
+                if not lossy:
+                    rescored = found
+
+                label = ",".join(f"{key}={value}" for key, value in setting.items()) or "exact"
+                recall = recall_at_k(rescored, truth)
+                print(f"{index_type:<10} {quantization or '-':<6} {label:<14} {build_time:>8.2f} {size_mb:>8.1f} "
+                      f"{recall_at_k(found, truth):>9.3f} {recall:>9.3f} {np.mean(latencies):>9.3f} "
+                      f"{np.percentile(latencies, 95):>8.3f}  {'ok' if recall >= target_recall else 'below'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare ANN index types against flat search.")
+    parser.add_argument("--vectors", type=int, default=100_000, help="Number of indexed vectors")
+    parser.add_argument("--queries", type=int, default=500, help="Number of queries")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--from-file", help="float32 vector file to use instead of random vectors")
+    parser.add_argument("--k", type=int, default=5, help="Neighbors per query")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES),
+                        help="Index types to compare")
+    parser.add_argument("--nlist", type=int, help="IVF lists (default ~4*sqrt(vectors))")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ sub-quantizers")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW neighbors per node")
+    parser.add_argument("--quantizations", nargs="+", choices=["none", *QUANTIZATIONS], default=["none"],
+                        help="Scalar quantizations to compare (not applied to ivf_pq)")
+    parser.add_argument("--rescore-factor", type=int, default=4,
+                        help="Candidates per result re-scored exactly for lossy indexes")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Recall@k a setting should reach")
+    args = parser.parse_args()
+
+    data = load_vectors(args.from_file, args.vectors + args.queries, args.dim)
+    # Held-out queries, so no query finds itself
+    vectors, queries = data[:-args.queries], data[-args.queries:]
+    params = {key: value for key, value in {"nlist": args.nlist, "m": args.pq_m, "M": args.hnsw_m}.items()
+              if value is not None}
+
+    logger.info(f"Benchmarking {len(vectors)} vectors, {len(queries)} queries, d={vectors.shape[1]}")
+    quantizations = [None if name == "none" else name for name in args.quantizations]
+    benchmark(np.ascontiguousarray(vectors), np.ascontiguousarray(queries), args.k, args.types,
+              quantizations, params, args.rescore_factor, args.target_recall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Offline vector store build: python build_index.py [--force]"""
+import argparse
+import logging
+from rag_engine import RAGEngine
+from ann_index import INDEX_TYPES, QUANTIZATIONS
+from embedding_cache import VECTOR_DTYPES
+from embedding_pipeline import EXECUTORS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or update the RAG vector store offline.")
+    parser.add_argument("--data-dir", default="data/", help="Directory containing source documents")
+    parser.add_argument("--vectorstore-path", default="vectorstore/index", help="Path to save the vector store")
+    parser.add_argument("--embedding-cache-dir", default="vectorstore/embedding_cache",
+                        help="Directory of the persistent embedding cache")
+    parser.add_argument("--embedding-cache-dtype", choices=list(VECTOR_DTYPES), default="float32",
+                        help="Storage of cached embeddings")
+    parser.add_argument("--no-record-splitting", action="store_true",
+                        help="Split listing files (hotels.txt) into character windows instead of one chunk per record")
+    parser.add_argument("--loader-workers", type=int, default=4, help="Source files parsed concurrently")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding batch")
+    parser.add_argument("--workers", type=int, default=1, help="Embedding batches run concurrently")
+    parser.add_argument("--executor", choices=EXECUTORS, default="thread",
+                        help="Pool for embedding batches (process loads one model per worker)")
+    parser.add_argument("--intra-op-threads", type=int,
+                        help="PyTorch threads per embedding worker (default: CPUs / workers)")
+    parser.add_argument("--index-type", choices=INDEX_TYPES,
+                        help="FAISS index type (default: keep the saved type, flat for a new store)")
+    parser.add_argument("--nlist", type=int, help="IVF lists (default ~4*sqrt(chunks))")
+    parser.add_argument("--nprobe", type=int, help="IVF lists searched per query")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ sub-quantizers")
+    parser.add_argument("--pq-nbits", type=int, help="IVF-PQ bits per sub-quantizer code")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW neighbors per node")
+    parser.add_argument("--ef-construction", type=int, help="HNSW build-time search depth")
+    parser.add_argument("--ef-search", type=int, help="HNSW query-time search depth")
+    parser.add_argument("--quantization", choices=list(QUANTIZATIONS),
+                        help="Scalar-quantize stored vectors (flat, ivf_flat, hnsw); results are re-scored exactly")
+    parser.add_argument("--rescore-factor", type=int, help="Candidates re-scored per result for lossy indexes")
+    parser.add_argument("--force", action="store_true", help="Rebuild every file instead of updating incrementally")
+    args = parser.parse_args()
+
+    index_params = {
+        "nlist": args.nlist,
+        "nprobe": args.nprobe,
+        "m": args.pq_m,
+        "nbits": args.pq_nbits,
+        "M": args.hnsw_m,
+        "ef_construction": args.ef_construction,
+        "ef_search": args.ef_search,
+        "quantization": args.quantization,
+        "rescore_factor": args.rescore_factor
+    }
+
+    engine = RAGEngine(
+        data_dir=args.data_dir,
+        vectorstore_path=args.vectorstore_path,
+        embedding_cache_dir=args.embedding_cache_dir,
+        embedding_cache_dtype=args.embedding_cache_dtype,
+        loader_workers=args.loader_workers,
+        record_splitting=not args.no_record_splitting,
+        embedding_batch_size=args.batch_size,
+        embedding_workers=args.workers,
+        embedding_executor=args.executor,
+        intra_op_threads=args.intra_op_threads,
+        index_type=args.index_type,
+        index_params={key: value for key, value in index_params.items() if value is not None}
+    )
+    engine.create_vector_store(force_rebuild=args.force)
+    logger.info(f"Build finished: {engine.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
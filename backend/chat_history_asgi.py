@@ -0,0 +1,383 @@
+"""Async (ASGI) version of the chat history blueprint, mounted at /api/chat by asgi.py"""
+from datetime import datetime
+from bson import ObjectId
+from starlette.requests import Request
+from starlette.routing import Route
+
+from asgi_common import json_response, read_json, token_required_async
+from db import get_async_db
+
+
+def chat_collection():
+    return get_async_db()['chat_history']
+
+@token_required_async
+async def get_conversations(request: Request, current_user_id):
+    """Get all conversations for the current user"""
+    try:
+        # Get conversations for the user, sorted by last updated
+        conversations = await chat_collection().find(
+            {'user_id': ObjectId(current_user_id)},
+            {'_id': 1, 'title': 1, 'created_at': 1, 'updated_at': 1, 'message_count': 1}
+        ).sort('updated_at', -1).to_list(None)
+
+        # Convert ObjectId to string and format data
+        for conv in conversations:
+            conv['_id'] = str(conv['_id'])
+            conv['message_count'] = len(conv.get('messages', []))
+
+        return json_response({
+            'conversations': conversations
+        }, 200)
+
+    except Exception as e:
+        print(f"Get conversations error: {str(e)}")
+        return json_response({'error': 'Failed to get conversations'}, 500)
+
+@token_required_async
+async def create_conversation(request: Request, current_user_id):
+    """Create a new conversation"""
+    try:
+        data = await read_json(request)
+        title = data.get('title', 'New Conversation') if data else 'New Conversation'
+
+        conversation_data = {
+            'user_id': ObjectId(current_user_id),
+            'title': title,
+            'messages': [],
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }
+
+        result = await chat_collection().insert_one(conversation_data)
+        conversation_id = result.inserted_id
+
+        return json_response({
+            'message': 'Conversation created successfully',
+            'conversation_id': str(conversation_id),
+            'conversation': {
+                '_id': str(conversation_id),
+                'title': title,
+                'created_at': conversation_data['created_at'],
+                'updated_at': conversation_data['updated_at'],
+                'message_count': 0
+            }
+        }, 201)
+
+    except Exception as e:
+        print(f"Create conversation error: {str(e)}")
+        return json_response({'error': 'Failed to create conversation'}, 500)
+
+@token_required_async
+async def get_conversation(request: Request, current_user_id):
+    """Get a specific conversation with all messages"""
+    conversation_id = request.path_params['conversation_id']
+    try:
+        # Validate conversation_id format
+        if not ObjectId.is_valid(conversation_id):
+            return json_response({'error': 'Invalid conversation ID'}, 400)
+
+        conversation = await chat_collection().find_one({
+            '_id': ObjectId(conversation_id),
+            'user_id': ObjectId(current_user_id)
+        })
+
+        if not conversation:
+            return json_response({'error': 'Conversation not found'}, 404)
+
+        # Format conversation data
+        conversation['_id'] = str(conversation['_id'])
+        conversation['user_id'] = str(conversation['user_id'])
+
+        # Format messages
+        for message in conversation.get('messages', []):
+            if '_id' in message:
+                message['_id'] = str(message['_id'])
+
+        return json_response({
+            'conversation': conversation
+        }, 200)
+
+    except Exception as e:
+        print(f"Get conversation error: {str(e)}")
+        return json_response({'error': 'Failed to get conversation'}, 500)
+
+@token_required_async
+async def add_message(request: Request, current_user_id):
+    """Add a message to a conversation"""
+    conversation_id = request.path_params['conversation_id']
+    try:
+        # Validate conversation_id format
+        if not ObjectId.is_valid(conversation_id):
+            return json_response({'error': 'Invalid conversation ID'}, 400)
+
+        data = await read_json(request)
+        if not data:
+            return json_response({'error': 'No data provided'}, 400)
+
+        user_message = data.get('user_message', '').strip()
+        bot_response = data.get('bot_response', '').strip()
+        language = data.get('language', 'vi')
+
+        if not user_message:
+            return json_response({'error': 'User message is required'}, 400)
+
+        # Check if conversation exists and belongs to user
+        conversation = await chat_collection().find_one({
+            '_id': ObjectId(conversation_id),
+            'user_id': ObjectId(current_user_id)
+        })
+
+        if not conversation:
+            return json_response({'error': 'Conversation not found'}, 404)
+
+        # Create message objects
+        timestamp = datetime.utcnow()
+
+        messages_to_add = [{
+            '_id': ObjectId(),
+            'text': user_message,
+            'sender': 'user',
+            'timestamp': timestamp,
+            'language': language
+        }]
+
+        if bot_response:
+            messages_to_add.append({
+                '_id': ObjectId(),
+                'text': bot_response,
+                'sender': 'bot',
+                'timestamp': timestamp,
+                'language': language
+            })
+
+        # Update conversation with new messages
+        result = await chat_collection().update_one(
+            {'_id': ObjectId(conversation_id)},
+            {
+                '$push': {'messages': {'$each': messages_to_add}},
+                '$set': {'updated_at': timestamp}
+            }
+        )
+
+        if result.matched_count == 0:
+            return json_response({'error': 'Failed to add message'}, 500)
+
+        # Format messages for response
+        formatted_messages = [{
+            '_id': str(msg['_id']),
+            'text': msg['text'],
+            'sender': msg['sender'],
+            'timestamp': msg['timestamp'],
+            'language': msg['language']
+        } for msg in messages_to_add]
+
+        return json_response({
+            'message': 'Messages added successfully',
+            'messages': formatted_messages
+        }, 201)
+
+    except Exception as e:
+        print(f"Add message error: {str(e)}")
+        return json_response({'error': 'Failed to add message'}, 500)
+
+@token_required_async
+async def update_conversation(request: Request, current_user_id):
+    """Update conversation (e.g., change title)"""
+    conversation_id = request.path_params['conversation_id']
+    try:
+        # Validate conversation_id format
+        if not ObjectId.is_valid(conversation_id):
+            return json_response({'error': 'Invalid conversation ID'}, 400)
+
+        data = await read_json(request)
+        if not data:
+            return json_response({'error': 'No data provided'}, 400)
+
+        update_data = {}
+
+        if 'title' in data:
+            title = data['title'].strip()
+            if title:
+                update_data['title'] = title
+
+        if not update_data:
+            return json_response({'error': 'No valid data to update'}, 400)
+
+        update_data['updated_at'] = datetime.utcnow()
+
+        # Update conversation
+        result = await chat_collection().update_one(
+            {
+                '_id': ObjectId(conversation_id),
+                'user_id': ObjectId(current_user_id)
+            },
+            {'$set': update_data}
+        )
+
+        if result.matched_count == 0:
+            return json_response({'error': 'Conversation not found'}, 404)
+
+        return json_response({
+            'message': 'Conversation updated successfully'
+        }, 200)
+
+    except Exception as e:
+        print(f"Update conversation error: {str(e)}")
+        return json_response({'error': 'Failed to update conversation'}, 500)
+
+@token_required_async
+async def delete_conversation(request: Request, current_user_id):
+    """Delete a conversation"""
+    conversation_id = request.path_params['conversation_id']
+    try:
+        # Validate conversation_id format
+        if not ObjectId.is_valid(conversation_id):
+            return json_response({'error': 'Invalid conversation ID'}, 400)
+
+        # Delete conversation
+        result = await chat_collection().delete_one({
+            '_id': ObjectId(conversation_id),
+            'user_id': ObjectId(current_user_id)
+        })
+
+        if result.deleted_count == 0:
+            return json_response({'error': 'Conversation not found'}, 404)
+
+        return json_response({
+            'message': 'Conversation deleted successfully'
+        }, 200)
+
+    except Exception as e:
+        print(f"Delete conversation error: {str(e)}")
+        return json_response({'error': 'Failed to delete conversation'}, 500)
+
+@token_required_async
+async def delete_message(request: Request, current_user_id):
+    """Delete a specific message from a conversation"""
+    conversation_id = request.path_params['conversation_id']
+    message_id = request.path_params['message_id']
+    try:
+        # Validate IDs format
+        if not ObjectId.is_valid(conversation_id) or not ObjectId.is_valid(message_id):
+            return json_response({'error': 'Invalid ID format'}, 400)
+
+        # Remove message from conversation
+        result = await chat_collection().update_one(
+            {
+                '_id': ObjectId(conversation_id),
+                'user_id': ObjectId(current_user_id)
+            },
+            {
+                '$pull': {'messages': {'_id': ObjectId(message_id)}},
+                '$set': {'updated_at': datetime.utcnow()}
+            }
+        )
+
+        if result.matched_count == 0:
+            return json_response({'error': 'Conversation not found'}, 404)
+
+        if result.modified_count == 0:
+            return json_response({'error': 'Message not found'}, 404)
+
+        return json_response({
+            'message': 'Message deleted successfully'
+        }, 200)
+
+    except Exception as e:
+        print(f"Delete message error: {str(e)}")
+        return json_response({'error': 'Failed to delete message'}, 500)
+
+@token_required_async
+async def search_conversations(request: Request, current_user_id):
+    """Search conversations and messages"""
+    try:
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return json_response({'error': 'Search query is required'}, 400)
+
+        # Search in conversation titles and message content
+        search_results = await chat_collection().find({
+            'user_id': ObjectId(current_user_id),
+            '$or': [
+                {'title': {'$regex': query, '$options': 'i'}},
+                {'messages.text': {'$regex': query, '$options': 'i'}}
+            ]
+        }).sort('updated_at', -1).to_list(None)
+
+        # Format results
+        for result in search_results:
+            result['_id'] = str(result['_id'])
+            result['user_id'] = str(result['user_id'])
+
+            # Filter messages that match the search query
+            matching_messages = []
+            for message in result.get('messages', []):
+                if query.lower() in message.get('text', '').lower():
+                    message['_id'] = str(message['_id'])
+                    matching_messages.append(message)
+
+            result['matching_messages'] = matching_messages
+            result['message_count'] = len(result.get('messages', []))
+
+        return json_response({
+            'results': search_results,
+            'query': query
+        }, 200)
+
+    except Exception as e:
+        print(f"Search error: {str(e)}")
+        return json_response({'error': 'Search failed'}, 500)
+
+@token_required_async
+async def export_conversations(request: Request, current_user_id):
+    """Export all conversations for a user"""
+    try:
+        conversations = await chat_collection().find({
+            'user_id': ObjectId(current_user_id)
+        }).sort('created_at', 1).to_list(None)
+
+        # Format for export
+        export_data = {
+            'user_id': current_user_id,
+            'export_date': datetime.utcnow().isoformat(),
+            'conversations': []
+        }
+
+        for conv in conversations:
+            conv_data = {
+                'id': str(conv['_id']),
+                'title': conv['title'],
+                'created_at': conv['created_at'].isoformat(),
+                'updated_at': conv['updated_at'].isoformat(),
+                'messages': []
+            }
+
+            for message in conv.get('messages', []):
+                conv_data['messages'].append({
+                    'id': str(message['_id']),
+                    'text': message['text'],
+                    'sender': message['sender'],
+                    'timestamp': message['timestamp'].isoformat(),
+                    'language': message.get('language', 'vi')
+                })
+
+            export_data['conversations'].append(conv_data)
+
+        return json_response(export_data, 200)
+
+    except Exception as e:
+        print(f"Export error: {str(e)}")
+        return json_response({'error': 'Export failed'}, 500)
+
+routes = [
+    Route('/conversations', get_conversations, methods=['GET']),
+    Route('/conversations', create_conversation, methods=['POST']),
+    Route('/conversations/{conversation_id}', get_conversation, methods=['GET']),
+    Route('/conversations/{conversation_id}', update_conversation, methods=['PUT']),
+    Route('/conversations/{conversation_id}', delete_conversation, methods=['DELETE']),
+    Route('/conversations/{conversation_id}/messages', add_message, methods=['POST']),
+    Route('/conversations/{conversation_id}/messages/{message_id}', delete_message, methods=['DELETE']),
+    Route('/search', search_conversations, methods=['GET']),
+    Route('/export', export_conversations, methods=['GET']),
+]
@@ -0,0 +1,224 @@
+import os
+import json
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IDS_FILE = "chunk_ids.npy"
+ID_ORDER_FILE = "chunk_id_order.npy"
+TEXT_FILE = "chunk_text.bin"
+TEXT_OFFSETS_FILE = "chunk_text_offsets.npy"
+META_CODES_FILE = "chunk_meta_codes.npy"
+META_VALUES_FILE = "chunk_meta_values.json"
+CHUNK_STORE_FILES = (IDS_FILE, ID_ORDER_FILE, TEXT_FILE, TEXT_OFFSETS_FILE, META_CODES_FILE, META_VALUES_FILE)
+
+# Code of a metadata key the chunk does not have
+MISSING = -1
+
+
+def _atomic_write(path: str, write) -> None:
+    """Write a file through a temp file and rename, so readers mapping the old file keep a valid view."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _encode_metadata(metadatas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Dictionary-encode metadata into one column per key.
+
+    Returns:
+        {"keys": column names, "values": distinct values per key,
+        "codes": (n, keys) int32 array of value indexes, MISSING if absent}
+    """
+    keys = sorted({key for metadata in metadatas for key in metadata})
+    values: Dict[str, List[Any]] = {key: [] for key in keys}
+    lookup: Dict[str, Dict[str, int]] = {key: {} for key in keys}
+    codes = np.full((len(metadatas), len(keys)), MISSING, dtype=np.int32)
+
+    for row, metadata in enumerate(metadatas):
+        for column, key in enumerate(keys):
+            if key not in metadata:
+                continue
+            value = metadata[key]
+            token = json.dumps(value, sort_keys=True, ensure_ascii=False)
+            code = lookup[key].get(token)
+            if code is None:
+                code = lookup[key][token] = len(values[key])
+                values[key].append(value)
+            codes[row, column] = code
+
+    return {"keys": keys, "values": values, "codes": codes}
+
+
+class IndexToIdView(Mapping):
+    """Read-only ``index_to_docstore_id`` mapping decoded from the ids array on access."""
+
+    def __init__(self, ids: np.ndarray):
+        self._ids = ids
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < len(self._ids):
+            raise KeyError(position)
+        return self._ids[position].decode('ascii')
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._ids)))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class ChunkStore(Docstore, AddableMixin):
+    """
+    Columnar docstore replacing LangChain's pickled ``InMemoryDocstore``.
+
+    Chunk texts are one contiguous UTF-8 buffer with an offsets array, chunk
+    ids a fixed-width array with its sort order (binary-search lookup), and
+    metadata one int32 code column per key into small per-key dictionaries
+    (``source_file``, ``file_type`` and ``page`` have few distinct values).
+    Opening the store reads or memory-maps a handful of arrays instead of
+    unpickling one Document per chunk; Documents are only built for the
+    chunks a search returns.
+
+    Chunks added or deleted after opening (incremental updates) are kept in
+    an overlay until the store is written again.
+    """
+
+    def __init__(self, directory: str, mmap: bool = True):
+        """
+        Args:
+            directory: Vector store directory holding the chunk files
+            mmap: Map the arrays read-only (shared page cache) instead of
+                reading them into the heap
+        """
+        self.directory = directory
+        mmap_mode = 'r' if mmap else None
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+
+        self._ids = load(IDS_FILE)
+        self._id_order = load(ID_ORDER_FILE)
+        self._text_offsets = load(TEXT_OFFSETS_FILE)
+        self._meta_codes = load(META_CODES_FILE)
+
+        text_path = os.path.join(directory, TEXT_FILE)
+        if mmap and os.path.getsize(text_path) > 0:
+            self._text = np.memmap(text_path, dtype=np.uint8, mode='r')
+        else:
+            self._text = np.fromfile(text_path, dtype=np.uint8)
+
+        with open(os.path.join(directory, META_VALUES_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self._meta_keys: List[str] = meta["keys"]
+        self._meta_values: Dict[str, List[Any]] = meta["values"]
+
+        self._added: Dict[str, Document] = {}
+        self._deleted = set()
+        self.index_to_docstore_id = IndexToIdView(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._deleted) + len(self._added)
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """Whether every chunk file is present in a vector store directory."""
+        return all(os.path.exists(os.path.join(directory, name)) for name in CHUNK_STORE_FILES)
+
+    @staticmethod
+    def write(directory: str, ids: List[str], documents: List[Document]) -> None:
+        """
+        Write chunk files for documents in index order.
+
+        Args:
+            directory: Vector store directory
+            ids: Chunk id of each FAISS position (ASCII, e.g. UUIDs)
+            documents: Document of each FAISS position
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        id_array = np.array(ids, dtype='S') if ids else np.zeros(0, dtype='S1')
+        _atomic_write(os.path.join(directory, IDS_FILE), lambda f: np.save(f, id_array))
+        _atomic_write(os.path.join(directory, ID_ORDER_FILE),
+                      lambda f: np.save(f, np.argsort(id_array, kind='stable').astype(np.int64)))
+
+        texts = [doc.page_content.encode('utf-8') for doc in documents]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        _atomic_write(os.path.join(directory, TEXT_FILE), lambda f: f.write(b"".join(texts)))
+        _atomic_write(os.path.join(directory, TEXT_OFFSETS_FILE), lambda f: np.save(f, offsets))
+
+        meta = _encode_metadata([doc.metadata for doc in documents])
+        _atomic_write(os.path.join(directory, META_CODES_FILE), lambda f: np.save(f, meta["codes"]))
+        _atomic_write(os.path.join(directory, META_VALUES_FILE), lambda f: f.write(
+            json.dumps({"keys": meta["keys"], "values": meta["values"]}, ensure_ascii=False).encode('utf-8')))
+
+    def _row(self, chunk_id: str) -> Optional[int]:
+        """Position of a chunk id, by binary search over the sorted ids."""
+        key = chunk_id.encode('ascii', errors='replace')
+        low, high = 0, len(self._id_order)
+        while low < high:
+            mid = (low + high) // 2
+            if self._ids[self._id_order[mid]] < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(self._id_order) and self._ids[self._id_order[low]] == key:
+            return int(self._id_order[low])
+        return None
+
+    def get(self, position: int) -> Document:
+        """Build the Document stored at a position of the written store."""
+        start, end = self._text_offsets[position], self._text_offsets[position + 1]
+        metadata = {}
+        for key, code in zip(self._meta_keys, self._meta_codes[position]):
+            if code != MISSING:
+                metadata[key] = self._meta_values[key][code]
+        return Document(
+            id=self._ids[position].decode('ascii'),
+            page_content=bytes(self._text[start:end]).decode('utf-8'),
+            metadata=metadata
+        )
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Look up a chunk by id (the Docstore interface used by the FAISS wrapper)."""
+        if search in self._added:
+            return self._added[search]
+        row = None if search in self._deleted else self._row(search)
+        if row is None:
+            return f"ID {search} not found."
+        return self.get(row)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Add documents by id (kept in memory until the store is written)."""
+        overlapping = [chunk_id for chunk_id in texts if not isinstance(self.search(chunk_id), str)]
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        self._added.update(texts)
+
+    def delete(self, ids: List) -> None:
+        """Delete documents by id."""
+        for chunk_id in ids:
+            if self._added.pop(chunk_id, None) is not None:
+                continue
+            if chunk_id in self._deleted or self._row(chunk_id) is None:
+                raise ValueError(f"ID {chunk_id} not found.")
+            self._deleted.add(chunk_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Chunk store size counters."""
+        return {
+            'chunk_store_chunks': len(self),
+            'chunk_store_text_bytes': int(self._text_offsets[-1]) if len(self._text_offsets) else 0,
+            'chunk_store_metadata_values': sum(len(values) for values in self._meta_values.values())
+        }
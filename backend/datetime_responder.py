@@ -0,0 +1,78 @@
+import re
+import unicodedata
+from datetime import datetime
+from typing import Optional
+
+import pytz
+
+VN_TZ = pytz.timezone('Asia/Ho_Chi_Minh')
+
+WEEKDAYS = {
+    'vi': ['Thứ Hai', 'Thứ Ba', 'Thứ Tư', 'Thứ Năm', 'Thứ Sáu', 'Thứ Bảy', 'Chủ Nhật'],
+    'en': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+}
+MONTHS_EN = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+             'August', 'September', 'October', 'November', 'December']
+
+TEMPLATES = {
+    'vi': {
+        'time': "Bây giờ là {time} (giờ Việt Nam), {weekday} ngày {date}.",
+        'date': "Hôm nay là {weekday}, ngày {date}.",
+        'year': "Năm nay là năm {year}."
+    },
+    'en': {
+        'time': "It's {time} (Vietnam time), {weekday}, {date}.",
+        'date': "Today is {weekday}, {date}.",
+        'year': "It's {year}."
+    }
+}
+
+# What the question asks for; anything else gets the date
+_TIME_RE = re.compile(r"(?<!\w)(?:mấy\s+giờ|giờ\s+là|giờ\s+hiện\s+tại|thời\s+gian\s+hiện\s+tại|"
+                      r"what\s+time|the\s+time|current\s+time|time\s+is\s+it|time\s+now)(?!\w)", re.IGNORECASE)
+_YEAR_RE = re.compile(r"(?<!\w)(?:năm\s+mấy|năm\s+nay\s+là\s+năm|what\s+year)(?!\w)", re.IGNORECASE)
+
+
+def get_current_datetime():
+    """Helper function to get current datetime info"""
+    now = datetime.now(VN_TZ)
+    return {
+        'datetime': now.strftime('%d/%m/%Y %H:%M:%S'),
+        'date': now.strftime('%d/%m/%Y'),
+        'time': now.strftime('%H:%M:%S'),
+        'full': now.strftime('%A, %d %B %Y, %H:%M:%S')
+    }
+
+
+def datetime_response(text: str, lang: str = 'vi', now: Optional[datetime] = None) -> str:
+    """
+    Answer a "what time/date is it" question from templates, without the LLM.
+
+    Args:
+        text: User question, used to tell time, date and year questions apart
+        lang: Language of the answer ('vi' or 'en')
+        now: Time to report (defaults to the current time in Vietnam)
+
+    Returns:
+        Answer sentence
+    """
+    lang = 'vi' if lang == 'vi' else 'en'
+    now = now or datetime.now(VN_TZ)
+    text = unicodedata.normalize("NFC", text)
+
+    if _TIME_RE.search(text):
+        kind = 'time'
+    elif _YEAR_RE.search(text):
+        kind = 'year'
+    else:
+        kind = 'date'
+
+    weekday = WEEKDAYS[lang][now.weekday()]
+    if lang == 'vi':
+        time_str = now.strftime('%H:%M')
+        date_str = now.strftime('%d/%m/%Y')
+    else:
+        time_str = f"{now.hour % 12 or 12}:{now.minute:02d} {'AM' if now.hour < 12 else 'PM'}"
+        date_str = f"{MONTHS_EN[now.month - 1]} {now.day}, {now.year}"
+
+    return TEMPLATES[lang][kind].format(time=time_str, date=date_str, weekday=weekday, year=now.year)
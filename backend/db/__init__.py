@@ -17,3 +17,14 @@ mongo_db = client["chatbot_AI"]
 # Expose collections
 users_collection = mongo_db["users"]
 chat_collection = mongo_db["chat_history"]
+
+# Async client for the ASGI app, created lazily because it binds to the running event loop
+_async_db = None
+
+def get_async_db():
+    """Get the async database handle (pymongo AsyncMongoClient)."""
+    global _async_db
+    if _async_db is None:
+        from pymongo import AsyncMongoClient
+        _async_db = AsyncMongoClient(MONGO_URI)["chatbot_AI"]
+    return _async_db
@@ -0,0 +1,329 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Storage of cached vectors: file suffix and numpy dtype. int8 rows carry
+# their own float32 scale (max |x| / 127) in scales.f32.
+VECTOR_DTYPES = {
+    "float32": ("f32", np.float32),
+    "float16": ("f16", np.float16),
+    "int8": ("i8", np.int8)
+}
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (Unicode NFC, collapsed whitespace)."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (embedding model, normalized text hash).
+
+    Vectors live in a matrix file that is memory-mapped for reads and
+    appended to for writes; ``index.json`` maps each text hash to its row.
+    Every embedding model (and storage dtype) gets its own sub-directory so
+    vectors from different models never mix. float16 halves and int8
+    quarters the file, at a small precision cost.
+
+    Several processes (the server, a background rebuild, build_index.py)
+    may share a cache directory; appends take an exclusive lock on
+    ``index.lock`` and start from the index on disk, not this process's copy.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dtype: str = "float32"):
+        """
+        Initialize cache for one embedding model.
+
+        Args:
+            cache_dir: Root directory of the cache
+            model_name: Embedding model name, part of the cache key
+            dtype: Storage of the vectors: "float32", "float16" or "int8"
+        """
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown embedding cache dtype '{dtype}', expected one of {tuple(VECTOR_DTYPES)}")
+        suffix, self._np_dtype = VECTOR_DTYPES[dtype]
+        self.dtype = dtype
+        self.model_name = model_name
+        subdir = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name) + ("" if dtype == "float32" else f".{dtype}")
+        self.cache_dir = os.path.join(cache_dir, subdir)
+        self.vectors_path = os.path.join(self.cache_dir, f"vectors.{suffix}")
+        self.scales_path = os.path.join(self.cache_dir, "scales.f32")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.lock_path = os.path.join(self.cache_dir, "index.lock")
+
+        self.dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+
+        self._load_index()
+
+    def _read_index(self) -> Optional[Tuple[int, Dict[str, int]]]:
+        """Read (dim, rows) from disk; None if missing, from another model or longer than the vector files."""
+        if not os.path.exists(self.index_path):
+            return None
+        with open(self.index_path, 'r') as f:
+            index = json.load(f)
+        if index.get('model') != self.model_name:
+            logger.warning("Embedding cache belongs to another model, ignoring it")
+            return None
+
+        dim, rows = index.get('dim'), index.get('rows', {})
+        expected_size = len(rows) * dim * np.dtype(self._np_dtype).itemsize if dim else 0
+        scales_ok = (self.dtype != "int8"
+                     or (os.path.exists(self.scales_path) and os.path.getsize(self.scales_path) >= len(rows) * 4))
+        if (dim and scales_ok and os.path.exists(self.vectors_path)
+                and os.path.getsize(self.vectors_path) >= expected_size):
+            return dim, rows
+        logger.warning("Embedding cache files are inconsistent, ignoring them")
+        return None
+
+    def _load_index(self) -> None:
+        """Load the hash index; start empty if it is missing or inconsistent."""
+        try:
+            index = self._read_index()
+            if index is not None:
+                self.dim, self._rows = index
+                logger.info(f"Loaded embedding cache with {len(self._rows)} vectors ({self.model_name})")
+        except Exception as e:
+            logger.warning(f"Failed to load embedding cache: {e}")
+
+    def _refresh_index(self) -> None:
+        """Adopt the index on disk, which includes rows appended by other processes."""
+        try:
+            index = self._read_index()
+        except Exception as e:
+            logger.warning(f"Failed to reload embedding cache index: {e}")
+            index = None
+        dim, rows = index if index is not None else (None, {})
+        if len(rows) < len(self._rows):
+            # Cache was reset on disk; drop the mapping of the old files
+            self._matrix = self._scales = None
+        self.dim, self._rows = dim, rows
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock on the cache directory across processes."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.lock_path, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _save_index(self) -> None:
+        """Atomically write the hash index."""
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'model': self.model_name, 'dim': self.dim, 'rows': self._rows}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _get_matrix(self) -> Optional[np.memmap]:
+        """Memory-map the vectors file, remapping after it has grown."""
+        if not self._rows:
+            return None
+        if self._matrix is None or self._matrix.shape[0] < len(self._rows):
+            self._matrix = np.memmap(self.vectors_path, dtype=self._np_dtype, mode='r',
+                                     shape=(len(self._rows), self.dim))
+            if self.dtype == "int8":
+                self._scales = np.memmap(self.scales_path, dtype=np.float32, mode='r', shape=(len(self._rows),))
+        return self._matrix
+
+    def _encode(self, block: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Convert float32 rows to the storage dtype (int8 also returns per-row scales)."""
+        if self.dtype != "int8":
+            return block.astype(self._np_dtype), None
+        scales = np.abs(block).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.clip(np.rint(block / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _decode(self, row: int) -> List[float]:
+        """Read one cached row back as float32 values."""
+        vector = self._matrix[row].astype(np.float32)
+        if self._scales is not None:
+            vector *= self._scales[row]
+        return vector.tolist()
+
+    def key(self, text: str) -> str:
+        """Cache key of a text for this model."""
+        return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for texts; missing entries are None."""
+        with self._lock:
+            matrix = self._get_matrix()
+            results = []
+            for text in texts:
+                row = self._rows.get(self.key(text))
+                results.append(self._decode(row) if row is not None else None)
+            return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        """Append vectors for texts that are not cached yet."""
+        if not texts:
+            return
+        with self._lock, self._file_lock():
+            self._refresh_index()
+            new_keys, new_vectors = [], []
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                if key in self._rows or key in new_keys:
+                    continue
+                new_keys.append(key)
+                new_vectors.append(vector)
+            if not new_keys:
+                return
+
+            block = np.asarray(new_vectors, dtype=np.float32)
+            if self.dim is None:
+                self.dim = block.shape[1]
+            elif block.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension mismatch: {block.shape[1]} != {self.dim}")
+
+            codes, scales = self._encode(block)
+            with open(self.vectors_path, 'ab') as f:
+                # Truncate rows a crashed writer may have left behind the index
+                f.truncate(len(self._rows) * self.dim * codes.itemsize)
+                f.write(codes.tobytes())
+            if scales is not None:
+                with open(self.scales_path, 'ab') as f:
+                    f.truncate(len(self._rows) * 4)
+                    f.write(scales.tobytes())
+
+            for key in new_keys:
+                self._rows[key] = len(self._rows)
+            self._save_index()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            'embedding_cache_size': len(self._rows),
+            'embedding_cache_dtype': self.dtype,
+            'embedding_cache_dir': self.cache_dir
+        }
+
+
+class QueryEmbeddingCache:
+    """Bounded in-memory LRU cache of query vectors with a time-to-live."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        """
+        Args:
+            max_size: Maximum number of cached queries
+            ttl: Seconds before an entry expires
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a query so trivially different spellings share an entry."""
+        return normalize_text(query).lower()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the cached vector for a normalized query, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """Store a query vector, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics."""
+        total = self.hits + self.misses
+        return {
+            'query_cache_size': len(self._entries),
+            'query_cache_hits': self.hits,
+            'query_cache_misses': self.misses,
+            'query_cache_hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves chunk and query vectors from caches when possible."""
+
+    def __init__(self, embeddings: Embeddings,
+                 cache: Optional[EmbeddingCache] = None,
+                 query_cache: Optional[QueryEmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.query_cache = query_cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, reusing cached vectors for unchanged text."""
+        if self.cache is None:
+            return self.embeddings.embed_documents(texts)
+
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            computed = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            self.cache.put_many([texts[i] for i in missing], computed)
+
+        logger.info(f"Embedded {len(texts)} texts ({len(texts) - len(missing)} cached, {len(missing)} computed)")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the vector of a recent identical query."""
+        if self.query_cache is None:
+            return self.embeddings.embed_query(text)
+
+        query = self.query_cache.normalize(text)
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.query_cache.put(query, vector)
+        return vector
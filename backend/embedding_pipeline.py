@@ -0,0 +1,150 @@
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("thread", "process")
+
+# Model of a process-pool worker, loaded once by _init_worker
+_worker_embeddings: Optional[Embeddings] = None
+
+
+def set_intra_op_threads(threads: Optional[int]) -> None:
+    """Set PyTorch's intra-op thread count (no-op without torch or when None)."""
+    if not threads:
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def _init_worker(model_name: str, intra_op_threads: Optional[int]) -> None:
+    """Load the embedding model once per worker process."""
+    global _worker_embeddings
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    set_intra_op_threads(intra_op_threads)
+    _worker_embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs={'device': 'cpu'})
+
+
+def _embed_in_worker(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+class EmbeddingPipeline:
+    """
+    Streams texts through fixed-size embedding batches on a worker pool.
+
+    Batches are looked up in the persistent embedding cache first; only the
+    missing texts go to the pool. At most ``2 * workers`` batches are in
+    flight and results come back in input order, so callers can append
+    each batch to an index without holding every vector in memory.
+
+    Thread workers share the loaded model (tokenizers and PyTorch release
+    the GIL); process workers load their own copy. Either way each worker
+    gets ``intra_op_threads`` PyTorch threads, by default the CPU count
+    divided by the number of workers.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = 64, workers: int = 1,
+                 executor: str = "thread", intra_op_threads: Optional[int] = None,
+                 model_name: Optional[str] = None):
+        """
+        Args:
+            embeddings: Embeddings to run (a CachedEmbeddings wrapper is unwrapped
+                and its cache used per batch)
+            batch_size: Texts per batch
+            workers: Concurrent batches
+            executor: "thread" or "process" pool
+            intra_op_threads: PyTorch threads per worker (None: CPUs / workers)
+            model_name: HuggingFace model loaded by process workers
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+        if executor == "process" and not model_name:
+            raise ValueError("The process executor needs the embedding model name")
+
+        self.cache = embeddings.cache if isinstance(embeddings, CachedEmbeddings) else None
+        self.embeddings = embeddings.embeddings if isinstance(embeddings, CachedEmbeddings) else embeddings
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.executor = executor
+        self.intra_op_threads = intra_op_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.model_name = model_name
+        self.last_run: Dict[str, Any] = {}
+
+    def _create_executor(self) -> Executor:
+        if self.executor == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.intra_op_threads)
+            )
+        set_intra_op_threads(self.intra_op_threads)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed")
+
+    def _submit(self, pool: Executor, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int], Optional[Future]]:
+        """Resolve cached vectors of a batch and submit the missing texts."""
+        vectors = self.cache.get_many(texts) if self.cache else [None] * len(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors, missing, None
+        missing_texts = [texts[i] for i in missing]
+        if self.executor == "process":
+            return vectors, missing, pool.submit(_embed_in_worker, missing_texts)
+        return vectors, missing, pool.submit(self.embeddings.embed_documents, missing_texts)
+
+    def embed(self, texts: List[str]) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Embed texts batch by batch.
+
+        Yields:
+            (offset of the batch in texts, (batch, d) float32 vectors), in order
+        """
+        start_time = time.perf_counter()
+        computed = 0
+        in_flight = deque()
+
+        with self._create_executor() as pool:
+            for start in range(0, len(texts), self.batch_size):
+                batch = texts[start:start + self.batch_size]
+                in_flight.append((start, batch, *self._submit(pool, batch)))
+
+                while in_flight and (len(in_flight) >= 2 * self.workers or start + self.batch_size >= len(texts)):
+                    offset, batch_texts, vectors, missing, future = in_flight.popleft()
+                    if future is not None:
+                        result = future.result()
+                        for i, vector in zip(missing, result):
+                            vectors[i] = vector
+                        if self.cache:
+                            self.cache.put_many([batch_texts[i] for i in missing], [vectors[i] for i in missing])
+                        computed += len(missing)
+                    yield offset, np.asarray(vectors, dtype=np.float32)
+
+        elapsed = time.perf_counter() - start_time
+        self.last_run = {
+            'chunks': len(texts),
+            'computed': computed,
+            'seconds': round(elapsed, 3),
+            'chunks_per_second': round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        if texts:
+            logger.info(f"Embedded {len(texts)} chunks ({len(texts) - computed} cached, {computed} computed) "
+                        f"in {elapsed:.1f}s: {self.last_run['chunks_per_second']} chunks/s "
+                        f"[{self.workers} {self.executor} workers x {self.intra_op_threads} threads, "
+                        f"batch {self.batch_size}]")
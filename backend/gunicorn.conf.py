@@ -0,0 +1,28 @@
+# Production settings for the ASGI app: gunicorn -c gunicorn.conf.py asgi:app
+#
+# Each worker is a single uvicorn event loop. LLM, TTS and MongoDB calls are
+# awaited, so one worker holds hundreds of in-flight requests; add workers to
+# use more CPU cores for embeddings/FAISS, not to add concurrency.
+import os
+import multiprocessing
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# One worker per core is enough; every worker loads its own embedding model and index
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count(), 4))))
+
+# LLM answers can take tens of seconds; streaming responses stay open longer
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = 500
+
+# Per-worker tuning read by asgi.py / llm_client.py:
+#   ASGI_THREADPOOL_SIZE  threads for embeddings, FAISS and the mounted Flask routes (default 32)
+#   LLM_MAX_CONNECTIONS   pooled connections to the Groq API per worker (default 20)
+#   LLM_MAX_KEEPALIVE     idle keep-alive connections per worker (default 10)
+#   LLM_CONNECT_TIMEOUT / LLM_READ_TIMEOUT / LLM_TOTAL_TIMEOUT  seconds (5 / 30 / 60)
@@ -0,0 +1,75 @@
+from typing import Dict, List, Optional, Sequence
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from attribute_index import AttributeIndex
+from sparse_index import BM25Index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """
+    Merge ranked id lists by reciprocal rank fusion.
+
+    Every list adds 1 / (k + rank) to the ids it contains, so an id ranked
+    well by both retrievers beats one ranked first by only one of them.
+
+    Returns:
+        All ids, best fused score first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing FAISS similarity search with BM25 keyword search.
+
+    Both sides return ``fetch_k`` candidates by chunk id; the top ``k`` of
+    their reciprocal rank fusion are returned as documents from the FAISS
+    docstore. Without a sparse index only the dense ranking is used.
+
+    With an attribute index, listing filters parsed from the query (type,
+    price, place) restrict both searches to the matching chunks up front.
+    """
+
+    vectorstore: FAISS
+    sparse_index: Optional[BM25Index] = None
+    attribute_index: Optional[AttributeIndex] = None
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        positions = self.attribute_index.filter_positions(query) if self.attribute_index else None
+        search_kwargs = {"positions": positions} if positions is not None else {}
+
+        documents: Dict[str, Document] = {}
+        dense_ids = []
+        for doc in self.vectorstore.similarity_search(query, k=self.fetch_k, **search_kwargs):
+            documents[doc.id] = doc
+            dense_ids.append(doc.id)
+        rankings = [dense_ids]
+
+        if self.sparse_index is not None:
+            allowed = ({self.vectorstore.index_to_docstore_id[int(position)] for position in positions}
+                       if positions is not None else None)
+            rankings.append([chunk_id for chunk_id, _ in self.sparse_index.search(query, self.fetch_k, allowed)])
+
+        results = []
+        for chunk_id in reciprocal_rank_fusion(rankings, self.rrf_k):
+            doc = documents.get(chunk_id)
+            if doc is None:
+                doc = self.vectorstore.docstore.search(chunk_id)
+                if not isinstance(doc, Document):
+                    continue
+            results.append(doc)
+            if len(results) == self.k:
+                break
+        return results
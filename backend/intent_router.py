@@ -0,0 +1,109 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple
+
+DATETIME = 'datetime'
+FAREWELL = 'farewell'
+GREETING = 'greeting'
+TOURISM = 'tourism'
+OTHER = 'other'
+
+# Phrases per intent (lower case, NFC). Matched as whole words, so "năm" in
+# "5 năm" or "time" in "sometimes" do not trigger the datetime intent.
+INTENT_PHRASES = {
+    DATETIME: [
+        'mấy giờ', 'giờ là', 'ngày mấy', 'ngày bao nhiêu', 'thứ mấy', 'tháng mấy', 'năm mấy',
+        'ngày tháng', 'năm nay là năm', 'ngày hôm nay', 'giờ hiện tại', 'thời gian hiện tại',
+        'what time', 'current time', 'time is it', 'time now', 'what is the time', "what's the time",
+        'what date', 'what is the date', "what's the date", "today's date", 'date today', 'what day',
+        'day is it', 'what year', 'current date'
+    ],
+    FAREWELL: [
+        'tạm biệt', 'chào tạm biệt', 'hẹn gặp lại', 'kết thúc', 'bye', 'goodbye', 'bye bye',
+        'see you', 'good night'
+    ],
+    GREETING: [
+        'xin chào', 'chào bạn', 'chào', 'alo', 'hello', 'hi', 'hey', 'good morning',
+        'good afternoon', 'good evening'
+    ],
+    TOURISM: [
+        # Places
+        'quảng ninh', 'quang ninh', 'hạ long', 'ha long', 'halong', 'bãi cháy', 'bai chay',
+        'tuần châu', 'tuan chau', 'cô tô', 'co to', 'yên tử', 'yen tu', 'vân đồn', 'van don',
+        'móng cái', 'mong cai', 'cẩm phả', 'cam pha', 'uông bí', 'uong bi', 'đông triều',
+        'dong trieu', 'quảng yên', 'quang yen', 'trà cổ', 'tra co', 'quan lạn', 'quan lan',
+        'sun world', 'vịnh', 'đảo', 'bãi biển', 'biển', 'núi', 'chùa', 'hang động',
+        'bay', 'island', 'beach', 'cave', 'pagoda', 'mountain',
+        # Services and planning
+        'du lịch', 'khách sạn', 'homestay', 'resort', 'nhà nghỉ', 'phòng', 'nhà hàng', 'quán',
+        'ẩm thực', 'món', 'đặc sản', 'hải sản', 'ăn', 'vé', 'giá', 'tour', 'lịch trình',
+        'tham quan', 'địa điểm', 'đi đâu', 'chơi', 'thời tiết', 'mở cửa', 'đóng cửa', 'cáp treo',
+        'du thuyền', 'lễ hội', 'chợ', 'xe', 'tàu', 'sân bay',
+        'travel', 'tourism', 'trip', 'visit', 'hotel', 'hotels', 'room', 'restaurant', 'food',
+        'seafood', 'eat', 'ticket', 'tickets', 'price', 'itinerary', 'place', 'places',
+        'attraction', 'attractions', 'weather', 'opening hours', 'open', 'close', 'closing',
+        'cable car', 'cruise', 'festival', 'market', 'bus', 'ferry', 'airport'
+    ]
+}
+
+# Greetings longer than this (in words) carry a real question
+MAX_GREETING_WORDS = 5
+# Farewells must open the message ("Khi nào kết thúc?" is a question) and stay short
+MAX_FAREWELL_WORDS = 8
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _compile_automaton(phrases_by_intent: dict) -> "re.Pattern":
+    """One alternation with a named group per intent, longest phrases first."""
+    groups = []
+    for intent, phrases in phrases_by_intent.items():
+        alternatives = sorted(set(phrases), key=len, reverse=True)
+        body = "|".join(re.escape(p).replace(r"\ ", r"\s+") for p in alternatives)
+        groups.append(f"(?P<{intent}>{body})")
+    return re.compile(r"(?<!\w)(?:" + "|".join(groups) + r")(?!\w)", re.IGNORECASE)
+
+
+_INTENT_RE = _compile_automaton(INTENT_PHRASES)
+
+
+class Intent(NamedTuple):
+    """Routing decision for a message."""
+    name: str
+    tags: FrozenSet[str]
+
+    @property
+    def is_local(self) -> bool:
+        """Answered without any LLM call (time questions only when they carry no tourism content)."""
+        return self.name in (GREETING, FAREWELL) or (self.name == DATETIME and TOURISM not in self.tags)
+
+
+@lru_cache(maxsize=4096)
+def classify_intent(text: str) -> Intent:
+    """
+    Classify a message in one pass over the text.
+
+    Returns:
+        Intent whose name is the route (datetime, farewell, greeting,
+        tourism or other) and whose tags are all intents found
+    """
+    text = unicodedata.normalize("NFC", text)
+    matches = list(_INTENT_RE.finditer(text))
+    tags = frozenset(match.lastgroup for match in matches)
+    words = _WORD_RE.findall(text)
+    first_word = _WORD_RE.search(text)
+    opens_with_farewell = first_word is not None and any(
+        match.lastgroup == FAREWELL and match.start() == first_word.start() for match in matches)
+
+    if DATETIME in tags:
+        name = DATETIME
+    elif TOURISM in tags:
+        name = TOURISM
+    elif opens_with_farewell and len(words) <= MAX_FAREWELL_WORDS:
+        name = FAREWELL
+    elif GREETING in tags and len(words) <= MAX_GREETING_WORDS:
+        name = GREETING
+    else:
+        name = OTHER
+    return Intent(name, tags)
@@ -0,0 +1,62 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Vietnamese diacritics - strong indicator (lower and upper case)
+_VIETNAMESE_CHARS = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
+_VIETNAMESE_CHARS_RE = re.compile(f"[{_VIETNAMESE_CHARS}{_VIETNAMESE_CHARS.upper()}]")
+_WORD_RE = re.compile(r"\w+")
+
+# Scored vocabulary: each distinct word or phrase found adds its weight
+VIETNAMESE_WORDS = {
+    'tôi': 1, 'bạn': 1, 'chúng': 1, 'của': 1, 'trong': 1, 'một': 1, 'có': 1, 'được': 1, 'này': 1,
+    'đó': 1, 'là': 1, 'và': 1, 'với': 1, 'cho': 1, 'về': 1, 'du lịch': 1, 'quảng ninh': 1, 'hạ long': 1
+}
+ENGLISH_WORDS = {
+    'the': 1, 'and': 1, 'or': 1, 'but': 1, 'in': 1, 'on': 1, 'at': 1, 'to': 1, 'for': 1, 'of': 1,
+    'with': 1, 'this': 1, 'that': 1, 'is': 1, 'are': 1, 'what': 1, 'where': 1, 'how': 1, 'can': 1,
+    'could': 1, 'would': 1, 'travel': 1, 'tourism': 1, 'quang ninh': 1, 'ha long': 1,
+    # Frequent English words of travel questions (replace the accidental substring hits of
+    # the old heuristic, e.g. 'the' in 'there', 'or' in 'border')
+    'there': 1, 'hi': 1, 'hello': 1, 'thanks': 1, 'bye': 1, 'please': 1, 'you': 1, 'your': 1,
+    'want': 1, 'like': 1, 'best': 1, 'cheap': 1, 'price': 1, 'hotel': 1, 'hotels': 1, 'beach': 1,
+    'bay': 1, 'cruise': 1, 'market': 1, 'border': 1, 'island': 1, 'trip': 1, 'tour': 1,
+    'food': 1, 'restaurant': 1, 'ticket': 1, 'near': 1, 'from': 1, 'when': 1, 'which': 1, 'goodbye': 1
+}
+
+# Question patterns typical of each language, worth a bonus of 2 (counted once)
+VIETNAMESE_PATTERNS = ('bạn có thể', 'cho tôi biết', 'giới thiệu', 'hãy', 'làm sao')
+ENGLISH_PATTERNS = ('what', 'where', 'how', 'can you', 'could you', 'would you', 'tell me', 'show me')
+PATTERN_BONUS = 2
+
+
+def _score(tokens: set, padded: str, words: dict, patterns: tuple) -> int:
+    score = 0
+    for word, weight in words.items():
+        if (f" {word} " in padded) if " " in word else (word in tokens):
+            score += weight
+    if any((f" {pattern} " in padded) if " " in pattern else (pattern in tokens) for pattern in patterns):
+        score += PATTERN_BONUS
+    return score
+
+
+@lru_cache(maxsize=4096)
+def detect_language(text: str) -> str:
+    """
+    Detect whether a text is Vietnamese ('vi') or English ('en').
+
+    Deterministic and dependency-free: any Vietnamese diacritic means 'vi';
+    otherwise whole words are scored against small vi/en vocabularies and
+    ties (including text with no known word) go to 'vi'.
+    """
+    text = unicodedata.normalize("NFC", text)
+    if _VIETNAMESE_CHARS_RE.search(text):
+        return 'vi'
+
+    token_list = _WORD_RE.findall(text.lower())
+    tokens = set(token_list)
+    padded = f" {' '.join(token_list)} "
+
+    vi_score = _score(tokens, padded, VIETNAMESE_WORDS, VIETNAMESE_PATTERNS)
+    en_score = _score(tokens, padded, ENGLISH_WORDS, ENGLISH_PATTERNS)
+    return 'en' if en_score > vi_score else 'vi'
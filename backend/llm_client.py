@@ -0,0 +1,190 @@
+import os
+import json
+import asyncio
+import logging
+import weakref
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from async_runtime import get_background_loop
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+try:
+    import h2  # noqa: F401 - HTTP/2 support for httpx is optional
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class LLMError(Exception):
+    """Error returned by the chat completions API."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMClient:
+    """
+    Pooled, asyncio-native client for OpenAI-compatible chat completions (Groq).
+
+    Connections are kept alive and shared between requests (HTTP/2 when
+    ``h2`` is installed). Async callers use :meth:`achat`/:meth:`astream`;
+    sync callers use :meth:`chat`, which runs on the shared background loop
+    so its pool is reused across Flask worker threads.
+    """
+
+    def __init__(self,
+                 api_url: str = GROQ_API_URL,
+                 api_key: Optional[str] = None,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 total_timeout: float = 60.0,
+                 http2: bool = True):
+        """
+        Args:
+            api_url: Chat completions endpoint
+            api_key: Bearer token (defaults to GROQ_API_KEY)
+            max_connections: Connection limit to the API host
+            max_keepalive_connections: Idle connections kept open to the API host
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Seconds allowed between received bytes
+            total_timeout: Seconds allowed for the whole request
+            http2: Use HTTP/2 when available
+        """
+        self.api_url = api_url
+        self.api_key = api_key or os.getenv("GROQ_API_KEY", "your_api_key")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=read_timeout,
+            pool=connect_timeout
+        )
+        self.total_timeout = total_timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        # httpx async pools are bound to the loop that created them
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_env(cls) -> "LLMClient":
+        """Create a client configured through LLM_* environment variables."""
+        return cls(
+            api_url=os.getenv("LLM_API_URL", GROQ_API_URL),
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+            connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("LLM_READ_TIMEOUT", "30")),
+            total_timeout=float(os.getenv("LLM_TOTAL_TIMEOUT", "60"))
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+            self._clients[loop] = client
+        return client
+
+    @staticmethod
+    def _payload(messages: List[Dict[str, str]], model: str, temperature: float,
+                 max_tokens: int, stream: bool = False) -> Dict:
+        return {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream
+        }
+
+    async def achat(self, messages: List[Dict[str, str]], model: str,
+                    temperature: float = 0.7, max_tokens: int = 300) -> str:
+        """
+        Request a chat completion and return the message content.
+
+        Raises:
+            LLMError: On a non-200 response
+            asyncio.TimeoutError: When total_timeout is exceeded
+        """
+        async def _request() -> str:
+            response = await self._get_client().post(
+                self.api_url, json=self._payload(messages, model, temperature, max_tokens)
+            )
+            if response.status_code != 200:
+                raise LLMError(f"LLM API error {response.status_code}: {response.text[:200]}",
+                               response.status_code)
+            return response.json()["choices"][0]["message"]["content"]
+
+        return await asyncio.wait_for(_request(), self.total_timeout)
+
+    async def astream(self, messages: List[Dict[str, str]], model: str,
+                      temperature: float = 0.7, max_tokens: int = 300) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+
+        Raises:
+            LLMError: On a non-200 response or when total_timeout is exceeded
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.total_timeout
+
+        async with self._get_client().stream(
+            "POST", self.api_url, json=self._payload(messages, model, temperature, max_tokens, stream=True)
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise LLMError(f"LLM API error {response.status_code}: {body[:200]!r}", response.status_code)
+
+            async for line in response.aiter_lines():
+                if loop.time() > deadline:
+                    raise LLMError("LLM stream exceeded total timeout")
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+    def chat(self, messages: List[Dict[str, str]], model: str,
+             temperature: float = 0.7, max_tokens: int = 300) -> str:
+        """Blocking version of :meth:`achat` for sync callers."""
+        return get_background_loop().run(self.achat(messages, model, temperature, max_tokens))
+
+    async def aclose(self) -> None:
+        """Close the pooled client of the running loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_llm_client = None
+
+def get_llm_client() -> LLMClient:
+    """Get the shared LLM client."""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient.from_env()
+    return _llm_client
@@ -1,13 +1,28 @@
 from langchain_community.document_loaders import TextLoader, PyPDFLoader, Docx2txtLoader
 from langchain.schema import Document
 import os
+import queue
 import logging
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Queue marker put by a parse worker once its file is exhausted (or failed)
+_FILE_DONE = object()
+
+
+class _LoadError:
+    """Queue marker for a file that failed to parse."""
+
+    def __init__(self, filename: str, error: Exception):
+        self.filename = filename
+        self.error = error
+
+
 class DocumentLoader:
     """Enhanced document loader with better error handling and logging."""
     
@@ -17,6 +32,161 @@ class DocumentLoader:
         '.docx': Docx2txtLoader
     }
     
+    @staticmethod
+    def list_files(directory: str, recursive: bool = True) -> List[str]:
+        """
+        List supported source files in directory.
+        
+        Args:
+            directory: Path to directory containing documents
+            recursive: Also list files in subdirectories (hidden ones are skipped)
+            
+        Returns:
+            Sorted list of file paths relative to directory ("/"-separated)
+            with a supported extension
+        """
+        if not os.path.exists(directory):
+            raise FileNotFoundError(f"Directory not found: {directory}")
+        
+        files = []
+        for root, dirnames, filenames in os.walk(directory):
+            if recursive:
+                dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            else:
+                dirnames[:] = []
+            
+            for filename in filenames:
+                relpath = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                file_ext = os.path.splitext(filename)[1].lower()
+                
+                if file_ext not in DocumentLoader.SUPPORTED_FORMATS:
+                    logger.warning(f"Unsupported format: {relpath}")
+                    continue
+                
+                files.append(relpath)
+        
+        return sorted(files)
+    
+    @staticmethod
+    def iter_file(directory: str, filename: str, encoding: str = 'utf-8') -> Iterator[Document]:
+        """
+        Lazily load a single supported file and tag its documents with source metadata.
+        
+        PDFs are yielded page by page as they are parsed.
+        
+        Args:
+            directory: Directory containing the file
+            filename: File path relative to directory
+            encoding: Text file encoding (default: utf-8)
+            
+        Yields:
+            Documents loaded from the file
+        """
+        filepath = os.path.join(directory, filename)
+        file_ext = os.path.splitext(filename)[1].lower()
+        loader_class = DocumentLoader.SUPPORTED_FORMATS[file_ext]
+        
+        # Handle encoding for text files
+        if file_ext == '.txt':
+            loader = loader_class(filepath, encoding=encoding)
+        else:
+            loader = loader_class(filepath)
+        
+        for doc in loader.lazy_load():
+            # Add metadata to documents
+            doc.metadata.update({
+                'source_file': filename,
+                'file_path': filepath,
+                'file_type': file_ext
+            })
+            yield doc
+    
+    @staticmethod
+    def load_file(directory: str, filename: str, encoding: str = 'utf-8') -> List[Document]:
+        """
+        Load a single supported file and tag its documents with source metadata.
+        
+        Args:
+            directory: Directory containing the file
+            filename: File path relative to directory
+            encoding: Text file encoding (default: utf-8)
+            
+        Returns:
+            List of documents loaded from the file
+        """
+        return list(DocumentLoader.iter_file(directory, filename, encoding))
+    
+    @staticmethod
+    def stream_documents(directory: str,
+                         filenames: Optional[List[str]] = None,
+                         encoding: str = 'utf-8',
+                         workers: int = 4,
+                         max_pending: int = 32,
+                         errors: Optional[Dict[str, str]] = None) -> Iterator[Document]:
+        """
+        Parse files on a thread pool and yield documents (PDF pages) as soon as they are ready.
+        
+        Each file is parsed by one worker, so the documents of a file keep
+        their order; files are interleaved. Workers block once
+        ``max_pending`` documents wait to be consumed, so memory is bounded
+        by the pipeline depth rather than the corpus size.
+        
+        Args:
+            directory: Path to directory containing documents
+            filenames: Files relative to directory (default: list_files(directory))
+            encoding: Text file encoding (default: utf-8)
+            workers: Files parsed concurrently
+            max_pending: Parsed documents buffered ahead of the consumer
+            errors: Filled with {filename: error} for files that failed; some
+                of their documents may already have been yielded
+            
+        Yields:
+            Loaded documents
+        """
+        if filenames is None:
+            filenames = DocumentLoader.list_files(directory)
+        
+        pending = queue.Queue(maxsize=max(1, max_pending))
+        stop = threading.Event()
+        
+        def put(item) -> bool:
+            # Give up once the consumer went away instead of blocking forever
+            while not stop.is_set():
+                try:
+                    pending.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def parse(filename: str) -> None:
+            try:
+                for doc in DocumentLoader.iter_file(directory, filename, encoding):
+                    if not put(doc):
+                        return
+            except Exception as e:
+                put(_LoadError(filename, e))
+            put(_FILE_DONE)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="loader") as pool:
+            for filename in filenames:
+                pool.submit(parse, filename)
+            
+            remaining = len(filenames)
+            try:
+                while remaining:
+                    item = pending.get()
+                    if item is _FILE_DONE:
+                        remaining -= 1
+                    elif isinstance(item, _LoadError):
+                        logger.error(f"Failed to load {item.filename}: {item.error}")
+                        if errors is not None:
+                            errors[item.filename] = str(item.error)
+                    else:
+                        yield item
+            finally:
+                stop.set()
+    
     @staticmethod
     def load_documents(directory: str, encoding: str = 'utf-8') -> List[Document]:
         """
@@ -29,44 +199,12 @@ class DocumentLoader:
         Returns:
             List of loaded documents
         """
-        if not os.path.exists(directory):
-            raise FileNotFoundError(f"Directory not found: {directory}")
-            
         docs = []
         failed_files = []
         
-        for filename in os.listdir(directory):
-            filepath = os.path.join(directory, filename)
-            
-            # Skip directories
-            if os.path.isdir(filepath):
-                continue
-                
-            file_ext = os.path.splitext(filename)[1].lower()
-            
-            if file_ext not in DocumentLoader.SUPPORTED_FORMATS:
-                logger.warning(f"Unsupported format: {filename}")
-                continue
-                
+        for filename in DocumentLoader.list_files(directory):
             try:
-                loader_class = DocumentLoader.SUPPORTED_FORMATS[file_ext]
-                
-                # Handle encoding for text files
-                if file_ext == '.txt':
-                    loader = loader_class(filepath, encoding=encoding)
-                else:
-                    loader = loader_class(filepath)
-                    
-                file_docs = loader.load()
-                
-                # Add metadata to documents
-                for doc in file_docs:
-                    doc.metadata.update({
-                        'source_file': filename,
-                        'file_path': filepath,
-                        'file_type': file_ext
-                    })
-                    
+                file_docs = DocumentLoader.load_file(directory, filename, encoding)
                 docs.extend(file_docs)
                 logger.info(f"Successfully loaded: {filename} ({len(file_docs)} documents)")
                 
@@ -84,4 +222,4 @@ class DocumentLoader:
 # Backward compatibility
 def load_documents(directory: str) -> List[Document]:
     """Backward compatibility function."""
-    return DocumentLoader.load_documents(directory)
\ No newline at end of file
+    return DocumentLoader.load_documents(directory)
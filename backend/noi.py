@@ -1,21 +1,14 @@
 import os
+import re
 import asyncio
-import tempfile
-import base64
-import requests
-import edge_tts
-from langdetect import detect
-import pytz
-from datetime import datetime
-from flask import jsonify
-
-# API configuration
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "your_api_key")
-headers = {
-    "Authorization": f"Bearer {GROQ_API_KEY}",
-    "Content-Type": "application/json"
-}
+from typing import AsyncIterator, List, Optional, Tuple
+from language_detector import detect_language
+from intent_router import DATETIME, GREETING
+from datetime_responder import datetime_response
+from llm_client import get_llm_client, LLMError
+from audio_store import get_audio_store
+from tts_cache import get_tts_cache
+from tts_worker import get_tts_worker, synthesize_mp3
 
 EDGE_VOICES = {
     'vi': 'vi-VN-HoaiMyNeural',
@@ -23,61 +16,47 @@ EDGE_VOICES = {
 }
 
 
-def detect_language(text: str) -> str:
-    """Detect language for given text, fallback to vi/en heuristic."""
-    try:
-        detected = detect(text)
-        # Map common language codes to supported ones
-        if detected in ['vi', 'vietnamese']:
-            return 'vi'
-        elif detected in ['en', 'english']:
-            return 'en'
-        else:
-            # Fallback to character-based detection
-            vietnamese_chars = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
-            if any(char in text.lower() for char in vietnamese_chars):
-                return 'vi'
-            return 'en'
-    except Exception:
-        return _fallback_language_detection(text)
-
-def _fallback_language_detection(text: str) -> str:
-    """Enhanced fallback language detection."""
-    text_lower = text.lower().strip()
-    
-    # Vietnamese diacritics - strong indicator
-    vietnamese_chars = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
-    if any(char in text_lower for char in vietnamese_chars):
-        return 'vi'
-    
-    # Common Vietnamese words
-    vietnamese_words = ['tôi', 'bạn', 'chúng', 'của', 'trong', 'một', 'có', 'được', 'này', 'đó', 'là', 'và', 'với', 'cho', 'về', 'du lịch', 'quảng ninh', 'hạ long']
-    # Common English words
-    english_words = ['the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'this', 'that', 'is', 'are', 'what', 'where', 'how', 'can', 'could', 'would', 'travel', 'tourism', 'quang ninh', 'ha long']
-    
-    # Count word matches
-    vi_score = sum(1 for word in vietnamese_words if word in text_lower)
-    en_score = sum(1 for word in english_words if word in text_lower)
-    
-    # English patterns
-    english_patterns = ['what', 'where', 'how', 'can you', 'could you', 'would you', 'tell me', 'show me']
-    if any(pattern in text_lower for pattern in english_patterns):
-        en_score += 2
-    
-    # Vietnamese patterns  
-    vietnamese_patterns = ['bạn có thể', 'cho tôi biết', 'giới thiệu', 'hãy', 'làm sao']
-    if any(pattern in text_lower for pattern in vietnamese_patterns):
-        vi_score += 2
-    
-    return 'en' if en_score > vi_score else 'vi'
+# Messages shown when the LLM call fails
+TECHNICAL_ERROR_MESSAGES = {
+    'vi': "Xin lỗi, tôi đang gặp sự cố kỹ thuật. Vui lòng thử lại sau!",
+    'en': "Sorry, I'm experiencing technical issues. Please try again later!"
+}
 
+BUSY_MESSAGES = {
+    'vi': "Tôi đang bận, vui lòng thử lại sau!",
+    'en': "I'm busy right now, please try again later!"
+}
 
-def get_ai_response(user_input: str, detected_lang: str) -> str:
-    """Call Groq Chat Completions to get an AI response constrained by domain/lang."""
-    try:
-        if detected_lang == 'vi':
-            system_prompt = (
-                """Bạn là một trợ lý du lịch thông minh của tỉnh Quảng Ninh, Việt Nam. Bạn tên là QBot.
+# Replies to greetings and farewells, answered without calling the LLM
+GREETING_RESPONSES = {
+    'vi': "Xin chào! Tôi là QBot, trợ lý du lịch Quảng Ninh. Bạn muốn tìm hiểu về địa điểm, khách sạn hay ẩm thực nào?",
+    'en': "Hello! I'm QBot, your Quang Ninh travel assistant. Would you like to know about places to visit, hotels or local food?"
+}
+
+FAREWELL_RESPONSES = {
+    'vi': "Chào tạm biệt! Chúc bạn có chuyến du lịch Quảng Ninh vui vẻ!",
+    'en': "Goodbye! Have a wonderful trip to Quang Ninh!"
+}
+
+LLM_MODEL = "llama3-70b-8192"
+
+# Upper bound for one synthesis on the TTS worker, in seconds
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "60"))
+
+
+def get_local_response(intent: str, detected_lang: str, user_input: str = '') -> str:
+    """Reply for an intent answered locally (greeting, farewell or time/date question)."""
+    if intent == DATETIME:
+        return datetime_response(user_input, detected_lang)
+    responses = GREETING_RESPONSES if intent == GREETING else FAREWELL_RESPONSES
+    return responses['vi' if detected_lang == 'vi' else 'en']
+
+
+def _build_messages(user_input: str, detected_lang: str) -> list:
+    """Build the chat messages with the system prompt for the detected language."""
+    if detected_lang == 'vi':
+        system_prompt = (
+            """Bạn là một trợ lý du lịch thông minh của tỉnh Quảng Ninh, Việt Nam. Bạn tên là QBot.
                 Khi được hỏi bằng tiếng Việt, bạn phải trả lời bằng tiếng Việt. 
                 Bạn chỉ trả lời các câu hỏi liên quan đến du lịch như: địa điểm tham quan, lịch trình, 
                 khách sạn, nhà hàng, ẩm thực địa phương, văn hóa, lịch sử, giao thông, thời tiết, 
@@ -90,10 +69,10 @@ def get_ai_response(user_input: str, detected_lang: str) -> str:
                 từ chối và gợi ý người dùng hỏi về du lịch tại Quảng Ninh.
                 
                 Hãy trả lời một cách thân thiện, nhiệt tình và cung cấp thông tin hữu ích."""
-            )
-        else:
-            system_prompt = (
-                """You are a smart travel assistant specializing in Quang Ninh Province, Vietnam. Your name is QBot.
+        )
+    else:
+        system_prompt = (
+            """You are a smart travel assistant specializing in Quang Ninh Province, Vietnam. Your name is QBot.
                 When asked in English, you MUST respond in English. 
                 You only answer questions related to travel such as: tourist destinations, itineraries, 
                 hotels, restaurants, local cuisine, culture, history, transportation, weather, 
@@ -106,74 +85,244 @@ def get_ai_response(user_input: str, detected_lang: str) -> str:
                 decline and suggest asking about travel in Quang Ninh.
                 
                 Please respond in a friendly, enthusiastic manner and provide useful information."""
-            )
+        )
 
-        data = {
-            "model": "llama3-70b-8192",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 300  # Increased for better responses
-        }
-
-        response = requests.post(GROQ_API_URL, headers=headers, json=data, timeout=60)
-        if response.status_code == 200:
-            content = response.json()["choices"][0]["message"]["content"]
-            content = content.replace('*', '').strip()
-            
-            # Ensure proper sentence ending
-            if content and content[-1] not in ['.', '!', '?']:
-                content += '.'
-                
-            return content
-        else:
-            error_msg = (
-                "Xin lỗi, tôi đang gặp sự cố kỹ thuật. Vui lòng thử lại sau!" 
-                if detected_lang == 'vi' 
-                else "Sorry, I'm experiencing technical issues. Please try again later!"
-            )
-            return error_msg
-            
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_input}
+    ]
+
+
+def _finalize_response(content: str) -> str:
+    """Clean up the LLM answer for display and speech."""
+    content = content.replace('*', '').strip()
+    
+    # Ensure proper sentence ending
+    if content and content[-1] not in ['.', '!', '?']:
+        content += '.'
+        
+    return content
+
+
+def get_ai_response(user_input: str, detected_lang: str) -> str:
+    """Call Groq Chat Completions to get an AI response constrained by domain/lang."""
+    try:
+        content = get_llm_client().chat(
+            _build_messages(user_input, detected_lang),
+            model=LLM_MODEL,
+            temperature=0.7,
+            max_tokens=300  # Increased for better responses
+        )
+        return _finalize_response(content)
+    except LLMError as e:
+        print(f"API Error: {e}")
+        return TECHNICAL_ERROR_MESSAGES['vi' if detected_lang == 'vi' else 'en']
     except Exception as e:
         print(f"API Error: {e}")
-        error_msg = (
-            "Tôi đang bận, vui lòng thử lại sau!" 
-            if detected_lang == 'vi' 
-            else "I'm busy right now, please try again later!"
+        return BUSY_MESSAGES['vi' if detected_lang == 'vi' else 'en']
+
+
+async def get_ai_response_async(user_input: str, detected_lang: str) -> str:
+    """Async version of get_ai_response for the ASGI app."""
+    try:
+        content = await get_llm_client().achat(
+            _build_messages(user_input, detected_lang),
+            model=LLM_MODEL,
+            temperature=0.7,
+            max_tokens=300
         )
-        return error_msg
+        return _finalize_response(content)
+    except LLMError as e:
+        print(f"API Error: {e}")
+        return TECHNICAL_ERROR_MESSAGES['vi' if detected_lang == 'vi' else 'en']
+    except Exception as e:
+        print(f"API Error: {e}")
+        return BUSY_MESSAGES['vi' if detected_lang == 'vi' else 'en']
 
 
-def synthesize_speech_to_bytes(text: str, lang: str = 'vi') -> bytes:
-    """Synthesize speech with Edge TTS and return MP3 bytes."""
+async def _synthesize_and_cache(text: str, voice: str, cacheable: bool = True) -> bytes:
+    """Synthesize speech with Edge TTS and store it in the TTS cache (empty on error)."""
+    try:
+        audio = await synthesize_mp3(text, voice)
+    except Exception as e:
+        print(f"TTS Error: {e}")
+        return b''  # Return empty bytes on error
+    if cacheable:
+        get_tts_cache().put(voice, text, audio)
+    return audio
+
+
+async def synthesize_speech_async(text: str, lang: str = 'vi', cacheable: bool = True) -> bytes:
+    """
+    Synthesize speech with Edge TTS and return MP3 bytes (empty on error).
+
+    Pass cacheable=False for one-off texts (e.g. the current time) that
+    should not fill the TTS cache.
+    """
     # Ensure we use the correct voice for the detected language
     voice = EDGE_VOICES.get(lang, EDGE_VOICES['vi'])
     
     print(f"TTS: Using voice '{voice}' for language '{lang}'")
 
-    async def _run() -> bytes:
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp:
-            tmp_path = tmp.name
+    audio = get_tts_cache().get(voice, text)
+    if audio is not None:
+        return audio
+    return await _synthesize_and_cache(text, voice, cacheable)
+
+
+def synthesize_speech_to_bytes(text: str, lang: str = 'vi', cacheable: bool = True) -> bytes:
+    """Synthesize speech with Edge TTS and return MP3 bytes (see synthesize_speech_async)."""
+    voice = EDGE_VOICES.get(lang, EDGE_VOICES['vi'])
+    # Cache hits skip Edge TTS and the worker round trip entirely
+    audio = get_tts_cache().get(voice, text)
+    if audio is not None:
+        return audio
+
+    # Run on the long-lived TTS worker loop instead of a fresh loop per call
+    try:
+        return get_tts_worker().run(_synthesize_and_cache(text, voice, cacheable), timeout=TTS_TIMEOUT)
+    except Exception as e:
+        print(f"TTS Error: {e}")
+        return b''
+
+
+def submit_speech(text: str, lang: str = 'vi', cacheable: bool = True) -> str:
+    """
+    Start synthesizing speech in the background and return its audio id.
+
+    The clip is served by GET /audio/<audio_id> as soon as it is ready;
+    ids are content addresses, so cached phrases are not synthesized again.
+    """
+    voice = EDGE_VOICES.get(lang, EDGE_VOICES['vi'])
+    audio_id = get_tts_cache().key(voice, text)
+    if not get_tts_cache().contains(voice, text):
+        get_audio_store().add(audio_id, get_tts_worker().submit(_synthesize_and_cache(text, voice, cacheable)),
+                              cacheable)
+    return audio_id
+
+
+def prewarm_tts_cache() -> list:
+    """
+    Synthesize the fixed phrases (error messages, greeting and farewell
+    replies) missing from the TTS cache in the background.
+
+    Returns:
+        Futures of the scheduled syntheses
+    """
+    futures = []
+    for messages in (TECHNICAL_ERROR_MESSAGES, BUSY_MESSAGES, GREETING_RESPONSES, FAREWELL_RESPONSES):
+        for lang, text in messages.items():
+            voice = EDGE_VOICES[lang]
+            if not get_tts_cache().contains(voice, text):
+                futures.append(get_tts_worker().submit(_synthesize_and_cache(text, voice)))
+    return futures
+
+
+# Sentence boundary: terminal punctuation followed by whitespace, or a line break
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+class SentenceSplitter:
+    """Split streamed LLM text into sentences as soon as they are complete."""
+
+    def __init__(self, min_length: int = 20):
+        """
+        Args:
+            min_length: Shorter sentences are merged with the next one,
+                so TTS is not called for fragments like "Vâng."
+        """
+        self.min_length = min_length
+        self.count = 0
+        self._buffer = ""
+
+    def _emit(self, sentence: str) -> Optional[str]:
+        sentence = sentence.replace('*', '').strip()
+        if not sentence:
+            return None
+        self.count += 1
+        return sentence
+
+    def feed(self, delta: str) -> List[str]:
+        """Add a chunk of text and return the sentences it completed."""
+        self._buffer += delta
+        sentences, start = [], 0
+        for match in _SENTENCE_END_RE.finditer(self._buffer):
+            if len(self._buffer[start:match.start()].strip()) < self.min_length:
+                continue
+            sentence = self._emit(self._buffer[start:match.start()])
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return the remaining text as the last sentence."""
+        tail, self._buffer = self._buffer, ""
+        return self._emit(_finalize_response(tail)) if tail.strip() else None
+
+
+async def stream_speech_async(user_input: str, detected_lang: str,
+                              tokens: Optional[AsyncIterator[str]] = None) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Stream the AI response sentence by sentence together with its speech.
+
+    Each sentence is sent to TTS as soon as the LLM completes it, so later
+    sentences are still being generated while earlier ones are synthesized.
+
+    Args:
+        user_input: User message
+        detected_lang: Language of the answer and voice
+        tokens: Answer text stream (e.g. from RAG); defaults to the
+            domain-constrained LLM answer to user_input
+
+    Yields:
+        (sentence, MP3 bytes) in answer order
+    """
+    segments: asyncio.Queue = asyncio.Queue()
+    splitter = SentenceSplitter()
+
+    def schedule(sentence: str) -> None:
+        speech = asyncio.ensure_future(get_tts_worker().arun(synthesize_speech_async(sentence, detected_lang)))
+        segments.put_nowait((sentence, speech))
+
+    async def produce() -> None:
         try:
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(tmp_path)
-            with open(tmp_path, 'rb') as f:
-                data = f.read()
-            return data
+            deltas = tokens if tokens is not None else get_llm_client().astream(
+                _build_messages(user_input, detected_lang),
+                model=LLM_MODEL,
+                temperature=0.7,
+                max_tokens=300
+            )
+            async for delta in deltas:
+                for sentence in splitter.feed(delta):
+                    schedule(sentence)
+            tail = splitter.flush()
+            if tail:
+                schedule(tail)
         except Exception as e:
-            print(f"TTS Error: {e}")
-            return b''  # Return empty bytes on error
+            print(f"API Error: {e}")
+            if splitter.count == 0:
+                messages = TECHNICAL_ERROR_MESSAGES if isinstance(e, LLMError) else BUSY_MESSAGES
+                schedule(messages['vi' if detected_lang == 'vi' else 'en'])
         finally:
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
-
-    # Run the async function in a fresh loop to avoid conflicts
-    return asyncio.run(_run())
+            segments.put_nowait(None)
 
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await segments.get()
+            if item is None:
+                break
+            sentence, speech = item
+            yield sentence, await speech
+    finally:
+        # Client went away or the stream ended: stop generating and synthesizing
+        producer.cancel()
+        while not segments.empty():
+            item = segments.get_nowait()
+            if item is not None:
+                item[1].cancel()
 
 if __name__ == '__main__':
     print("🚀 Chatbot du lịch đã sẵn sàng (chế độ dòng lệnh)! Gõ 'exit' để thoát.")
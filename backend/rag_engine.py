@@ -1,8 +1,17 @@
 import os
+import copy
 import json
-from typing import Optional, Dict, Any, List
+import time
+import uuid
+import threading
+import asyncio
+import hashlib
+from typing import Optional, Dict, Any, List, Tuple, Iterator, AsyncIterator, Union
 from datetime import datetime
+import faiss
+import numpy as np
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.chains import RetrievalQA
@@ -11,6 +20,18 @@ from langchain.prompts import PromptTemplate
 from langchain.schema import Document
 from dotenv import load_dotenv
 from loader import DocumentLoader
+from embedding_cache import EmbeddingCache, QueryEmbeddingCache, CachedEmbeddings
+from answer_cache import SemanticAnswerCache, cache_scope
+from sparse_index import BM25Index
+from attribute_index import AttributeIndex
+from hybrid_retriever import HybridRetriever
+from chunk_store import ChunkStore
+from ann_index import (FLAT, BUILD_PARAMS, DEFAULT_TRAIN_SIZE, resolve_params, build_index, set_search_params, supports_remove,
+                       mmap_flags, is_lossy)
+from rescoring_faiss import RescoringFAISS
+from embedding_pipeline import EmbeddingPipeline
+from snapshot_store import BUILD_SUFFIX, Snapshot, SnapshotStore
+from record_splitter import RecordSplitter
 import logging
 
 load_dotenv()
@@ -19,9 +40,37 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class _SnapshotAttribute:
+    """Engine attribute stored on the active Snapshot, so switching versions replaces all of them at once."""
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = self.name or name
+
+    def __get__(self, engine, owner=None):
+        if engine is None:
+            return self
+        return getattr(engine._snapshot, self.name)
+
+    def __set__(self, engine, value) -> None:
+        setattr(engine._snapshot, self.name, value)
+
+
 class RAGEngine:
     """Enhanced RAG Engine with better error handling, caching, and configuration."""
     
+    # Paths and loaded components of the active vector store version
+    vectorstore_path = _SnapshotAttribute()
+    metadata_path = _SnapshotAttribute()
+    manifest_path = _SnapshotAttribute()
+    sparse_index_path = _SnapshotAttribute()
+    vectorstore = _SnapshotAttribute()
+    sparse_index = _SnapshotAttribute()
+    attribute_index = _SnapshotAttribute()
+    _qa_chain = _SnapshotAttribute("qa_chain")
+    
     def __init__(self, 
                  data_dir: str = "data/", 
                  vectorstore_path: str = "vectorstore/index",
@@ -29,7 +78,26 @@ class RAGEngine:
                  llm_model: str = "llama3-8b-8192",
                  chunk_size: int = 1000,
                  chunk_overlap: int = 200,
-                 temperature: float = 0.7):
+                 temperature: float = 0.7,
+                 embedding_cache_dir: Optional[str] = "vectorstore/embedding_cache",
+                 embedding_cache_dtype: str = "float32",
+                 query_cache_size: int = 1024,
+                 query_cache_ttl: float = 3600,
+                 answer_cache_threshold: Optional[float] = 0.95,
+                 answer_cache_ttl: float = 3600,
+                 hybrid_search: bool = True,
+                 index_type: Optional[str] = None,
+                 index_params: Optional[Dict[str, Any]] = None,
+                 load_mode: str = "memory",
+                 embedding_batch_size: int = 64,
+                 embedding_workers: int = 1,
+                 embedding_executor: str = "thread",
+                 intra_op_threads: Optional[int] = None,
+                 loader_workers: int = 4,
+                 record_splitting: bool = True,
+                 attribute_filtering: bool = True,
+                 snapshots_keep: int = 2,
+                 snapshot_check_interval: float = 2.0):
         """
         Initialize RAG Engine with configurable parameters.
         
@@ -41,34 +109,109 @@ class RAGEngine:
             chunk_size: Text chunk size for splitting
             chunk_overlap: Overlap between chunks
             temperature: LLM temperature setting
+            embedding_cache_dir: Directory of the persistent chunk embedding cache
+                (None disables it)
+            embedding_cache_dtype: Storage of cached vectors: "float32", "float16"
+                or "int8" (per-vector scale)
+            query_cache_size: Maximum number of cached query embeddings (0 disables it)
+            query_cache_ttl: Seconds a cached query embedding stays valid
+            answer_cache_threshold: Cosine similarity above which a past answer is
+                reused (None disables the semantic answer cache)
+            answer_cache_ttl: Seconds a cached answer stays valid
+            hybrid_search: Fuse BM25 keyword hits with the vector search
+                (False uses the vector search alone)
+            index_type: FAISS index type for new builds: "flat", "ivf_flat",
+                "ivf_pq" or "hnsw" (None keeps the type of the saved index,
+                flat if there is none)
+            index_params: Index parameters (nlist, m, nbits, M, ef_construction,
+                quantization "fp16"/"int8", train_size); query-time nprobe,
+                ef_search and rescore_factor also apply to a loaded index
+            load_mode: "memory" reads the index and chunk store into the heap;
+                "mmap" maps them read-only, so workers share the pages and
+                start in constant time
+            embedding_batch_size: Chunks per embedding batch during index builds
+            embedding_workers: Batches embedded concurrently
+            embedding_executor: "thread" (shared model) or "process" (one model
+                per worker) pool for embedding batches
+            intra_op_threads: PyTorch threads per embedding worker (None: CPU
+                count divided by the number of workers)
+            loader_workers: Source files parsed concurrently
+            record_splitting: Split listing files (hotels.txt) into one chunk
+                per record with structured metadata
+            attribute_filtering: Restrict retrieval to listings matching the
+                type, price and place parsed from the query
+            snapshots_keep: Vector store versions kept on disk (the live one
+                and the previous, which other workers may still be leaving)
+            snapshot_check_interval: Seconds between checks of the published
+                version, which this process switches to in the background
         """
         self.data_dir = data_dir
-        self.vectorstore_path = vectorstore_path
         self.embedding_model = embedding_model
         self.llm_model = llm_model
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.temperature = temperature
+        self.embedding_cache_dir = embedding_cache_dir
+        self.embedding_cache_dtype = embedding_cache_dtype
+        self.hybrid_search = hybrid_search
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        if load_mode not in ("memory", "mmap"):
+            raise ValueError(f"Unknown load mode '{load_mode}', expected 'memory' or 'mmap'")
+        self.load_mode = load_mode
+        self.loader_workers = loader_workers
+        self.record_splitting = record_splitting
+        self.attribute_filtering = attribute_filtering
+        self.query_cache = QueryEmbeddingCache(query_cache_size, query_cache_ttl) if query_cache_size > 0 else None
+        self.answer_cache = (SemanticAnswerCache(answer_cache_threshold, answer_cache_ttl)
+                             if answer_cache_threshold is not None else None)
         
         # Initialize components
         self.embeddings = None
-        self.vectorstore = None
-        self._qa_chain = None
         self._llm = None
         
-        # Metadata file for tracking updates
-        self.metadata_path = os.path.join(os.path.dirname(vectorstore_path), "metadata.json")
+        # Builds go to versioned directories under the vector store root; the
+        # active version (index, chunk store, sparse index, QA chain) is one Snapshot
+        self.snapshots = SnapshotStore(os.path.dirname(vectorstore_path) or ".", keep=snapshots_keep)
+        self._index_dirname = os.path.basename(os.path.normpath(vectorstore_path))
+        self._snapshot = self._new_snapshot(self.snapshots.current_version())
+        self.snapshot_check_interval = snapshot_check_interval
+        self._follow_versions = True
+        self._version_checked_at = time.monotonic()
+        self._build_lock = threading.RLock()
+        self._switch_lock = threading.Lock()
+        self._rebuild_guard = threading.Lock()
+        self._rebuild_thread = None
+        self._last_rebuild_error = None
         
         # Initialize embeddings
         self._load_embeddings()
+        
+        # Batched, pooled embedding of chunks for index builds
+        self.embedding_pipeline = EmbeddingPipeline(
+            self.embeddings,
+            batch_size=embedding_batch_size,
+            workers=embedding_workers,
+            executor=embedding_executor,
+            intra_op_threads=intra_op_threads,
+            model_name=embedding_model
+        )
     
     def _load_embeddings(self) -> None:
-        """Initialize embeddings model."""
+        """Initialize embeddings model, wrapped with the persistent embedding cache."""
         try:
             self.embeddings = HuggingFaceEmbeddings(
                 model_name=self.embedding_model,
                 model_kwargs={'device': 'cpu'}  # Use CPU for compatibility
             )
+            if self.embedding_cache_dir or self.query_cache:
+                self.embeddings = CachedEmbeddings(
+                    self.embeddings,
+                    cache=(EmbeddingCache(self.embedding_cache_dir, self.embedding_model,
+                                          dtype=self.embedding_cache_dtype)
+                           if self.embedding_cache_dir else None),
+                    query_cache=self.query_cache
+                )
             logger.info(f"Loaded embeddings model: {self.embedding_model}")
         except Exception as e:
             raise RuntimeError(f"Failed to load embeddings: {e}")
@@ -92,35 +235,119 @@ class RAGEngine:
                 raise RuntimeError(f"Failed to initialize LLM: {e}")
         return self._llm
     
+    def _index_exists(self) -> bool:
+        """Check whether a saved FAISS index (<path>/index.faiss) and its chunk store are present."""
+        return (os.path.exists(os.path.join(self.vectorstore_path, "index.faiss"))
+                and ChunkStore.exists(self.vectorstore_path))
+    
+    @staticmethod
+    def _hash_file(filepath: str) -> str:
+        """Compute SHA-256 of a file's content."""
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _scan_sources(self) -> Dict[str, str]:
+        """Map every supported source file to its content hash."""
+        return {
+            filename: self._hash_file(os.path.join(self.data_dir, filename))
+            for filename in DocumentLoader.list_files(self.data_dir)
+        }
+    
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Load the per-file manifest ({filename: {hash, chunk_ids}})."""
+        try:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, 'r') as f:
+                    return json.load(f).get('files', {})
+        except Exception as e:
+            logger.warning(f"Failed to read manifest: {e}")
+        return {}
+    
+    def _save_manifest(self, files: Dict[str, Dict[str, Any]]) -> None:
+        """Save the per-file manifest next to metadata.json."""
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            with open(self.manifest_path, 'w') as f:
+                json.dump({'files': files}, f, indent=2)
+        except Exception as e:
+            logger.warning(f"Failed to save manifest: {e}")
+    
+    @staticmethod
+    def _diff_sources(manifest: Dict[str, Dict[str, Any]],
+                      current: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+        """Return (added, changed, removed) file names between manifest and disk."""
+        added = [name for name in current if name not in manifest]
+        changed = [name for name in current
+                   if name in manifest and manifest[name].get('hash') != current[name]]
+        removed = [name for name in manifest if name not in current]
+        return added, changed, removed
+    
+    def _load_metadata(self) -> Dict[str, Any]:
+        """Load metadata.json ({} if it is missing or unreadable)."""
+        try:
+            with open(self.metadata_path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    
+    def _index_params_match(self, metadata: Dict[str, Any]) -> bool:
+        """
+        Check the saved index has the configured type and build parameters.
+        
+        Without an explicit index type, only the build parameters that were
+        given (e.g. quantization) are checked against the saved type.
+        """
+        saved_type = metadata.get('index_type', FLAT)
+        if self.index_type is not None and saved_type != self.index_type:
+            return False
+        # Compare with what was asked for: nlist is capped and IVF may fall back to flat on small corpora
+        requested = metadata.get('index_requested', {})
+        return all(requested.get(key) == self.index_params.get(key) for key in BUILD_PARAMS[saved_type]
+                   if self.index_type is not None or key in self.index_params)
+    
+    def _build_params_match(self) -> bool:
+        """Check the saved index was built with the current embedding/chunking/index settings."""
+        metadata = self._load_metadata()
+        return (metadata.get('embedding_model') == self.embedding_model
+                and metadata.get('chunk_size') == self.chunk_size
+                and metadata.get('chunk_overlap') == self.chunk_overlap
+                and metadata.get('record_splitting', False) == self.record_splitting
+                and self._index_params_match(metadata))
+    
     def _needs_rebuild(self) -> bool:
-        """Check if vector store needs rebuilding based on source files."""
+        """Check if vector store needs rebuilding based on source file hashes."""
         try:
-            if not os.path.exists(self.vectorstore_path + ".faiss"):
+            if not self._index_exists():
                 logger.info("Vector store doesn't exist, needs building")
                 return True
             
-            if not os.path.exists(self.metadata_path):
-                logger.info("Metadata file missing, rebuilding vector store")
+            if not os.path.exists(self.metadata_path) or not os.path.exists(self.manifest_path):
+                logger.info("Metadata or manifest missing, rebuilding vector store")
                 return True
             
-            with open(self.metadata_path, 'r') as f:
-                metadata = json.load(f)
+            if not os.path.exists(self.sparse_index_path):
+                logger.info("Sparse index missing, updating vector store")
+                return True
             
-            # Check if source directory is newer than last build
-            if os.path.exists(self.data_dir):
-                last_build = metadata.get('last_build_time', 0)
-                dir_mtime = os.path.getmtime(self.data_dir)
-                
-                if dir_mtime > last_build:
-                    logger.info("Source directory updated, rebuilding vector store")
-                    return True
+            if not self._build_params_match():
+                logger.info("Embedding, chunking or index settings changed, rebuilding vector store")
+                return True
+            
+            added, changed, removed = self._diff_sources(self._load_manifest(), self._scan_sources())
+            if added or changed or removed:
+                logger.info(f"Source files updated (added={len(added)}, changed={len(changed)}, "
+                            f"removed={len(removed)}), updating vector store")
+                return True
             
             return False
         except Exception as e:
             logger.warning(f"Error checking rebuild status: {e}")
             return True
     
-    def _save_metadata(self, document_count: int) -> None:
+    def _save_metadata(self, document_count: int, index_info: Dict[str, Any]) -> None:
         """Save metadata about the vector store build."""
         try:
             metadata = {
@@ -128,7 +355,9 @@ class RAGEngine:
                 'document_count': document_count,
                 'embedding_model': self.embedding_model,
                 'chunk_size': self.chunk_size,
-                'chunk_overlap': self.chunk_overlap
+                'chunk_overlap': self.chunk_overlap,
+                'record_splitting': self.record_splitting,
+                **index_info
             }
             
             os.makedirs(os.path.dirname(self.metadata_path), exist_ok=True)
@@ -138,73 +367,433 @@ class RAGEngine:
         except Exception as e:
             logger.warning(f"Failed to save metadata: {e}")
     
+    def _get_splitter(self) -> Union[RecordSplitter, RecursiveCharacterTextSplitter]:
+        """Create the text splitter for the configured chunk settings."""
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            length_function=len,
+            separators=["\n\n", "\n", " ", ""]
+        )
+        # One chunk per listing record, other text falls back to character windows
+        return RecordSplitter(splitter) if self.record_splitting else splitter
+    
+    def _split_files(self, filenames: List[str],
+                     current: Dict[str, str]) -> Tuple[List[Document], List[str], Dict[str, Dict[str, Any]]]:
+        """
+        Load and split the given files, assigning a stable id to every chunk.
+        
+        Documents are split as the loader's worker pool yields them, so
+        parsing and splitting overlap and parsed files are not held in
+        memory. Files that fail to load are logged and left out of the
+        returned manifest entries so they are retried on the next build.
+        
+        Returns:
+            Tuple of (chunks, chunk ids, manifest entries for the files)
+        """
+        splitter = self._get_splitter()
+        chunks_by_file: Dict[str, List[Document]] = {filename: [] for filename in filenames}
+        errors: Dict[str, str] = {}
+        
+        for document in DocumentLoader.stream_documents(self.data_dir, filenames,
+                                                        workers=self.loader_workers, errors=errors):
+            chunks_by_file[document.metadata['source_file']].extend(splitter.split_documents([document]))
+        
+        texts, ids, entries = [], [], {}
+        for filename in filenames:
+            if filename in errors:
+                continue
+            
+            chunks = chunks_by_file[filename]
+            chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+            texts.extend(chunks)
+            ids.extend(chunk_ids)
+            entries[filename] = {'hash': current[filename], 'chunk_ids': chunk_ids}
+            logger.info(f"Split {filename} into {len(chunks)} chunks")
+        
+        return texts, ids, entries
+    
+    def _rebuild_vector_store(self, current: Dict[str, str]) -> None:
+        """Re-chunk and re-embed every source file into a fresh index."""
+        texts, ids, files = self._split_files(list(current), current)
+        if not texts:
+            raise ValueError(f"No documents found in {self.data_dir}")
+        
+        logger.info(f"Created {len(texts)} text chunks")
+        
+        # Create vector store
+        vectorstore, index_info = self._new_vectorstore(texts, ids)
+        
+        # Save vector store
+        self._save_vectorstore(vectorstore)
+        
+        sparse_index = BM25Index()
+        sparse_index.add(ids, (doc.page_content for doc in texts))
+        sparse_index.save(self.sparse_index_path)
+        
+        self._save_manifest(files)
+        self._save_metadata(len(texts), index_info)
+    
+    def _new_vectorstore(self, texts: List[Document], ids: List[str]) -> Tuple[FAISS, Dict[str, Any]]:
+        """
+        Embed chunks into a new vector store of the configured index type.
+        
+        A random training sample is embedded first and the index trained on
+        it; the remaining chunks then stream through the embedding pipeline
+        and are appended batch by batch, so only the sample is ever held in
+        memory. Exact vectors of a lossy index are written straight to disk.
+        
+        Returns:
+            Tuple of (vector store, index metadata for metadata.json)
+        """
+        start_time = time.perf_counter()
+        
+        # Sampled chunks go first, the rest keep their order
+        sample_size = min(len(texts), self.index_params.get('train_size', DEFAULT_TRAIN_SIZE))
+        if sample_size < len(texts):
+            sample = np.sort(np.random.default_rng(0).choice(len(texts), sample_size, replace=False))
+            order = np.concatenate([sample, np.setdiff1d(np.arange(len(texts)), sample)])
+            texts = [texts[i] for i in order]
+            ids = [ids[i] for i in order]
+        
+        sample_vectors = np.concatenate([vectors for _, vectors in self.embedding_pipeline.embed(
+            [doc.page_content for doc in texts[:sample_size]])])
+        
+        index_type = self.index_type or self._load_metadata().get('index_type', FLAT)
+        index_built, params = resolve_params(index_type, len(texts), sample_vectors.shape[1], self.index_params)
+        
+        exact_vectors = None
+        if is_lossy(index_built, params):
+            os.makedirs(self.vectorstore_path, exist_ok=True)
+            exact_vectors = np.lib.format.open_memmap(
+                f"{self._exact_vectors_path}.tmp", mode='w+', dtype=np.float32,
+                shape=(len(texts), sample_vectors.shape[1])
+            )
+        
+        vectorstore = RescoringFAISS(
+            embedding_function=self.embeddings,
+            index=build_index(index_built, sample_vectors, params),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+            exact_vectors=exact_vectors,
+            rescore_factor=params['rescore_factor']
+        )
+        self._add_embedded(vectorstore, texts[:sample_size], ids[:sample_size], sample_vectors, exact_vectors)
+        del sample_vectors
+        self._add_chunks(vectorstore, texts[sample_size:], ids[sample_size:], exact_vectors, offset=sample_size)
+        
+        elapsed = time.perf_counter() - start_time
+        chunks_per_second = round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0
+        logger.info(f"Built {index_built} index over {len(ids)} chunks in {elapsed:.1f}s "
+                    f"({chunks_per_second} chunks/s)")
+        return vectorstore, {
+            'index_type': index_type,
+            'index_built': index_built,
+            'index_params': params,
+            'index_requested': {key: self.index_params.get(key) for key in BUILD_PARAMS[index_type]},
+            'build_chunks_per_second': chunks_per_second
+        }
+    
+    @staticmethod
+    def _add_embedded(vectorstore: FAISS, texts: List[Document], ids: List[str], vectors: np.ndarray,
+                      exact_vectors: Optional[np.ndarray] = None, offset: int = 0) -> None:
+        """Append embedded chunks to a vector store (and their rows to the exact vectors)."""
+        if exact_vectors is not None:
+            exact_vectors[offset:offset + len(vectors)] = vectors
+        vectorstore.add_embeddings(
+            zip([doc.page_content for doc in texts], vectors),
+            metadatas=[doc.metadata for doc in texts],
+            ids=ids
+        )
+    
+    def _add_chunks(self, vectorstore: FAISS, texts: List[Document], ids: List[str],
+                    exact_vectors: Optional[np.ndarray] = None, offset: int = 0) -> None:
+        """Stream chunks through the embedding pipeline into a vector store, one batch at a time."""
+        for start, vectors in self.embedding_pipeline.embed([doc.page_content for doc in texts]):
+            end = start + len(vectors)
+            self._add_embedded(vectorstore, texts[start:end], ids[start:end], vectors,
+                               exact_vectors, offset + start)
+    
+    @property
+    def _exact_vectors_path(self) -> str:
+        return os.path.join(self.vectorstore_path, "vectors.npy")
+    
+    @property
+    def _attribute_index_path(self) -> str:
+        return os.path.join(self.vectorstore_path, "attributes.npz")
+    
+    def _save_vectorstore(self, vectorstore: FAISS) -> None:
+        """
+        Save the index and chunk store, plus the exact vectors of a lossy index.
+        
+        Every file is written to a temp file and renamed over the old one,
+        so processes that memory-mapped the previous files keep reading them
+        instead of seeing a truncated file.
+        """
+        os.makedirs(self.vectorstore_path, exist_ok=True)
+        index_path = os.path.join(self.vectorstore_path, "index.faiss")
+        faiss.write_index(vectorstore.index, f"{index_path}.tmp")
+        os.replace(f"{index_path}.tmp", index_path)
+        
+        ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+        documents = [vectorstore.docstore.search(chunk_id) for chunk_id in ids]
+        ChunkStore.write(self.vectorstore_path, ids, documents)
+        AttributeIndex.from_metadatas([doc.metadata for doc in documents]).save(self._attribute_index_path)
+        
+        vectors_path = self._exact_vectors_path
+        exact_vectors = vectorstore.exact_vectors if isinstance(vectorstore, RescoringFAISS) else None
+        if isinstance(exact_vectors, np.memmap) and os.path.abspath(exact_vectors.filename) == \
+                os.path.abspath(f"{vectors_path}.tmp"):
+            # Streamed to disk by _new_vectorstore
+            exact_vectors.flush()
+            os.replace(f"{vectors_path}.tmp", vectors_path)
+        elif exact_vectors is not None:
+            with open(f"{vectors_path}.tmp", 'wb') as f:
+                np.save(f, np.asarray(exact_vectors, dtype=np.float32))
+            os.replace(f"{vectors_path}.tmp", vectors_path)
+        elif os.path.exists(vectors_path):
+            os.remove(vectors_path)
+        
+        # Pickled docstore of stores saved by FAISS.save_local; nothing reads it any more
+        legacy_path = os.path.join(self.vectorstore_path, "index.pkl")
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+    
+    def _update_vector_store(self, manifest: Dict[str, Dict[str, Any]], current: Dict[str, str]) -> None:
+        """Apply only added, changed and removed files to the saved index in place."""
+        added, changed, removed = self._diff_sources(manifest, current)
+        
+        metadata = self._load_metadata()
+        index_info = {key: metadata[key] for key in ('index_type', 'index_built', 'index_params', 'index_requested')
+                      if key in metadata}
+        if is_lossy(metadata.get('index_built', FLAT), metadata.get('index_params', {})):
+            # The exact vectors are only written by full builds; cached embeddings make them cheap
+            logger.info("Quantized index keeps exact vectors for re-scoring, rebuilding vector store")
+            self._rebuild_vector_store(current)
+            return
+        if (changed or removed) and not supports_remove(metadata.get('index_built', FLAT)):
+            # Cached embeddings make the full rebuild cheap
+            logger.info(f"{metadata.get('index_built')} index cannot drop chunks, rebuilding vector store")
+            self._rebuild_vector_store(current)
+            return
+        
+        vectorstore = self._open_vectorstore(writable=True)
+        
+        # Drop vectors of files that changed or disappeared
+        stale_ids = [chunk_id
+                     for filename in changed + removed
+                     for chunk_id in manifest[filename].get('chunk_ids', [])]
+        if stale_ids:
+            vectorstore.delete(stale_ids)
+        
+        sparse_index = BM25Index.load(self.sparse_index_path)
+        if sparse_index is None:
+            sparse_index = self._build_sparse_index(vectorstore)
+        sparse_index.remove(stale_ids)
+        
+        files = {name: entry for name, entry in manifest.items()
+                 if name not in changed and name not in removed}
+        
+        # Embed only the new text
+        texts, ids, entries = self._split_files(added + changed, current)
+        if texts:
+            self._add_chunks(vectorstore, texts, ids)
+            sparse_index.add(ids, (doc.page_content for doc in texts))
+        files.update(entries)
+        
+        self._save_vectorstore(vectorstore)
+        sparse_index.save(self.sparse_index_path)
+        
+        self._save_manifest(files)
+        self._save_metadata(sum(len(entry['chunk_ids']) for entry in files.values()), index_info)
+        
+        logger.info(f"Incremental update: +{len(added)} added, ~{len(changed)} changed, "
+                    f"-{len(removed)} removed files ({len(stale_ids)} chunks dropped, "
+                    f"{len(texts)} chunks embedded)")
+    
     def create_vector_store(self, force_rebuild: bool = False) -> None:
         """
-        Create and save vector store from documents.
+        Build a new vector store version and switch to it.
+        
+        The build is written to a new snapshot directory, seeded with the
+        current files so only added, changed or deleted source files are
+        re-chunked and re-embedded. Queries keep using the current snapshot
+        until the new one is complete; the engine then swaps to it in one
+        assignment and publishes it for other workers, and old snapshots
+        are garbage-collected.
         
         Args:
-            force_rebuild: Force rebuild even if not needed
+            force_rebuild: Force a full rebuild even if not needed
         """
-        try:
-            if not force_rebuild and not self._needs_rebuild():
-                logger.info("Vector store is up to date, skipping rebuild")
-                return
-            
+        with self._build_lock:
+            try:
+                if not force_rebuild and not self._needs_rebuild():
+                    logger.info("Vector store is up to date, skipping rebuild")
+                    return
+                
+                # Load documents
+                if not os.path.exists(self.data_dir):
+                    raise FileNotFoundError(f"Data directory not found: {self.data_dir}")
+                
+                # A forced rebuild starts from an empty snapshot, so read the live index settings first
+                index_type, index_params = self._live_index_settings()
+                seed = None if force_rebuild or not self._index_exists() else (self._snapshot.version or "")
+                version = self.snapshots.begin(seed, self._index_dirname)
+                builder = self._for_snapshot(Snapshot(self.snapshots.directory(version) + BUILD_SUFFIX,
+                                                      self._index_dirname, version))
+                builder.index_type, builder.index_params = index_type, index_params
+                try:
+                    builder._build_vector_store(force_rebuild)
+                    self.snapshots.commit(version)
+                except Exception:
+                    self.snapshots.abort(version)
+                    raise
+                
+                with self._switch_lock:
+                    self._activate(version, publish=True)
+                logger.info(f"Vector store saved to {self.vectorstore_path}")
+                
+            except Exception as e:
+                raise RuntimeError(f"Failed to create vector store: {e}")
+    
+    def _live_index_settings(self) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Index type and parameters for the next build.
+        
+        Settings this engine does not configure are kept from the live
+        store: its type, the build parameters it was asked for (quantization,
+        nlist, M, ...) and its query-time tuning (nprobe, rescore_factor, ...).
+        """
+        metadata = self._load_metadata()
+        saved_type = metadata.get('index_type')
+        if saved_type is None or (self.index_type is not None and self.index_type != saved_type):
+            return self.index_type, self.index_params
+        
+        saved_params = metadata.get('index_params', {})
+        inherited = {key: value for key, value in saved_params.items()
+                     if key not in BUILD_PARAMS[saved_type] and key != 'nlist'}
+        inherited.update((key, value) for key, value in metadata.get('index_requested', {}).items()
+                         if value is not None)
+        return saved_type, {**inherited, **self.index_params}
+    
+    def _build_vector_store(self, force_rebuild: bool) -> None:
+        """Update the files of this engine's snapshot in place, incrementally when possible."""
+        current = self._scan_sources()
+        manifest = self._load_manifest()
+        
+        if not force_rebuild and manifest and self._index_exists() and self._build_params_match():
+            logger.info("Updating vector store incrementally...")
+            self._update_vector_store(manifest, current)
+        else:
             logger.info("Building vector store...")
-            
-            # Load documents
-            if not os.path.exists(self.data_dir):
-                raise FileNotFoundError(f"Data directory not found: {self.data_dir}")
-            
-            documents = DocumentLoader.load_documents(self.data_dir)
-            if not documents:
-                raise ValueError(f"No documents found in {self.data_dir}")
-            
-            logger.info(f"Loaded {len(documents)} documents")
-            
-            # Split documents
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap,
-                length_function=len,
-                separators=["\n\n", "\n", " ", ""]
-            )
-            
-            texts = splitter.split_documents(documents)
-            logger.info(f"Created {len(texts)} text chunks")
-            
-            # Create vector store
-            vectorstore = FAISS.from_documents(texts, embedding=self.embeddings)
-            
-            # Save vector store
-            os.makedirs(os.path.dirname(self.vectorstore_path), exist_ok=True)
-            vectorstore.save_local(self.vectorstore_path)
-            
-            # Save metadata
-            self._save_metadata(len(texts))
-            
-            # Clear cached components
-            self.vectorstore = None
-            self._qa_chain = None
-            
-            logger.info(f"Vector store saved to {self.vectorstore_path}")
-            
-        except Exception as e:
-            raise RuntimeError(f"Failed to create vector store: {e}")
+            self._rebuild_vector_store(current)
+    
+    def rebuild_in_background(self, force_rebuild: bool = True) -> bool:
+        """
+        Run create_vector_store on a background thread; queries are served from
+        the current snapshot until the new one is swapped in.
+        
+        Returns:
+            False if a rebuild is already running
+        """
+        def run() -> None:
+            try:
+                self.create_vector_store(force_rebuild=force_rebuild)
+                self._last_rebuild_error = None
+            except Exception as e:
+                logger.error(f"Background rebuild failed: {e}")
+                self._last_rebuild_error = str(e)
+        
+        with self._rebuild_guard:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return False
+            self._rebuild_thread = threading.Thread(target=run, name="vectorstore-rebuild", daemon=True)
+            self._rebuild_thread.start()
+        return True
+    
+    def _new_snapshot(self, version: Optional[str]) -> Snapshot:
+        return Snapshot(self.snapshots.directory(version), self._index_dirname, version)
+    
+    def _for_snapshot(self, snapshot: Snapshot) -> "RAGEngine":
+        """Shallow copy of the engine (sharing models and caches) bound to another snapshot."""
+        engine = copy.copy(self)
+        engine._snapshot = snapshot
+        engine._follow_versions = False
+        return engine
+    
+    def _activate(self, version: str, publish: bool = False) -> None:
+        """
+        Load a committed snapshot and swap it in.
+        
+        Whatever the current snapshot has loaded is loaded from the new one
+        first, so no request pays for the reload. The publishing process
+        then deletes snapshots that fell out of the kept window.
+        """
+        snapshot = self._new_snapshot(version)
+        loader = self._for_snapshot(snapshot)
+        if self._snapshot.qa_chain is not None:
+            loader._load_qa_chain()
+            self._llm = self._llm or loader._llm
+        elif self._snapshot.vectorstore is not None:
+            loader._load_vectorstore()
+        
+        if publish:
+            self.snapshots.publish(version)
+        self._snapshot = snapshot
+        if self.answer_cache:
+            self.answer_cache.clear()
+        logger.info(f"Switched to vector store snapshot {version}")
+        
+        if publish:
+            root = self.snapshots.root
+            self.snapshots.collect_garbage([os.path.join(root, self._index_dirname),
+                                            os.path.join(root, "metadata.json"),
+                                            os.path.join(root, "manifest.json"),
+                                            os.path.join(root, "bm25.json")])
+    
+    def _sync_snapshot(self) -> None:
+        """Switch in the background to a version another worker published (checked every few seconds)."""
+        if not self._follow_versions:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < self.snapshot_check_interval:
+            return
+        self._version_checked_at = now
+        
+        version = self.snapshots.current_version()
+        if version is None or version == self._snapshot.version:
+            return
+        if self._snapshot.vectorstore is None and self._snapshot.qa_chain is None:
+            # Nothing loaded yet, load the new version lazily
+            self._snapshot = self._new_snapshot(version)
+            return
+        if not self._switch_lock.acquire(blocking=False):
+            return
+        
+        def switch() -> None:
+            try:
+                if version != self._snapshot.version:
+                    self._activate(version)
+            except Exception as e:
+                logger.error(f"Failed to switch to vector store snapshot {version}: {e}")
+            finally:
+                self._switch_lock.release()
+        
+        threading.Thread(target=switch, name="snapshot-switch", daemon=True).start()
     
     def _load_vectorstore(self) -> FAISS:
         """Load vector store with caching."""
+        self._sync_snapshot()
         if self.vectorstore is None:
             try:
-                if not os.path.exists(self.vectorstore_path + ".faiss"):
+                if not self._index_exists():
                     logger.info("Vector store not found, creating new one...")
                     self.create_vector_store()
                 
-                self.vectorstore = FAISS.load_local(
-                    self.vectorstore_path,
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
+                self.vectorstore = self._open_vectorstore()
+                # Query-time overrides (nprobe, ef_search); the saved values live in the index file
+                set_search_params(self.vectorstore.index,
+                                  self._load_metadata().get('index_built', FLAT), self.index_params)
                 logger.info("Vector store loaded successfully")
                 
             except Exception as e:
@@ -212,6 +801,88 @@ class RAGEngine:
         
         return self.vectorstore
     
+    def _open_vectorstore(self, writable: bool = False) -> FAISS:
+        """
+        Open the saved index and chunk store.
+        
+        Args:
+            writable: Read everything into memory with a mutable id mapping so
+                chunks can be added and deleted (ignores the mmap load mode)
+        """
+        mmap = self.load_mode == "mmap" and not writable
+        metadata = self._load_metadata()
+        index_built, params = metadata.get('index_built', FLAT), metadata.get('index_params', {})
+        index = faiss.read_index(os.path.join(self.vectorstore_path, "index.faiss"),
+                                 mmap_flags(index_built) if mmap else 0)
+        docstore = ChunkStore(self.vectorstore_path, mmap=mmap)
+        index_to_docstore_id = docstore.index_to_docstore_id
+        if writable:
+            index_to_docstore_id = dict(index_to_docstore_id)
+        
+        # Exact vectors stay on disk; re-scoring only pages in the candidate rows
+        vectors_path = self._exact_vectors_path
+        exact_vectors = None
+        if is_lossy(index_built, params) and os.path.exists(vectors_path):
+            exact_vectors = np.load(vectors_path, mmap_mode='r')
+        
+        logger.info(f"Opened {index_built} index with {len(docstore)} chunks ({'mmap' if mmap else 'memory'})")
+        return RescoringFAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+            exact_vectors=exact_vectors,
+            rescore_factor=self.index_params.get('rescore_factor') or params.get('rescore_factor', 4)
+        )
+    
+    @staticmethod
+    def _build_sparse_index(vectorstore: FAISS) -> BM25Index:
+        """Index every chunk of a vector store (for indexes saved without bm25.json)."""
+        sparse_index = BM25Index()
+        chunk_ids = list(vectorstore.index_to_docstore_id.values())
+        sparse_index.add(chunk_ids, (vectorstore.docstore.search(chunk_id).page_content
+                                     for chunk_id in chunk_ids))
+        return sparse_index
+    
+    def _load_sparse_index(self, vectorstore: FAISS) -> BM25Index:
+        """Load the BM25 index with caching, rebuilding it from the vector store if missing."""
+        if self.sparse_index is None:
+            sparse_index = BM25Index.load(self.sparse_index_path)
+            if sparse_index is None or len(sparse_index) != len(vectorstore.index_to_docstore_id):
+                logger.info("Sparse index missing or stale, rebuilding from vector store")
+                sparse_index = self._build_sparse_index(vectorstore)
+                sparse_index.save(self.sparse_index_path)
+            self.sparse_index = sparse_index
+            logger.info("Sparse index loaded successfully")
+        
+        return self.sparse_index
+    
+    def _load_attribute_index(self, vectorstore: FAISS) -> AttributeIndex:
+        """Load the listing attribute index with caching, rebuilding it from the chunk store if missing."""
+        if self.attribute_index is None:
+            attribute_index = AttributeIndex.load(self._attribute_index_path)
+            if attribute_index is None or len(attribute_index) != vectorstore.index.ntotal:
+                logger.info("Attribute index missing or stale, rebuilding from chunk store")
+                attribute_index = AttributeIndex.from_metadatas([
+                    vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]).metadata
+                    for i in range(vectorstore.index.ntotal)
+                ])
+                attribute_index.save(self._attribute_index_path)
+            self.attribute_index = attribute_index
+            logger.info("Attribute index loaded successfully")
+        
+        return self.attribute_index
+    
+    def _answer_cache_scope(self, query: str, language: Optional[str]) -> str:
+        """
+        Answer cache scope of a query: its language plus the listing filters
+        parsed from it, so "homestay dưới 500k" and "homestay dưới 800k"
+        never share an answer.
+        """
+        if not self.attribute_filtering:
+            return cache_scope(language)
+        return cache_scope(language, self._load_attribute_index(self._load_vectorstore()).parse_filters(query))
+    
     def _create_custom_prompt(self) -> PromptTemplate:
         """Create custom prompt template for tourism Q&A."""
         template = """
@@ -251,12 +922,24 @@ class RAGEngine:
     
     def _load_qa_chain(self) -> RetrievalQA:
         """Load QA chain with caching and custom prompt."""
+        self._sync_snapshot()
         if self._qa_chain is None:
             try:
                 vectorstore = self._load_vectorstore()
-                retriever = vectorstore.as_retriever(
-                    search_kwargs={"k": 5}  # Return top 5 relevant chunks
-                )
+                if self.hybrid_search or self.attribute_filtering:
+                    # Dense and BM25 candidates fused by reciprocal rank, top 5 kept; listing
+                    # filters parsed from the query restrict both searches up front
+                    retriever = HybridRetriever(
+                        vectorstore=vectorstore,
+                        sparse_index=self._load_sparse_index(vectorstore) if self.hybrid_search else None,
+                        attribute_index=(self._load_attribute_index(vectorstore)
+                                         if self.attribute_filtering else None),
+                        k=5
+                    )
+                else:
+                    retriever = vectorstore.as_retriever(
+                        search_kwargs={"k": 5}  # Return top 5 relevant chunks
+                    )
                 
                 llm = self._get_llm()
                 custom_prompt = self._create_custom_prompt()
@@ -276,13 +959,38 @@ class RAGEngine:
         
         return self._qa_chain
     
-    def ask_question(self, query: str, return_sources: bool = False) -> str:
+    @staticmethod
+    def _format_sources(documents: List[Document]) -> List[Dict[str, Any]]:
+        """Format retrieved documents as source dicts."""
+        return [{
+            "content": doc.page_content[:200] + "...",
+            "source": doc.metadata.get("source_file", "Unknown"),
+            "page": doc.metadata.get("page", "N/A")
+        } for doc in documents]
+    
+    def _format_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a QA chain output into the answer with formatted sources."""
+        return {
+            "answer": result.get("result", ""),
+            "sources": self._format_sources(result.get("source_documents", []))
+        }
+    
+    def _run_qa_chain(self, query: str) -> Dict[str, Any]:
+        """Run the QA chain and return the answer with formatted sources."""
+        chain = self._load_qa_chain()
+        return self._format_result(chain({"query": query}))
+    
+    def ask_question(self, query: str, return_sources: bool = False, language: Optional[str] = None) -> str:
         """
         Ask a question and get response from RAG system.
         
+        Near-duplicate questions in the same language are answered from the
+        semantic answer cache without calling the LLM.
+        
         Args:
             query: User question
             return_sources: Whether to include source information
+            language: Language of the question, scopes the answer cache
             
         Returns:
             Answer string or dict with sources if return_sources=True
@@ -291,31 +999,160 @@ class RAGEngine:
             return "Vui lòng cung cấp câu hỏi hợp lệ."
         
         try:
-            chain = self._load_qa_chain()
-            result = chain({"query": query})
+            result = None
+            if self.answer_cache:
+                # Served from the query embedding cache when the chain embeds it again
+                query_vector = self.embeddings.embed_query(query)
+                scope = self._answer_cache_scope(query, language)
+                result = self.answer_cache.get(query_vector, scope)
             
-            answer = result.get("result", "")
+            if result is None:
+                result = self._run_qa_chain(query)
+                if self.answer_cache:
+                    self.answer_cache.put(query_vector, scope, result)
             
             if return_sources:
-                sources = []
-                for doc in result.get("source_documents", []):
-                    sources.append({
-                        "content": doc.page_content[:200] + "...",
-                        "source": doc.metadata.get("source_file", "Unknown"),
-                        "page": doc.metadata.get("page", "N/A")
-                    })
-                
-                return {
-                    "answer": answer,
-                    "sources": sources
-                }
+                return dict(result)
             
-            return answer
+            return result["answer"]
             
         except Exception as e:
             logger.error(f"Error processing question: {e}")
             return f"Xin lỗi, đã xảy ra lỗi khi xử lý câu hỏi của bạn: {str(e)}"
     
+    async def aask_question(self, query: str, return_sources: bool = False, language: Optional[str] = None) -> str:
+        """
+        Async version of ask_question for the ASGI app.
+        
+        CPU-bound embedding and chain loading run in worker threads while
+        the retrieval and LLM call are awaited, so the event loop stays free.
+        """
+        if not query.strip():
+            return "Vui lòng cung cấp câu hỏi hợp lệ."
+        
+        try:
+            result = None
+            if self.answer_cache:
+                query_vector = await asyncio.to_thread(self.embeddings.embed_query, query)
+                scope = await asyncio.to_thread(self._answer_cache_scope, query, language)
+                result = self.answer_cache.get(query_vector, scope)
+            
+            if result is None:
+                chain = await asyncio.to_thread(self._load_qa_chain)
+                result = self._format_result(await chain.ainvoke({"query": query}))
+                if self.answer_cache:
+                    self.answer_cache.put(query_vector, scope, result)
+            
+            if return_sources:
+                return dict(result)
+            
+            return result["answer"]
+            
+        except Exception as e:
+            logger.error(f"Error processing question: {e}")
+            return f"Xin lỗi, đã xảy ra lỗi khi xử lý câu hỏi của bạn: {str(e)}"
+    
+    def stream_question(self, query: str, language: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Answer a question incrementally.
+        
+        Retrieval runs first so sources can be sent before the LLM starts,
+        then tokens are yielded as ChatGroq streams them.
+        
+        Args:
+            query: User question
+            language: Language of the question, scopes the answer cache
+            
+        Yields:
+            ("sources", list), then ("token", str) per chunk, then
+            ("done", {"answer", "sources"}) with the full answer
+        """
+        if not query.strip():
+            answer = "Vui lòng cung cấp câu hỏi hợp lệ."
+            yield "token", answer
+            yield "done", {"answer": answer, "sources": []}
+            return
+        
+        result = None
+        if self.answer_cache:
+            query_vector = self.embeddings.embed_query(query)
+            scope = self._answer_cache_scope(query, language)
+            result = self.answer_cache.get(query_vector, scope)
+        
+        if result is not None:
+            yield "sources", result["sources"]
+            yield "token", result["answer"]
+            yield "done", dict(result)
+            return
+        
+        documents = self._load_qa_chain().retriever.invoke(query)
+        sources = self._format_sources(documents)
+        yield "sources", sources
+        
+        prompt = self._create_custom_prompt().format(
+            context="\n\n".join(doc.page_content for doc in documents),
+            question=query
+        )
+        
+        parts = []
+        for chunk in self._get_llm().stream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield "token", chunk.content
+        
+        result = {"answer": "".join(parts), "sources": sources}
+        if self.answer_cache:
+            self.answer_cache.put(query_vector, scope, result)
+        
+        yield "done", result
+    
+    async def astream_question(self, query: str, language: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Async version of stream_question for the ASGI app and the voice pipeline.
+        
+        Embedding and retrieval run in worker threads; tokens are yielded as
+        ChatGroq streams them. Yields the same events as stream_question.
+        """
+        if not query.strip():
+            answer = "Vui lòng cung cấp câu hỏi hợp lệ."
+            yield "token", answer
+            yield "done", {"answer": answer, "sources": []}
+            return
+        
+        result = None
+        if self.answer_cache:
+            query_vector = await asyncio.to_thread(self.embeddings.embed_query, query)
+            scope = await asyncio.to_thread(self._answer_cache_scope, query, language)
+            result = self.answer_cache.get(query_vector, scope)
+        
+        if result is not None:
+            yield "sources", result["sources"]
+            yield "token", result["answer"]
+            yield "done", dict(result)
+            return
+        
+        chain = await asyncio.to_thread(self._load_qa_chain)
+        documents = await asyncio.to_thread(chain.retriever.invoke, query)
+        sources = self._format_sources(documents)
+        yield "sources", sources
+        
+        prompt = self._create_custom_prompt().format(
+            context="\n\n".join(doc.page_content for doc in documents),
+            question=query
+        )
+        
+        parts = []
+        async for chunk in self._get_llm().astream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield "token", chunk.content
+        
+        result = {"answer": "".join(parts), "sources": sources}
+        if self.answer_cache:
+            self.answer_cache.put(query_vector, scope, result)
+        
+        yield "done", result
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the RAG system."""
         try:
@@ -326,10 +1163,31 @@ class RAGEngine:
                 "llm_model": self.llm_model
             }
             
-            if os.path.exists(self.metadata_path):
-                with open(self.metadata_path, 'r') as f:
-                    metadata = json.load(f)
-                stats.update(metadata)
+            stats.update(self._load_metadata())
+            
+            if isinstance(self.embeddings, CachedEmbeddings) and self.embeddings.cache:
+                stats.update(self.embeddings.cache.stats())
+            
+            if self.query_cache:
+                stats.update(self.query_cache.stats())
+            
+            if self.answer_cache:
+                stats.update(self.answer_cache.stats())
+            
+            if self.sparse_index:
+                stats.update(self.sparse_index.stats())
+            
+            if self.attribute_index:
+                stats.update(self.attribute_index.stats())
+            
+            if self.vectorstore is not None:
+                stats.update(self.vectorstore.docstore.stats())
+            
+            stats["load_mode"] = self.load_mode
+            stats["snapshot_version"] = self._snapshot.version
+            stats["rebuild_running"] = self._rebuild_thread is not None and self._rebuild_thread.is_alive()
+            if self._last_rebuild_error:
+                stats["last_rebuild_error"] = self._last_rebuild_error
             
             return stats
         except Exception as e:
@@ -343,12 +1201,19 @@ def get_rag_engine() -> RAGEngine:
     """Get singleton RAG engine instance."""
     global _rag_engine
     if _rag_engine is None:
-        _rag_engine = RAGEngine()
+        # RAG_INDEX_PARAMS is JSON, e.g. '{"nprobe": 32}' or '{"ef_search": 128}'
+        _rag_engine = RAGEngine(
+            index_type=os.getenv("RAG_INDEX_TYPE") or None,
+            index_params=json.loads(os.getenv("RAG_INDEX_PARAMS") or "{}"),
+            embedding_cache_dtype=os.getenv("RAG_EMBEDDING_CACHE_DTYPE", "float32"),
+            load_mode=os.getenv("RAG_LOAD_MODE", "memory"),
+            snapshots_keep=int(os.getenv("RAG_SNAPSHOTS_KEEP", "2"))
+        )
     return _rag_engine
 
 # Backward compatibility functions
 def create_vector_store():
     return get_rag_engine().create_vector_store()
 
-def ask_question(query: str) -> str:
-    return get_rag_engine().ask_question(query)
\ No newline at end of file
+def ask_question(query: str, language: Optional[str] = None) -> str:
+    return get_rag_engine().ask_question(query, language=language)
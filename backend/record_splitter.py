@@ -0,0 +1,204 @@
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain_text_splitters import TextSplitter
+
+SECTION_PATTERN = re.compile(r'^\[(?P<section>[^\]]+)\]$')
+FIELD_PATTERN = re.compile(r'^(?P<label>[^:]{1,30}):\s*(?P<value>.*)$')
+
+# Listing labels and the metadata key each one is stored under
+FIELDS = {
+    'Tên': 'name',
+    'Địa chỉ': 'address',
+    'Loại': 'type',
+    'Giá phòng': 'price',
+    'Tiện nghi': 'amenities',
+    'Gần địa điểm': 'nearby'
+}
+LIST_FIELDS = ('amenities', 'nearby')
+
+# Administrative prefixes stripped from address parts ("huyện Cô Tô" -> "Cô Tô")
+ADMIN_PREFIXES = ('thành phố', 'thị xã', 'thị trấn', 'huyện', 'phường', 'xã', 'đảo', 'tp.')
+# Address parts that are a street or house number rather than a locality
+STREET_PREFIXES = ('số', 'đường', 'ngõ', 'phố', 'ngách', 'hẻm')
+PROVINCE = 'quảng ninh'
+
+# "2.500.000", "500k", "1,5 triệu", "800 nghìn"
+AMOUNT_PATTERN = re.compile(
+    r'(?P<number>\d+(?:[.,]\d{3})+|\d+(?:[.,]\d+)?)'
+    r'\s*(?P<unit>triệu|trieu|tr|million|mil|nghìn|ngàn|ngan|nghin|k)?(?:(?<=tr)(?P<fraction>\d+))?(?!\w)',
+    re.IGNORECASE
+)
+UNITS = {'k': 1_000, 'nghìn': 1_000, 'ngàn': 1_000, 'nghin': 1_000, 'ngan': 1_000, 'tr': 1_000_000,
+         'triệu': 1_000_000, 'trieu': 1_000_000, 'million': 1_000_000, 'mil': 1_000_000}
+
+# Share of non-blank lines that must be headers or listing fields for a document to be split by record
+LISTING_LINE_RATIO = 0.8
+
+
+def parse_amounts(text: str) -> List[int]:
+    """
+    Parse VND amounts from text.
+
+    Dots or commas between groups of three digits are thousand separators;
+    "k"/"nghìn"/"ngàn" and "tr"/"triệu"/"million" multiply by 1,000 and
+    1,000,000; digits after "tr" are decimals ("1tr5" is 1,500,000).
+
+    Returns:
+        Amounts in VND, in order of appearance
+    """
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(unicodedata.normalize('NFC', text)):
+        number, unit = match.group('number'), (match.group('unit') or '').lower()
+        if re.fullmatch(r'\d+(?:[.,]\d{3})+', number):
+            value = float(re.sub(r'[.,]', '', number))
+        else:
+            value = float(number.replace(',', '.'))
+        if match.group('fraction'):
+            value += float(f"0.{match.group('fraction')}")
+        amounts.append(int(round(value * UNITS.get(unit, 1))))
+    return amounts
+
+
+def parse_price_range(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parse "500.000 - 800.000 VNĐ/đêm" into (500000, 800000); a single price gives (p, p)."""
+    amounts = parse_amounts(text)
+    if not amounts:
+        return None, None
+    return min(amounts), max(amounts)
+
+
+def _strip_prefix(part: str, prefixes: Tuple[str, ...]) -> Tuple[str, bool]:
+    lowered = part.lower()
+    for prefix in prefixes:
+        if lowered.startswith(prefix + ' ') or (prefix.endswith('.') and lowered.startswith(prefix)):
+            return part[len(prefix):].strip(), True
+    return part, False
+
+
+def parse_address(address: str) -> Dict[str, str]:
+    """
+    Derive the area (district or city) and locality (ward, town or island) from an address.
+
+    "Số 1, đường Hạ Long, Bãi Cháy, Hạ Long, Quảng Ninh" gives
+    {"area": "Hạ Long", "locality": "Bãi Cháy"}.
+    """
+    parts = [part.strip() for part in address.split(',') if part.strip()]
+    if parts and parts[-1].lower() == PROVINCE:
+        parts = parts[:-1]
+    if not parts:
+        return {}
+
+    result = {'area': _strip_prefix(parts[-1], ADMIN_PREFIXES)[0]}
+    if len(parts) > 1 and not _strip_prefix(parts[-2], STREET_PREFIXES)[1]:
+        result['locality'] = _strip_prefix(parts[-2], ADMIN_PREFIXES)[0]
+    return result
+
+
+def _parse_fields(lines: List[str]) -> Dict[str, str]:
+    """Parse "Label: value" lines; unlabeled lines continue the previous field."""
+    fields: Dict[str, str] = {}
+    label = None
+    for line in lines:
+        match = FIELD_PATTERN.match(line)
+        if match and match.group('label').strip() in FIELDS:
+            label = match.group('label').strip()
+            fields[label] = match.group('value').strip()
+        elif label is not None:
+            fields[label] = f"{fields[label]} {line}".strip()
+    return fields
+
+
+def record_metadata(section: Optional[str], fields: Dict[str, str]) -> Dict[str, Any]:
+    """Structured metadata of a listing: section, fields, price range, area and locality."""
+    metadata: Dict[str, Any] = {'section': section} if section else {}
+    for label, value in fields.items():
+        key = FIELDS[label]
+        if key in LIST_FIELDS:
+            metadata[key] = [item.strip() for item in value.split(',') if item.strip()]
+        else:
+            metadata[key] = value
+
+    if 'price' in metadata:
+        price_min, price_max = parse_price_range(metadata['price'])
+        if price_min is not None:
+            metadata['price_min'], metadata['price_max'] = price_min, price_max
+    if 'address' in metadata:
+        metadata.update(parse_address(metadata['address']))
+    return metadata
+
+
+class RecordSplitter:
+    """
+    Splits listing files (``[Section]`` headers followed by blank-line separated
+    ``Tên:/Địa chỉ:/Giá phòng:`` records, like hotels.txt) into one chunk per listing.
+
+    Each chunk is the record prefixed by its section header, and carries the
+    section and parsed fields as metadata (type, price_min/price_max in VND,
+    area, locality, nearby places, amenities). Documents that are not
+    listings, and free-text blocks inside listing files, go through the
+    fallback splitter.
+    """
+
+    def __init__(self, fallback: TextSplitter):
+        """
+        Args:
+            fallback: Splitter for documents and blocks that are not listings
+        """
+        self.fallback = fallback
+
+    @staticmethod
+    def is_listing(text: str) -> bool:
+        """Whether a text is mostly section headers and listing fields with at least one name."""
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if not lines:
+            return False
+        structured = 0
+        has_name = False
+        for line in lines:
+            match = FIELD_PATTERN.match(line)
+            if match and match.group('label').strip() in FIELDS:
+                structured += 1
+                has_name = has_name or match.group('label').strip() == 'Tên'
+            elif SECTION_PATTERN.match(line):
+                structured += 1
+        return has_name and structured / len(lines) >= LISTING_LINE_RATIO
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split documents into listing chunks, falling back for other text."""
+        chunks = []
+        for document in documents:
+            text = unicodedata.normalize('NFC', document.page_content)
+            if self.is_listing(text):
+                chunks.extend(self._split_listing(text, document.metadata))
+            else:
+                chunks.extend(self.fallback.split_documents([document]))
+        return chunks
+
+    def _split_listing(self, text: str, metadata: Dict[str, Any]) -> List[Document]:
+        chunks = []
+        section = None
+        for block in re.split(r'\n\s*\n', text):
+            lines = [line.strip() for line in block.splitlines() if line.strip()]
+            # A header opens a section for the records that follow it
+            while lines and SECTION_PATTERN.match(lines[0]):
+                section = SECTION_PATTERN.match(lines[0]).group('section').strip()
+                lines = lines[1:]
+            if not lines:
+                continue
+
+            fields = _parse_fields(lines)
+            if 'Tên' not in fields:
+                chunks.extend(self.fallback.split_documents([Document(page_content="\n".join(lines),
+                                                                      metadata=dict(metadata))]))
+                continue
+
+            header = f"[{section}]\n" if section else ""
+            chunks.append(Document(
+                page_content=header + "\n".join(lines),
+                metadata={**metadata, **record_metadata(section, fields)}
+            ))
+
+        return chunks
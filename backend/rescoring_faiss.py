@@ -0,0 +1,63 @@
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from ann_index import filtered_search, rescore
+
+
+class RescoringFAISS(FAISS):
+    """
+    FAISS vector store over a lossy index (scalar-quantized or PQ) with exact re-scoring.
+
+    A search fetches ``rescore_factor * k`` candidates from the compact
+    index, then re-ranks them by exact L2 distance to full-precision
+    vectors kept outside the index (a read-only memmap of ``vectors.npy``,
+    so only candidate rows are paged in). Documents are only built for the
+    final k hits.
+
+    Searches can be restricted to index positions with a ``positions``
+    keyword (see AttributeIndex); this also works on exact indexes.
+    """
+
+    def __init__(self, *args, exact_vectors: Optional[np.ndarray] = None, rescore_factor: int = 4, **kwargs):
+        """
+        Args:
+            exact_vectors: (n, d) float32 vectors in index order (None searches without re-scoring)
+            rescore_factor: Candidates fetched per requested result
+        """
+        super().__init__(*args, **kwargs)
+        self.exact_vectors = exact_vectors
+        self.rescore_factor = rescore_factor
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[Callable, dict]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        allowed = kwargs.get("positions")
+        if filter is not None or (allowed is None and self.exact_vectors is None):
+            return super().similarity_search_with_score_by_vector(embedding, k, filter, fetch_k, **kwargs)
+
+        query = np.asarray(embedding, dtype=np.float32)
+        if allowed is not None:
+            positions, distances = filtered_search(self.index, query, k, allowed, self.exact_vectors,
+                                                   self.rescore_factor)
+        else:
+            _, candidates = self.index.search(query[None, :], k * self.rescore_factor)
+            positions, distances = rescore(query, candidates[0], self.exact_vectors, k)
+
+        score_threshold = kwargs.get("score_threshold")
+        results = []
+        for position, distance in zip(positions, distances):
+            if score_threshold is not None and distance > score_threshold:
+                continue
+            doc = self.docstore.search(self.index_to_docstore_id[int(position)])
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for position {position}, got {doc}")
+            results.append((doc, float(distance)))
+        return results
@@ -0,0 +1,175 @@
+import os
+import shutil
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_DIR = "snapshots"
+VERSION_FILE = "CURRENT"
+BUILD_SUFFIX = ".tmp"
+
+# Files of a snapshot directory that are only ever replaced by rename, so a
+# new snapshot can share them with the old one through hard links
+REPLACED_BY_RENAME = (".faiss", ".npy", ".npz", ".bin", ".json")
+
+
+class Snapshot:
+    """
+    Paths and loaded components of one vector store version.
+
+    RAGEngine keeps its active snapshot in a single attribute, so switching
+    to a new version replaces the index, chunk store, sparse and attribute
+    indexes and the QA chain in one reference assignment.
+    """
+
+    def __init__(self, directory: str, index_dirname: str, version: Optional[str] = None):
+        self.version = version
+        self.directory = directory
+        self.vectorstore_path = os.path.join(directory, index_dirname)
+
+        # Metadata file for tracking updates
+        self.metadata_path = os.path.join(directory, "metadata.json")
+
+        # Per-file content hashes and chunk ids for incremental re-indexing
+        self.manifest_path = os.path.join(directory, "manifest.json")
+
+        # BM25 keyword index over the same chunk ids as the FAISS index
+        self.sparse_index_path = os.path.join(directory, "bm25.json")
+
+        self.vectorstore = None
+        self.sparse_index = None
+        self.attribute_index = None
+        self.qa_chain = None
+
+
+class SnapshotStore:
+    """
+    Versioned vector store directories under a root, published through a version file.
+
+    Builds write to ``snapshots/<version>.tmp`` and are renamed to
+    ``snapshots/<version>`` when complete; ``CURRENT`` (replaced atomically)
+    names the live version, so every worker sharing the root can pick it
+    up. Stores built before versioning live directly in the root and stay
+    in use until the first snapshot is published.
+    """
+
+    def __init__(self, root: str, keep: int = 2):
+        """
+        Args:
+            root: Vector store root (parent of the index directory)
+            keep: Published snapshots kept on disk, newest first; older ones
+                (and a pre-versioning store) are deleted after a publish
+        """
+        self.root = root
+        self.keep = max(1, keep)
+        self.snapshots_dir = os.path.join(root, SNAPSHOTS_DIR)
+        self.version_file = os.path.join(root, VERSION_FILE)
+
+    def current_version(self) -> Optional[str]:
+        """Version named by the version file (None for a store that predates versioning)."""
+        try:
+            with open(self.version_file, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def directory(self, version: Optional[str]) -> str:
+        """Directory of a version (the root itself for None)."""
+        return os.path.join(self.snapshots_dir, version) if version else self.root
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first."""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(name for name in os.listdir(self.snapshots_dir)
+                      if not name.endswith(BUILD_SUFFIX) and os.path.isdir(os.path.join(self.snapshots_dir, name)))
+
+    def begin(self, seed_version: Optional[str] = None, index_dirname: Optional[str] = None) -> str:
+        """
+        Create the build directory of a new version.
+
+        Args:
+            seed_version: Copy this version's files in, so the build can update
+                them incrementally (None starts empty; "" seeds from the root
+                store that predates versioning)
+            index_dirname: Name of the index directory inside a snapshot
+
+        Returns:
+            New version name (its build directory is ``directory(version) + ".tmp"``)
+        """
+        version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        build_dir = self.directory(version) + BUILD_SUFFIX
+        os.makedirs(build_dir)
+
+        if seed_version is not None:
+            source = self.directory(seed_version or None)
+            names = ["metadata.json", "manifest.json", "bm25.json"]
+            if index_dirname:
+                names.append(index_dirname)
+            for name in names:
+                path = os.path.join(source, name)
+                if os.path.isdir(path):
+                    shutil.copytree(path, os.path.join(build_dir, name), copy_function=self._link_or_copy,
+                                    ignore=shutil.ignore_patterns(f"*{BUILD_SUFFIX}"))
+                elif os.path.exists(path):
+                    shutil.copy2(path, os.path.join(build_dir, name))
+        return version
+
+    @staticmethod
+    def _link_or_copy(source: str, destination: str) -> None:
+        # Index files are replaced by rename, never rewritten in place, so sharing inodes is safe
+        if source.endswith(REPLACED_BY_RENAME):
+            try:
+                os.link(source, destination)
+                return
+            except OSError:
+                pass
+        shutil.copy2(source, destination)
+
+    def abort(self, version: str) -> None:
+        """Delete the build directory of a version that failed."""
+        shutil.rmtree(self.directory(version) + BUILD_SUFFIX, ignore_errors=True)
+
+    def commit(self, version: str) -> str:
+        """Move a finished build into place (not yet published). Returns its directory."""
+        directory = self.directory(version)
+        os.rename(directory + BUILD_SUFFIX, directory)
+        return directory
+
+    def publish(self, version: str) -> None:
+        """Point the version file at a committed version (atomic rename)."""
+        tmp_path = f"{self.version_file}{BUILD_SUFFIX}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, self.version_file)
+        logger.info(f"Published vector store snapshot {version}")
+
+    def collect_garbage(self, legacy_paths: List[str]) -> None:
+        """
+        Delete snapshots beyond the newest ``keep``, and the pre-versioning store once superseded.
+
+        Processes still serving a deleted snapshot keep working from memory
+        (or from mapped files, which stay valid until unmapped) and switch
+        on their next version check.
+
+        Args:
+            legacy_paths: Files and directories of the pre-versioning store in the root
+        """
+        current = self.current_version()
+        versions = self.versions()
+        retired = [version for version in versions[:-self.keep] if version != current]
+        for version in retired:
+            shutil.rmtree(self.directory(version), ignore_errors=True)
+            logger.info(f"Deleted vector store snapshot {version}")
+
+        # The root store counts as the oldest snapshot
+        if current is not None and len(versions) >= self.keep:
+            for path in legacy_paths:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,158 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+import unicodedata
+from collections import Counter
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def fold_diacritics(text: str) -> str:
+    """Lower-case text and strip Vietnamese diacritics ("Hạ Long" -> "ha long")."""
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace("đ", "d")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into diacritic-folded syllables plus adjacent syllable pairs.
+
+    Vietnamese words are mostly two syllables ("khách sạn", "Bãi Cháy"), so
+    the pairs let an exact name outrank documents that only share one of
+    its syllables.
+    """
+    syllables = _WORD_RE.findall(fold_diacritics(text))
+    return syllables + [f"{a}_{b}" for a, b in zip(syllables, syllables[1:])]
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over chunk texts, keyed by the chunk ids of the FAISS index.
+
+    Each chunk keeps its own term counts, so chunks can be added and removed
+    one by one when source files change; postings and document frequencies
+    are derived from them. The index is saved as JSON next to the vector store.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _add_one(self, chunk_id: str, terms: Dict[str, int]) -> None:
+        self._docs[chunk_id] = terms
+        length = sum(terms.values())
+        self._lengths[chunk_id] = length
+        self._total_length += length
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+
+    def _remove_one(self, chunk_id: str) -> None:
+        terms = self._docs.pop(chunk_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(chunk_id)
+        for term in terms:
+            posting = self._postings[term]
+            posting.pop(chunk_id, None)
+            if not posting:
+                del self._postings[term]
+
+    def add(self, chunk_ids: Iterable[str], texts: Iterable[str]) -> None:
+        """Index texts under their chunk ids (an existing id is replaced)."""
+        with self._lock:
+            for chunk_id, text in zip(chunk_ids, texts):
+                self._remove_one(chunk_id)
+                self._add_one(chunk_id, dict(Counter(tokenize(text))))
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """Drop chunks from the index; unknown ids are ignored."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove_one(chunk_id)
+
+    def search(self, query: str, k: int = 20, ids: Optional[Container[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against a query.
+
+        Args:
+            query: Query text
+            k: Number of results
+            ids: Only rank these chunk ids (None ranks every chunk)
+
+        Returns:
+            Up to k (chunk id, BM25 score) pairs, best first
+        """
+        with self._lock:
+            if not self._docs:
+                return []
+            n_docs = len(self._docs)
+            avg_length = self._total_length / n_docs
+            scores: Dict[str, float] = {}
+
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    if ids is not None and chunk_id not in ids:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path: str) -> None:
+        """Write the index atomically as JSON."""
+        with self._lock:
+            data = {'k1': self.k1, 'b': self.b, 'docs': self._docs}
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """Read an index saved by ``save``; None if it is missing or unreadable."""
+        try:
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            index = cls(k1=data.get('k1', 1.5), b=data.get('b', 0.75))
+            for chunk_id, terms in data.get('docs', {}).items():
+                index._add_one(chunk_id, terms)
+            return index
+        except Exception as e:
+            logger.warning(f"Failed to read sparse index {path}: {e}")
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        """Index size counters."""
+        return {
+            'sparse_index_chunks': len(self._docs),
+            'sparse_index_terms': len(self._postings)
+        }
@@ -0,0 +1,187 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_KEY_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (Unicode NFC, collapsed whitespace)."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech keyed by (voice, normalized text).
+
+    Two tiers: an in-memory LRU of recent clips and an on-disk store of MP3
+    files (``<sha256>.mp3``) capped in total size. Disk recency is tracked
+    through file mtimes, so the least recently used clips are evicted first
+    and the order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str, max_memory_items: int = 256, max_disk_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory of the on-disk tier
+            max_memory_items: Clips kept in the in-memory LRU
+            max_disk_bytes: Size cap of the on-disk tier (0 disables it)
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.max_disk_bytes > 0:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_bytes = sum(os.path.getsize(path) for path in self._disk_files())
+
+    @staticmethod
+    def key(voice: str, text: str) -> str:
+        """Cache key of a text spoken with a voice."""
+        return hashlib.sha256(f"{voice}\n{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_key(key: str) -> bool:
+        """Whether a string has the form of a cache key (also safe as a file name)."""
+        return _KEY_RE.fullmatch(key) is not None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".mp3")
+
+    def _disk_files(self):
+        return [entry.path for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith(".mp3")]
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def contains(self, voice: str, text: str) -> bool:
+        """Check for a cached clip without touching recency or counters."""
+        key = self.key(voice, text)
+        with self._lock:
+            return key in self._memory or (self.max_disk_bytes > 0 and os.path.exists(self._path(key)))
+
+    def get(self, voice: str, text: str) -> Optional[bytes]:
+        """Return cached MP3 bytes, or None on a miss."""
+        return self.get_by_key(self.key(voice, text))
+
+    def get_by_key(self, key: str) -> Optional[bytes]:
+        """Return cached MP3 bytes for a key from :meth:`key`, or None on a miss."""
+        if not self.is_key(key):
+            return None
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+            if self.max_disk_bytes > 0:
+                path = self._path(key)
+                try:
+                    with open(path, 'rb') as f:
+                        audio = f.read()
+                    os.utime(path)  # Mark as recently used
+                except OSError:
+                    audio = None
+                if audio:
+                    self._remember(key, audio)
+                    self.disk_hits += 1
+                    return audio
+
+            self.misses += 1
+            return None
+
+    def put(self, voice: str, text: str, audio: bytes) -> None:
+        """Store MP3 bytes in both tiers, evicting least recently used clips."""
+        if not audio:
+            return
+        key = self.key(voice, text)
+        with self._lock:
+            self._remember(key, audio)
+            if self.max_disk_bytes <= 0 or len(audio) > self.max_disk_bytes:
+                return
+
+            path = self._path(key)
+            try:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(audio)
+                os.replace(tmp_path, path)
+                self._disk_bytes += len(audio) - previous
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict()
+            except OSError as e:
+                logger.warning(f"Failed to write TTS cache entry: {e}")
+
+    def _evict(self) -> None:
+        """Delete the least recently used files until the disk tier fits its cap."""
+        files = []
+        for path in self._disk_files():
+            try:
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+        files.sort()
+
+        self._disk_bytes = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in files:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                self._disk_bytes -= size
+                removed += 1
+            except OSError:
+                continue
+        logger.info(f"Evicted {removed} clips from TTS cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_items': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+
+_tts_cache = None
+
+def get_tts_cache() -> TTSCache:
+    """Get the shared TTS cache (configured through TTS_CACHE_* environment variables)."""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = TTSCache(
+            cache_dir=os.getenv("TTS_CACHE_DIR", "tts_cache"),
+            max_memory_items=int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "256")),
+            max_disk_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024)
+        )
+    return _tts_cache
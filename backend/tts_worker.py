@@ -0,0 +1,87 @@
+import io
+import os
+import asyncio
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Optional
+
+import edge_tts
+
+from async_runtime import BackgroundLoop
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def synthesize_mp3(text: str, voice: str) -> bytes:
+    """
+    Synthesize speech with Edge TTS, collecting the MP3 chunks in memory.
+
+    Args:
+        text: Text to speak
+        voice: Edge TTS voice name
+
+    Returns:
+        MP3 bytes
+    """
+    buffer = io.BytesIO()
+    communicate = edge_tts.Communicate(text, voice)
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            buffer.write(chunk["data"])
+    return buffer.getvalue()
+
+
+class TTSWorker:
+    """
+    Long-lived worker for Edge TTS jobs.
+
+    Jobs run on a dedicated background event loop instead of a fresh
+    ``asyncio.run`` loop per request. Sync Flask handlers get a
+    thread-safe future, async handlers can await the same job, and a
+    semaphore bounds how many syntheses run at once.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        """
+        Args:
+            max_concurrency: Maximum number of simultaneous TTS syntheses
+        """
+        self.max_concurrency = max_concurrency
+        self._loop = BackgroundLoop("tts-worker")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _bounded(self, job: Awaitable[Any]) -> Any:
+        if self._semaphore is None:
+            # Created on the worker loop, the only loop that awaits it
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await job
+
+    def submit(self, job: Awaitable[Any]) -> Future:
+        """Schedule a TTS coroutine on the worker loop; thread-safe."""
+        return self._loop.submit(self._bounded(job))
+
+    def run(self, job: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a TTS coroutine on the worker loop and wait for its result."""
+        future = self.submit(job)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    async def arun(self, job: Awaitable[Any]) -> Any:
+        """Await a TTS coroutine run on the worker loop from another event loop."""
+        return await asyncio.wrap_future(self.submit(job))
+
+
+_tts_worker = None
+
+def get_tts_worker() -> TTSWorker:
+    """Get the shared TTS worker (TTS_MAX_CONCURRENCY bounds parallel syntheses)."""
+    global _tts_worker
+    if _tts_worker is None:
+        _tts_worker = TTSWorker(int(os.getenv("TTS_MAX_CONCURRENCY", "4")))
+    return _tts_worker
@@ -1,15 +1,32 @@
 import time
 from services.audio_manager import AudioManager
 from services.speech_service import SpeechService
-from services.ai_service import AIService
+from services.ai_service import AIService, ERROR_MESSAGES, BUSY_MESSAGES
 from utils.language_detector import LanguageDetector
 
+WELCOME_MESSAGES = {
+    'vi': "Xin chào! Tôi là trợ lý du lịch của bạn. Bạn có thể hỏi tôi về địa điểm, lịch trình, khách sạn, ẩm thực và nhiều thông tin du lịch khác!",
+    'en': "Hello! I am your travel assistant. You can ask me about destinations, itineraries, hotels, food, and more travel information!"
+}
+
+FAREWELL_MESSAGES = {
+    'vi': "Chào tạm biệt! Chúc bạn có chuyến du lịch vui vẻ!",
+    'en': "Goodbye! Have a wonderful trip!"
+}
+
 class TravelChatbot:
     def __init__(self):
         self.audio_manager = AudioManager()
         self.speech_service = SpeechService()
         self.ai_service = AIService()
         self.language_detector = LanguageDetector()
+        
+        # Tạo sẵn âm thanh cho các câu cố định (lời chào, tạm biệt, thông báo lỗi)
+        self.audio_manager.prewarm([
+            (text, lang)
+            for messages in (WELCOME_MESSAGES, FAREWELL_MESSAGES, ERROR_MESSAGES, BUSY_MESSAGES)
+            for lang, text in messages.items()
+        ])
     
     def start(self):
         """Khởi động chatbot"""
@@ -62,8 +79,8 @@ class TravelChatbot:
     
     def _welcome(self):
         """Tin nhắn chào hỏi"""
-        welcome_msg_vi = "Xin chào! Tôi là trợ lý du lịch của bạn. Bạn có thể hỏi tôi về địa điểm, lịch trình, khách sạn, ẩm thực và nhiều thông tin du lịch khác!"
-        welcome_msg_en = "Hello! I am your travel assistant. You can ask me about destinations, itineraries, hotels, food, and more travel information!"
+        welcome_msg_vi = WELCOME_MESSAGES['vi']
+        welcome_msg_en = WELCOME_MESSAGES['en']
         
         print(f"Chatbot: {welcome_msg_vi}")
         self.audio_manager.text_to_speech(welcome_msg_vi, 'vi')
@@ -73,9 +90,7 @@ class TravelChatbot:
     
     def _farewell(self, lang):
         """Tin nhắn tạm biệt"""
-        farewell = ("Chào tạm biệt! Chúc bạn có chuyến du lịch vui vẻ!" 
-                   if lang == 'vi' 
-                   else "Goodbye! Have a wonderful trip!")
+        farewell = FAREWELL_MESSAGES['vi' if lang == 'vi' else 'en']
         print(f"👋 Chatbot: {farewell}")
         self.audio_manager.text_to_speech(farewell, lang)
         self.audio_manager.wait_for_audio_completion()
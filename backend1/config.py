@@ -10,6 +10,13 @@ class Config:
     TEMPERATURE = 0.7
     MAX_TOKENS = 300
     
+    # LLM HTTP client (pooled keep-alive connections per API host)
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+    LLM_TOTAL_TIMEOUT = float(os.getenv("LLM_TOTAL_TIMEOUT", "60"))
+    
     # Audio Configuration
     ENERGY_THRESHOLD = 4000
     DYNAMIC_ENERGY_THRESHOLD = True
@@ -1,12 +1,8 @@
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import speech_recognition
-import edge_tts
-import asyncio
 import os
-import requests
-import langdetect
-from langdetect import detect
+import sys
 import tempfile
 import logging
 from werkzeug.utils import secure_filename
@@ -14,6 +10,11 @@ import uuid
 import io
 from dotenv import load_dotenv
 
+# Cho phép import các module của backend1 (và qua shared, của backend/) khi chạy từ thư mục main/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared import LLMClient, LLMError, get_tts_worker, synthesize_mp3
+from utils.language_detector import detect_language
+
 load_dotenv()
 
 app = Flask(__name__)
@@ -27,10 +28,8 @@ logger = logging.getLogger(__name__)
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_API_KEY = "your_api_key"  # Thay bằng key thật
 
-headers = {
-    "Authorization": f"Bearer {GROQ_API_KEY}",
-    "Content-Type": "application/json"
-}
+# Client dùng chung: giữ kết nối keep-alive tới Groq giữa các request
+llm_client = LLMClient(GROQ_API_URL, GROQ_API_KEY)
 
 # Cấu hình giọng nói cho Edge TTS
 EDGE_VOICES = {
@@ -43,17 +42,6 @@ recognizer = speech_recognition.Recognizer()
 recognizer.energy_threshold = 4000  # Tăng ngưỡng năng lượng để tránh tiếng ồn
 recognizer.dynamic_energy_threshold = True
 
-def detect_language(text):
-    """Nhận diện ngôn ngữ của văn bản"""
-    try:
-        lang = detect(text)
-        return 'vi' if lang == 'vi' else 'en'
-    except:
-        vietnamese_chars = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
-        if any(char in text.lower() for char in vietnamese_chars):
-            return 'vi'
-        return 'en'
-
 def get_ai_response(user_input, detected_lang):
     """Gọi API để lấy phản hồi từ AI"""
     try:
@@ -68,63 +56,50 @@ def get_ai_response(user_input, detected_lang):
             weather, travel costs, etc. Your answers are strictly limited to the Quang Ninh province. 
             If the question is not travel-related or is outside Quang Ninh, politely decline and suggest asking about travel in Quang Ninh."""
 
-        data = {
-            "model": "llama3-70b-8192",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 300
-        }
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_input}
+        ]
 
         logger.info(f"🤖 Đang gọi AI cho input: {user_input}")
-        response = requests.post(GROQ_API_URL, headers=headers, json=data)
+        try:
+            content = llm_client.chat(messages, model="llama3-70b-8192", temperature=0.7, max_tokens=300)
+        except LLMError as e:
+            logger.error(f"API Error: {e}")
+            return "Xin lỗi, tôi đang gặp sự cố. Vui lòng thử lại sau!" if detected_lang == 'vi' else "Sorry, I'm having issues. Please try again later!"
+        
+        # Làm sạch nội dung - loại bỏ các ký tự đặc biệt và dấu câu thừa
+        content = content.replace('*', '')  # Loại bỏ dấu sao
         
-        if response.status_code == 200:
-            content = response.json()["choices"][0]["message"]["content"]
+        # Đảm bảo câu kết thúc bằng dấu câu phù hợp
+        if content and not content[-1] in ['.', '!', '?']:
+            content += '.'
             
-            # Làm sạch nội dung - loại bỏ các ký tự đặc biệt và dấu câu thừa
-            content = content.replace('*', '')  # Loại bỏ dấu sao
-            
-            # Đảm bảo câu kết thúc bằng dấu câu phù hợp
-            if content and not content[-1] in ['.', '!', '?']:
-                content += '.'
-                
-            return content
-        else:
-            logger.error(f"API Error: {response.status_code} - {response.text}")
-            return "Xin lỗi, tôi đang gặp sự cố. Vui lòng thử lại sau!" if detected_lang == 'vi' else "Sorry, I'm having issues. Please try again later!"
+        return content
             
     except Exception as e:
         logger.error(f"Lỗi API: {e}")
         return "Tôi đang bận, vui lòng thử lại sau!" if detected_lang == 'vi' else "I'm busy, please try again later!"
 
 async def text_to_speech_async(text, lang='vi'):
-    """Chuyển text thành giọng nói sử dụng Edge TTS"""
+    """Chuyển text thành giọng nói sử dụng Edge TTS (trả về bytes MP3, không dùng file tạm)"""
     try:
         logger.info(f"🎵 Đang tạo âm thanh cho: {text[:50]}...")
         
-        # Tạo file tạm thời
-        temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-        filename = temp_file.name
-        temp_file.close()
-        
-        # Sử dụng Edge TTS
+        # Sử dụng Edge TTS, gom dữ liệu âm thanh trong bộ nhớ
         voice = EDGE_VOICES.get(lang, EDGE_VOICES['vi'])
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(filename)
+        audio = await synthesize_mp3(text, voice)
         
-        logger.info(f"📝 Âm thanh đã được tạo: {filename}")
-        return filename
+        logger.info(f"📝 Âm thanh đã được tạo: {len(audio)} bytes")
+        return audio
         
     except Exception as e:
         logger.error(f"❌ Lỗi tạo âm thanh: {e}")
         return None
 
 def text_to_speech(text, lang='vi'):
-    """Wrapper synchronous cho text_to_speech_async"""
-    return asyncio.run(text_to_speech_async(text, lang))
+    """Wrapper synchronous cho text_to_speech_async (chạy trên event loop TTS dùng chung)"""
+    return get_tts_worker().run(text_to_speech_async(text, lang))
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -257,42 +232,19 @@ def generate_speech():
         
         logger.info(f"🔊 Yêu cầu tạo âm thanh: {text[:50]}... (lang: {lang})")
         
-        # Tạo file âm thanh
-        audio_file = text_to_speech(text, lang)
+        # Tạo âm thanh trong bộ nhớ
+        audio = text_to_speech(text, lang)
         
-        if audio_file and os.path.exists(audio_file):
+        if audio:
             # Tạo unique filename để tránh conflict
             unique_filename = f"speech_{uuid.uuid4().hex}.mp3"
             
-            def cleanup_file():
-                """Cleanup file sau khi gửi"""
-                try:
-                    if os.path.exists(audio_file):
-                        os.unlink(audio_file)
-                        logger.info(f"🗑️ Đã xóa file tạm thời: {audio_file}")
-                except Exception as e:
-                    logger.error(f"Lỗi cleanup file: {e}")
-            
-            # Trả file và cleanup sau khi gửi
-            try:
-                response = send_file(
-                    audio_file,
-                    as_attachment=True,
-                    download_name=unique_filename,
-                    mimetype='audio/mpeg'
-                )
-                
-                # Cleanup file sau khi response được gửi
-                @response.call_on_close
-                def cleanup():
-                    cleanup_file()
-                
-                return response
-                
-            except Exception as e:
-                logger.error(f"Lỗi gửi file: {e}")
-                cleanup_file()
-                return jsonify({'error': 'Lỗi gửi file âm thanh'}), 500
+            return send_file(
+                io.BytesIO(audio),
+                as_attachment=True,
+                download_name=unique_filename,
+                mimetype='audio/mpeg'
+            )
         else:
             return jsonify({'error': 'Không thể tạo file âm thanh'}), 500
             
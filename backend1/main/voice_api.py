@@ -1,22 +1,20 @@
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import speech_recognition as sr
-import edge_tts
-import asyncio
 import os
-import requests
-from langdetect import detect
-import tempfile
+import sys
 import io
 
+# Cho phép import các module của backend1 (và qua shared, của backend/) khi chạy từ thư mục main/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared import LLMClient, LLMError, get_tts_worker, synthesize_mp3
+from utils.language_detector import detect_language
+
 app = Flask(__name__)
 CORS(app)
 
 url = "https://api.groq.com/openai/v1/chat/completions"
-headers = {
-    "Authorization": "Bearer your_api_key",  # Thay bằng key thật
-    "Content-Type": "application/json"
-}
+llm_client = LLMClient(url, "your_api_key")  # Thay bằng key thật
 
 # Cấu hình giọng nói cho Edge TTS
 EDGE_VOICES = {
@@ -24,17 +22,6 @@ EDGE_VOICES = {
     'en': 'en-US-AriaNeural'     # Giọng nữ tiếng Anh
 }
 
-def detect_language(text):
-    """Nhận diện ngôn ngữ của văn bản"""
-    try:
-        lang = detect(text)
-        return 'vi' if lang == 'vi' else 'en'
-    except:
-        vietnamese_chars = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
-        if any(char in text.lower() for char in vietnamese_chars):
-            return 'vi'
-        return 'en'
-
 def get_ai_response(user_input, detected_lang):
     """Gọi API để lấy phản hồi từ AI"""
     try:
@@ -49,27 +36,22 @@ def get_ai_response(user_input, detected_lang):
         weather, travel costs, etc. Your answers are strictly limited to the Quang Ninh province. 
         If the question is not travel-related or is outside Quang Ninh, politely decline and suggest asking about travel in Quang Ninh."""
 
-        data = {
-            "model": "llama3-70b-8192",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 300
-        }
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_input}
+        ]
 
         print("🤖 Đang gọi AI...")
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            content = response.json()["choices"][0]["message"]["content"]
-            content = content.replace('*', '')  # Loại bỏ dấu sao
-            if content and not content[-1] in ['.', '!', '?']:
-                content += '.'
-            return content, detected_lang
-        else:
+        try:
+            content = llm_client.chat(messages, model="llama3-70b-8192", temperature=0.7, max_tokens=300)
+        except LLMError as e:
+            print(f"Lỗi API: {e}")
             error_msg = "Xin lỗi, tôi đang gặp sự cố. Vui lòng thử lại sau!" if detected_lang == 'vi' else "Sorry, I'm having issues. Please try again later!"
             return error_msg, detected_lang
+        content = content.replace('*', '')  # Loại bỏ dấu sao
+        if content and not content[-1] in ['.', '!', '?']:
+            content += '.'
+        return content, detected_lang
             
     except Exception as e:
         print(f"Lỗi API: {e}")
@@ -77,17 +59,10 @@ def get_ai_response(user_input, detected_lang):
         return error_msg, detected_lang
 
 async def text_to_speech(text, lang='vi'):
-    """Chuyển text thành file âm thanh"""
+    """Chuyển text thành âm thanh MP3 (bytes, tạo trong bộ nhớ)"""
     try:
         voice = EDGE_VOICES.get(lang, EDGE_VOICES['vi'])
-        
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-            filename = tmp_file.name
-            
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(filename)
-        
-        return filename
+        return await synthesize_mp3(text, voice)
     except Exception as e:
         print(f"❌ Lỗi tạo âm thanh: {e}")
         return None
@@ -139,19 +114,15 @@ def chat_voice():
         print(f"🤖 Phản hồi AI: {response_text}")
         
         # Chuyển text thành speech
-        audio_file = asyncio.run(text_to_speech(response_text, detected_lang))
+        audio = get_tts_worker().run(text_to_speech(response_text, detected_lang))
         
-        if audio_file and os.path.exists(audio_file):
-            try:
-                return send_file(
-                    audio_file,
-                    mimetype='audio/mpeg',
-                    as_attachment=True,
-                    download_name='response.mp3'
-                )
-            finally:
-                # Cleanup: xóa file tạm sau khi gửi
-                os.remove(audio_file)
+        if audio:
+            return send_file(
+                io.BytesIO(audio),
+                mimetype='audio/mpeg',
+                as_attachment=True,
+                download_name='response.mp3'
+            )
         else:
             return jsonify({"error": "Không thể tạo âm thanh"}), 500
             
@@ -172,19 +143,15 @@ def speak():
             
         print(f"🎵 Đang tạo âm thanh cho: {text}")
         
-        audio_file = asyncio.run(text_to_speech(text, lang))
+        audio = get_tts_worker().run(text_to_speech(text, lang))
         
-        if audio_file and os.path.exists(audio_file):
-            try:
-                return send_file(
-                    audio_file,
-                    mimetype='audio/mpeg',
-                    as_attachment=True,
-                    download_name='speech.mp3'
-                )
-            finally:
-                # Cleanup: xóa file tạm sau khi gửi
-                os.remove(audio_file)
+        if audio:
+            return send_file(
+                io.BytesIO(audio),
+                mimetype='audio/mpeg',
+                as_attachment=True,
+                download_name='speech.mp3'
+            )
         else:
             return jsonify({"error": "Không thể tạo âm thanh"}), 500
             
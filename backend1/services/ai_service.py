@@ -1,13 +1,28 @@
-import requests
 from config import Config
+from shared import LLMClient, LLMError
+
+# Câu trả lời cố định khi gọi API thất bại
+ERROR_MESSAGES = {
+    'vi': "Xin lỗi, tôi đang gặp sự cố. Vui lòng thử lại sau!",
+    'en': "Sorry, I'm having issues. Please try again later!"
+}
+
+BUSY_MESSAGES = {
+    'vi': "Tôi đang bận, vui lòng thử lại sau!",
+    'en': "I'm busy, please try again later!"
+}
 
 class AIService:
     def __init__(self):
-        self.url = Config.GROQ_API_URL
-        self.headers = {
-            "Authorization": f"Bearer {Config.GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        self.client = LLMClient(
+            api_url=Config.GROQ_API_URL,
+            api_key=Config.GROQ_API_KEY,
+            max_connections=Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_MAX_KEEPALIVE,
+            connect_timeout=Config.LLM_CONNECT_TIMEOUT,
+            read_timeout=Config.LLM_READ_TIMEOUT,
+            total_timeout=Config.LLM_TOTAL_TIMEOUT
+        )
     
     def get_response(self, user_input, detected_lang):
         """Gọi API để lấy phản hồi từ AI"""
@@ -15,37 +30,32 @@ class AIService:
             system_prompt = (Config.SYSTEM_PROMPT_VI if detected_lang == 'vi' 
                            else Config.SYSTEM_PROMPT_EN)
             
-            data = {
-                "model": Config.MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                "temperature": Config.TEMPERATURE,
-                "max_tokens": Config.MAX_TOKENS
-            }
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input}
+            ]
 
             print("🤖 Đang gọi AI...")
-            response = requests.post(self.url, headers=self.headers, json=data)
+            try:
+                content = self.client.chat(
+                    messages,
+                    model=Config.MODEL_NAME,
+                    temperature=Config.TEMPERATURE,
+                    max_tokens=Config.MAX_TOKENS
+                )
+            except LLMError as e:
+                print(f"Lỗi API: {e}")
+                return ERROR_MESSAGES['vi' if detected_lang == 'vi' else 'en']
             
-            if response.status_code == 200:
-                content = response.json()["choices"][0]["message"]["content"]
-                
-                # Làm sạch nội dung
-                content = content.replace('*', '')
+            # Làm sạch nội dung
+            content = content.replace('*', '')
+            
+            # Đảm bảo câu kết thúc bằng dấu câu phù hợp
+            if content and not content[-1] in ['.', '!', '?']:
+                content += '.'
                 
-                # Đảm bảo câu kết thúc bằng dấu câu phù hợp
-                if content and not content[-1] in ['.', '!', '?']:
-                    content += '.'
-                    
-                return content
-            else:
-                return ("Xin lỗi, tôi đang gặp sự cố. Vui lòng thử lại sau!" 
-                       if detected_lang == 'vi' 
-                       else "Sorry, I'm having issues. Please try again later!")
+            return content
                 
         except Exception as e:
             print(f"Lỗi API: {e}")
-            return ("Tôi đang bận, vui lòng thử lại sau!" 
-                   if detected_lang == 'vi' 
-                   else "I'm busy, please try again later!")
\ No newline at end of file
+            return BUSY_MESSAGES['vi' if detected_lang == 'vi' else 'en']
\ No newline at end of file
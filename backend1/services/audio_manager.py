@@ -1,13 +1,11 @@
 import sounddevice as sd
 import soundfile as sf
-import os
+import io
 import time
 from queue import Queue
 from threading import Thread, Event
-import tempfile
-import edge_tts
-import asyncio
 from config import Config
+from shared import get_tts_cache, get_tts_worker, synthesize_mp3
 
 class AudioManager:
     def __init__(self):
@@ -23,22 +21,18 @@ class AudioManager:
         """Worker thread để phát âm thanh tuần tự"""
         while True:
             if not self.audio_queue.empty():
-                audio_file = self.audio_queue.get()
+                audio = self.audio_queue.get()
                 
                 # Báo hiệu bắt đầu phát âm thanh
                 self.audio_finished_event.clear()
                 
                 try:
                     print("🔊 Đang phát âm thanh...")
-                    data, sample_rate = sf.read(audio_file)
+                    data, sample_rate = sf.read(io.BytesIO(audio))
                     sd.play(data, sample_rate)
                     sd.wait()
                     
                     time.sleep(0.5)  # Delay để đảm bảo âm thanh kết thúc hoàn toàn
-                    
-                    # Xóa file sau khi phát xong
-                    if os.path.exists(audio_file):
-                        os.remove(audio_file)
                         
                     print("✅ Âm thanh đã phát xong")
                     
@@ -49,22 +43,37 @@ class AudioManager:
             
             time.sleep(0.01)
     
+    @staticmethod
+    async def _synthesize_and_cache(text, voice):
+        """Tạo âm thanh bằng Edge TTS và lưu vào cache"""
+        audio = await synthesize_mp3(text, voice)
+        get_tts_cache().put(voice, text, audio)
+        return audio
+    
+    def prewarm(self, phrases):
+        """Tạo sẵn (chạy nền) âm thanh cho các câu cố định chưa có trong cache
+        
+        Args:
+            phrases: Danh sách (text, lang)
+        """
+        for text, lang in phrases:
+            voice = Config.EDGE_VOICES.get(lang, Config.EDGE_VOICES['vi'])
+            if not get_tts_cache().contains(voice, text):
+                get_tts_worker().submit(self._synthesize_and_cache(text, voice))
+    
     def text_to_speech(self, text, lang='vi'):
         """Chuyển text thành giọng nói và thêm vào queue"""
         try:
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-                filename = tmp_file.name
-            
             print("🎵 Đang tạo âm thanh...")
             
             voice = Config.EDGE_VOICES.get(lang, Config.EDGE_VOICES['vi'])
             
-            async def create_tts():
-                communicate = edge_tts.Communicate(text, voice)
-                await communicate.save(filename)
-            
-            asyncio.run(create_tts())
-            self.audio_queue.put(filename)
+            # Câu đã có trong cache thì không cần gọi Edge TTS
+            audio = get_tts_cache().get(voice, text)
+            if audio is None:
+                # Chạy trên event loop TTS dùng chung, âm thanh giữ trong bộ nhớ (không dùng file tạm)
+                audio = get_tts_worker().run(self._synthesize_and_cache(text, voice))
+            self.audio_queue.put(audio)
             print("📝 Âm thanh đã được thêm vào queue")
             
         except Exception as e:
@@ -0,0 +1,15 @@
+"""Các module dùng chung với backend/ (một bản cài đặt duy nhất, import trực tiếp từ backend/)."""
+import os
+import sys
+
+# Thêm sau backend1 để các module trùng tên của backend1 (app, config, ...) vẫn được ưu tiên
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from language_detector import detect_language  # noqa: E402
+from llm_client import LLMClient, LLMError  # noqa: E402
+from tts_cache import get_tts_cache  # noqa: E402
+from tts_worker import get_tts_worker, synthesize_mp3  # noqa: E402
+
+__all__ = ['detect_language', 'LLMClient', 'LLMError', 'get_tts_cache', 'get_tts_worker', 'synthesize_mp3']
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test that the semantic answer cache keeps listing questions with different filters apart
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from answer_cache import SemanticAnswerCache, cache_scope  # noqa: E402
+from attribute_index import AttributeIndex  # noqa: E402
+
+LISTINGS = [
+    {'section': 'Homestay', 'type': 'Homestay', 'price_min': 400000, 'price_max': 700000,
+     'area': 'Hạ Long', 'locality': 'Bãi Cháy'},
+    {'section': 'Homestay', 'type': 'Homestay', 'price_min': 600000, 'price_max': 900000,
+     'area': 'Hạ Long', 'locality': 'Tuần Châu'},
+    {}
+]
+
+# Near-duplicate questions embed almost identically; use the same vector for both
+VECTOR = [0.1, 0.2, 0.3, 0.4]
+
+
+def _scope(index, query):
+    return cache_scope('vi', index.parse_filters(query))
+
+
+def test_price_only_difference_misses():
+    """Questions that differ only by price do not share an answer"""
+    index = AttributeIndex.from_metadatas(LISTINGS)
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.put(VECTOR, _scope(index, "homestay dưới 500k ở Hạ Long"), {'answer': '500k', 'sources': []})
+
+    assert cache.get(VECTOR, _scope(index, "homestay dưới 800k ở Hạ Long")) is None
+    assert cache.get(VECTOR, _scope(index, "homestay dưới 500k ở Hạ Long"))['answer'] == '500k'
+
+
+def test_place_only_difference_misses():
+    """Questions that differ only by place do not share an answer"""
+    index = AttributeIndex.from_metadatas(LISTINGS)
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.put(VECTOR, _scope(index, "homestay ở Bãi Cháy"), {'answer': 'Bãi Cháy', 'sources': []})
+
+    assert cache.get(VECTOR, _scope(index, "homestay ở Tuần Châu")) is None
+
+
+def test_unfiltered_questions_share_language_scope():
+    """Questions without filters are scoped by language only"""
+    assert cache_scope('vi', {}) == cache_scope('vi') == 'vi'
+    assert cache_scope(None) == 'default'
+
+
+if __name__ == "__main__":
+    print("🚀 Testing semantic answer cache scopes...")
+    test_price_only_difference_misses()
+    test_place_only_difference_misses()
+    test_unfiltered_questions_share_language_scope()
+    print("✅ Answer cache tests passed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the listing filters parsed from queries by the attribute index
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from attribute_index import AttributeIndex, parse_price_filter  # noqa: E402
+
+LISTINGS = [
+    {'section': 'Khách sạn', 'type': 'Khách sạn', 'price_min': 800000, 'price_max': 1200000,
+     'area': 'Hạ Long', 'locality': 'Bãi Cháy'},
+    {'section': 'Homestay', 'type': 'Homestay', 'price_min': 400000, 'price_max': 700000,
+     'area': 'Cô Tô', 'locality': 'Thị trấn Cô Tô'},
+    {}
+]
+
+# (query, (price_min, price_max))
+PRICE_CASES = [
+    # Docstring examples
+    ("homestay dưới 500k", (None, 500000)),
+    ("từ 2 đến 3 triệu", (2000000, 3000000)),
+    ("trên 1 triệu", (1000000, None)),
+    # English units and ranges
+    ("hotel below 1 million", (None, 1000000)),
+    ("hotel from 2 to 3 million", (2000000, 3000000)),
+    ("resort under 2 mil", (None, 2000000)),
+    # "1tr5" is 1.5 million
+    ("khách sạn dưới 1tr5", (None, 1500000)),
+    ("hotel below 1tr5", (None, 1500000)),
+    ("từ 1tr5 đến 2tr", (1500000, 2000000)),
+    # Numbers that are not prices
+    ("lịch trình từ 2 ngày", (None, None)),
+    ("Hotels in Ha Long", (None, None)),
+]
+
+
+def test_price_filter():
+    """Prices are parsed from Vietnamese and English queries"""
+    for query, expected in PRICE_CASES:
+        assert parse_price_filter(query) == expected, query
+
+
+def test_plural_types():
+    """English plurals name the same accommodation type"""
+    index = AttributeIndex.from_metadatas(LISTINGS)
+    filters = index.parse_filters("Hotels in Ha Long")
+    assert filters == {'types': ['khach san'], 'places': ['ha long']}
+    for query in ("resorts", "apartments", "motels"):
+        assert 'types' in index.parse_filters(query), query
+
+
+def test_listing_filters():
+    """Type, place and price combine into one filter"""
+    index = AttributeIndex.from_metadatas(LISTINGS)
+    filters = index.parse_filters("hotel from 2 to 3 million")
+    assert filters == {'types': ['khach san'], 'price_min': 2000000, 'price_max': 3000000}
+
+
+if __name__ == "__main__":
+    print("🚀 Testing attribute index filters...")
+    test_price_filter()
+    test_plural_types()
+    test_listing_filters()
+    print("✅ Attribute index tests passed!")
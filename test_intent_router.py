@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test the intent router used by the chat and voice endpoints
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from intent_router import classify_intent, DATETIME, FAREWELL, GREETING, TOURISM, OTHER  # noqa: E402
+
+# (message, expected route, answered locally without an LLM call)
+CASES = [
+    # Plain time/date questions are answered from templates
+    ("Bây giờ là mấy giờ?", DATETIME, True),
+    ("Hôm nay ngày mấy?", DATETIME, True),
+    ("Năm nay là năm mấy?", DATETIME, True),
+    ("What time is it?", DATETIME, True),
+    ("What is the date today?", DATETIME, True),
+    ("What's the time now?", DATETIME, True),
+    # Time questions about tourism go to RAG
+    ("Chợ đêm Hạ Long mở cửa lúc mấy giờ?", DATETIME, False),
+    ("What time does the market open?", DATETIME, False),
+    # Dates of events are questions, not "what is today's date"
+    ("Tell me the date of Tet", OTHER, False),
+    ("the time zone of Vietnam", OTHER, False),
+    # Whole-word matching: "năm" in a duration, "time" inside another word
+    ("5 năm nữa Hạ Long sẽ thế nào?", TOURISM, False),
+    ("sometimes I visit Ha Long", TOURISM, False),
+    ("Tôi đã sống ở đây 5 năm", OTHER, False),
+    ("Sometimes I feel lost", OTHER, False),
+    # Farewells open a short message
+    ("Tạm biệt", FAREWELL, True),
+    ("Bye!", FAREWELL, True),
+    ("Kết thúc", FAREWELL, True),
+    ("Tạm biệt nhé, cảm ơn bạn", FAREWELL, True),
+    ("Khi nào kết thúc?", OTHER, False),
+    ("Lễ hội kết thúc khi nào?", TOURISM, False),
+    # Greetings are short; longer messages carry a question
+    ("Xin chào", GREETING, True),
+    ("Hello!", GREETING, True),
+    ("Xin chào, tôi muốn hỏi một câu hỏi dài về lịch sử", OTHER, False),
+]
+
+
+def test_routes():
+    """Each message gets the expected route"""
+    for message, name, is_local in CASES:
+        intent = classify_intent(message)
+        assert (intent.name, intent.is_local) == (name, is_local), (message, intent)
+
+
+if __name__ == "__main__":
+    print("🚀 Testing intent router...")
+    test_routes()
+    print("✅ Intent router tests passed!")
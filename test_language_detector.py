@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test the shared vi/en language detector against the heuristic it replaced
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend1'))
+
+from language_detector import detect_language  # noqa: E402
+
+
+def _fallback_language_detection(text: str) -> str:
+    """The substring heuristic of backend/noi.py before the shared detector (reference only)."""
+    text_lower = text.lower().strip()
+
+    vietnamese_chars = 'àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ'
+    if any(char in text_lower for char in vietnamese_chars):
+        return 'vi'
+
+    vietnamese_words = ['tôi', 'bạn', 'chúng', 'của', 'trong', 'một', 'có', 'được', 'này', 'đó', 'là', 'và', 'với', 'cho', 'về', 'du lịch', 'quảng ninh', 'hạ long']
+    english_words = ['the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'this', 'that', 'is', 'are', 'what', 'where', 'how', 'can', 'could', 'would', 'travel', 'tourism', 'quang ninh', 'ha long']
+
+    vi_score = sum(1 for word in vietnamese_words if word in text_lower)
+    en_score = sum(1 for word in english_words if word in text_lower)
+
+    english_patterns = ['what', 'where', 'how', 'can you', 'could you', 'would you', 'tell me', 'show me']
+    if any(pattern in text_lower for pattern in english_patterns):
+        en_score += 2
+
+    vietnamese_patterns = ['bạn có thể', 'cho tôi biết', 'giới thiệu', 'hãy', 'làm sao']
+    if any(pattern in text_lower for pattern in vietnamese_patterns):
+        vi_score += 2
+
+    return 'en' if en_score > vi_score else 'vi'
+
+
+CORPUS = [
+    # Vietnamese with diacritics
+    "Xin chào! Bạn có thể giới thiệu về du lịch Quảng Ninh không?",
+    "Vịnh Hạ Long có gì đặc biệt?",
+    "Cho tôi biết giá vé tham quan vịnh Hạ Long",
+    "Khách sạn nào gần bãi Cháy giá rẻ?",
+    "Homestay ở Cô Tô dưới 500k",
+    "Đi Yên Tử mùa nào đẹp nhất?",
+    "Món ăn đặc sản Quảng Ninh là gì?",
+    "Làm sao để đi từ Hà Nội đến Hạ Long?",
+    "Hãy gợi ý lịch trình 3 ngày 2 đêm",
+    "Bây giờ là mấy giờ?",
+    "Hôm nay thứ mấy?",
+    "Cảm ơn bạn nhiều",
+    "Tạm biệt",
+    "Chợ đêm Hạ Long mở cửa lúc mấy giờ?",
+    "Tour du thuyền ngủ đêm trên vịnh giá bao nhiêu?",
+    # Vietnamese typed without diacritics, and bare place names
+    "xin chao ban",
+    "toi muon di ha long",
+    "du lich quang ninh co gi hay",
+    "cho toi biet khach san o mong cai",
+    "ha long bay",
+    "Quang Ninh",
+    "Ha Long",
+    "Co To island",
+    "OK",
+    # English
+    "Hello! Can you tell me about tourism in Quang Ninh?",
+    "What are the best places to visit in Quang Ninh?",
+    "Where is Ha Long Bay?",
+    "How do I get from Hanoi to Ha Long?",
+    "Can you recommend a cheap hotel near the beach?",
+    "Could you show me the cruise prices?",
+    "Tell me about the night market",
+    "Is there a border market in Mong Cai?",
+    "What time is it now?",
+    "Which island is the best for swimming?",
+    "I want to book a tour for two days",
+    "Hello",
+    "Hi",
+    "Bye",
+    "Goodbye",
+    "Thanks!",
+    "Thank you very much",
+    "Please help me plan a trip",
+    "When is the best time to visit Yen Tu?",
+    "Restaurants with seafood in Ha Long",
+    "How much is a ticket to Sun World?",
+    "Would you suggest a resort on Tuan Chau?",
+    "I like kayaking",
+    "Food recommendations please",
+    "Best hotels in Ha Long",
+    "Is it raining in Ha Long today?",
+]
+
+# Queries where the new detector deliberately answers differently, with its answer
+INTENDED_DISAGREEMENTS = {
+    # Unaccented Vietnamese: the old heuristic matched English words inside
+    # Vietnamese ones ('in' in 'xin', 'to' in 'toi', 'on' in 'mong')
+    "xin chao ban": 'vi',
+    "cho toi biet khach san o mong cai": 'vi',
+    # Short English phrases with no word of the old vocabulary tied to 'vi'
+    # (langdetect, used before the fallback, answered 'en')
+    "Hello": 'en',
+    "Hi": 'en',
+    "Bye": 'en',
+    "Goodbye": 'en',
+    "Thanks!": 'en',
+    "Thank you very much": 'en',
+    "Please help me plan a trip": 'en',
+}
+
+
+def test_agrees_with_fallback_heuristic():
+    """The detector matches the old heuristic on the corpus, except the listed queries"""
+    assert len(CORPUS) == 50
+    for query in CORPUS:
+        old, new = _fallback_language_detection(query), detect_language(query)
+        if query in INTENDED_DISAGREEMENTS:
+            assert new == INTENDED_DISAGREEMENTS[query] != old, query
+        else:
+            assert new == old, query
+
+
+def test_backend1_uses_shared_detector():
+    """backend1 imports the same detector instead of a copy"""
+    from utils.language_detector import LanguageDetector, detect_language as backend1_detect
+
+    assert backend1_detect is detect_language
+    assert LanguageDetector.detect_language("Where is Ha Long Bay?") == 'en'
+
+
+if __name__ == "__main__":
+    print("🚀 Testing language detector...")
+    test_agrees_with_fallback_heuristic()
+    test_backend1_uses_shared_detector()
+    print("✅ Language detector tests passed!")